@@ -0,0 +1,209 @@
+"""
+屏保启动历史模块
+记录每次屏保播放（开始时间、播放时长、唤醒延迟、是否被用户唤醒），用于统计使用情况
+
+原始记录为定长二进制、只追加写入；定期压缩为按小时和按天的汇总（JSON），
+压缩后清空原始记录，并只保留有限天数的汇总，文件大小不会无限增长。
+查询只读取汇总和内存中尚未压缩的少量记录
+"""
+
+import json
+import math
+import os
+import struct
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+MAGIC = b"ACTHIS01"
+# 文件头中的压缩代数：汇总记录已合并的代数，原始文件代数相同时说明已合并过
+HEADER = struct.Struct("<8sQ")
+# 开始时间(秒), 播放时长(秒), 唤醒延迟(毫秒, 未知为NaN), 是否被用户唤醒
+RECORD = struct.Struct("<dffB")
+
+# 播放不到这么久就被唤醒，视为用户很快回来
+QUICK_DISMISS_SECONDS = 10
+
+
+def _empty_bucket() -> Dict[str, float]:
+    return {"count": 0, "seconds": 0.0, "dismissed": 0, "quick": 0, "wake_ms_sum": 0.0, "wake_n": 0}
+
+
+def _add_to_bucket(bucket: Dict[str, float], duration: float, wake_ms: float, dismissed: bool):
+    bucket["count"] += 1
+    bucket["seconds"] += duration
+    if dismissed:
+        bucket["dismissed"] += 1
+        if duration < QUICK_DISMISS_SECONDS:
+            bucket["quick"] += 1
+    if not math.isnan(wake_ms):
+        bucket["wake_ms_sum"] += wake_ms
+        bucket["wake_n"] += 1
+
+
+def summarize(bucket: Dict[str, float]) -> Dict[str, Any]:
+    """把汇总转换为便于显示的统计值"""
+    count = bucket["count"]
+    return {
+        "activations": count,
+        "total_minutes": round(bucket["seconds"] / 60, 1),
+        "avg_seconds": round(bucket["seconds"] / count, 1) if count else 0.0,
+        "quick_dismissals": bucket["quick"],
+        "avg_wake_ms": round(bucket["wake_ms_sum"] / bucket["wake_n"], 1) if bucket["wake_n"] else None,
+    }
+
+
+class ActivationHistory:
+    """屏保启动历史"""
+
+    def __init__(self, path: str = "activation_history.bin", compact_every: int = 64,
+                 compact_interval: float = 3600, hourly_retention_days: int = 7,
+                 daily_retention_days: int = 400):
+        self.path = path
+        self.stats_path = os.path.splitext(path)[0] + ".stats.json"
+        self.compact_every = compact_every
+        self.compact_interval = compact_interval
+        self.hourly_retention_days = hourly_retention_days
+        self.daily_retention_days = daily_retention_days
+
+        self._lock = threading.Lock()
+        self._pending: List[tuple] = []
+        self._last_compact = time.monotonic()
+        self.stats = self._load_stats()
+        # 上次运行未压缩的记录（压缩中途中断时原始记录可能已经合并过）
+        self._generation, records = self._read_raw()
+        if self._generation == self.stats["generation"]:
+            self._pending = records
+            if self._pending:
+                self.compact()
+        else:
+            self._generation = self.stats["generation"]
+            self._reset_raw()
+
+    def _load_stats(self) -> Dict[str, Any]:
+        try:
+            with open(self.stats_path, "r", encoding="utf-8") as f:
+                stats = json.load(f)
+            if {"hourly", "daily", "generation"} <= stats.keys():
+                return stats
+        except (OSError, ValueError):
+            pass
+        return {"hourly": {}, "daily": {}, "generation": 0}
+
+    def _read_raw(self) -> tuple:
+        """返回 (代数, 记录列表)"""
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return self.stats["generation"], []
+        if len(data) < HEADER.size or not data.startswith(MAGIC):
+            return self.stats["generation"], []
+        _, generation = HEADER.unpack_from(data)
+        body = memoryview(data)[HEADER.size:]
+        # 忽略写入中断留下的不完整记录
+        body = body[:len(body) - len(body) % RECORD.size]
+        return generation, list(RECORD.iter_unpack(body))
+
+    def _reset_raw(self):
+        with open(self.path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, self._generation))
+
+    def record(self, started: float, duration: float, wake_ms: Optional[float] = None,
+               dismissed: bool = True):
+        """
+        记录一次屏保播放
+
+        Args:
+            started (float): 开始时间（time.time()）
+            duration (float): 播放时长（秒）
+            wake_ms (float, optional): 从用户输入到屏保隐藏的毫秒数
+            dismissed (bool): 是否由用户输入唤醒
+        """
+        entry = (started, max(0.0, duration), float("nan") if wake_ms is None else wake_ms, int(dismissed))
+        with self._lock:
+            try:
+                if not os.path.exists(self.path):
+                    self._reset_raw()
+                with open(self.path, "ab") as f:
+                    f.write(RECORD.pack(*entry))
+            except OSError as e:
+                print(f"写入启动历史失败: {e}")
+            self._pending.append(entry)
+            due = (len(self._pending) >= self.compact_every
+                   or time.monotonic() - self._last_compact >= self.compact_interval)
+        if due:
+            self.compact()
+
+    def compact(self):
+        """把原始记录合并到按小时/按天的汇总，清空原始记录并删除过期汇总"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._last_compact = time.monotonic()
+            stats = self.stats
+            for started, duration, wake_ms, dismissed in pending:
+                moment = datetime.fromtimestamp(started)
+                for table, key in (("hourly", moment.strftime("%Y-%m-%dT%H")),
+                                   ("daily", moment.strftime("%Y-%m-%d"))):
+                    _add_to_bucket(stats[table].setdefault(key, _empty_bucket()), duration, wake_ms, dismissed)
+            # 汇总记录已合并当前代数，新的原始文件使用下一代
+            self._generation += 1
+            stats["generation"] = self._generation
+
+            today = date.today()
+            hourly_cutoff = (today - timedelta(days=self.hourly_retention_days)).strftime("%Y-%m-%dT00")
+            daily_cutoff = (today - timedelta(days=self.daily_retention_days)).isoformat()
+            stats["hourly"] = {k: v for k, v in stats["hourly"].items() if k >= hourly_cutoff}
+            stats["daily"] = {k: v for k, v in stats["daily"].items() if k >= daily_cutoff}
+
+            try:
+                # 先写汇总再清空原始记录；中途中断时代数不一致，重新打开时不会重复计入
+                temp_path = self.stats_path + ".tmp"
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump(stats, f, ensure_ascii=False)
+                os.replace(temp_path, self.stats_path)
+                self._reset_raw()
+            except OSError as e:
+                print(f"压缩启动历史失败: {e}")
+
+    def day_stats(self, day: date = None) -> Dict[str, Any]:
+        """某一天的统计（默认今天），包括尚未压缩的记录"""
+        day = day or date.today()
+        key = day.isoformat()
+        with self._lock:
+            bucket = dict(self.stats["daily"].get(key) or _empty_bucket())
+            for started, duration, wake_ms, dismissed in self._pending:
+                if datetime.fromtimestamp(started).date() == day:
+                    _add_to_bucket(bucket, duration, wake_ms, dismissed)
+        return summarize(bucket)
+
+    def hourly_stats(self, day: date = None) -> List[Dict[str, Any]]:
+        """某一天每小时的统计（24项，只包含已压缩的记录）"""
+        prefix = (day or date.today()).isoformat()
+        with self._lock:
+            hourly = self.stats["hourly"]
+            return [summarize(hourly.get(f"{prefix}T{hour:02d}") or _empty_bucket()) for hour in range(24)]
+
+
+if __name__ == "__main__":
+    # 测试记录、压缩和查询
+    import tempfile
+
+    work_dir = tempfile.mkdtemp(prefix="activation_history_")
+    path = os.path.join(work_dir, "activation_history.bin")
+    history = ActivationHistory(path, compact_every=100)
+    now = time.time()
+    for i in range(250):
+        history.record(now - i * 60, duration=5 + i % 30, wake_ms=20.0, dismissed=True)
+    history.record(now - 40 * 86400, duration=60, dismissed=False)
+
+    assert os.path.getsize(path) == HEADER.size + 51 * RECORD.size, os.path.getsize(path)
+    today = history.day_stats()
+    print(f"今日: {today}")
+
+    reopened = ActivationHistory(path)
+    assert os.path.getsize(path) == HEADER.size, "重新打开时应压缩上次未压缩的记录"
+    assert reopened.day_stats()["activations"] == today["activations"]
+    assert not any(key < (date.today() - timedelta(days=7)).isoformat() for key in reopened.stats["hourly"])
+    print(f"✅ 压缩后原始记录已清空，汇总文件 {os.path.getsize(reopened.stats_path)} 字节")
@@ -0,0 +1,898 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+性能基准测试
+测量常驻内存、启动/退出延迟等关键指标
+
+用法:
+    python benchmark.py            # 运行全部基准
+    python benchmark.py daemon_rss # 只运行指定基准
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from typing import Callable, Dict
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+BENCHMARKS: Dict[str, Callable[[], dict]] = {}
+
+
+def benchmark(name: str):
+    """注册基准测试"""
+    def decorator(func):
+        BENCHMARKS[name] = func
+        return func
+    return decorator
+
+
+class BenchmarkSkipped(Exception):
+    """当前环境缺少依赖，跳过该基准"""
+
+
+def has_module(name: str) -> bool:
+    """检查可选依赖是否已安装（不实际导入）"""
+    import importlib.util
+    return importlib.util.find_spec(name) is not None
+
+
+def run_child(code: str, config: dict = None, timeout: float = 60) -> dict:
+    """
+    在独立的Python进程中运行代码，避免基准之间互相影响内存
+
+    子进程在临时目录中运行（使用独立的config.json），
+    最后一行标准输出必须是JSON结果
+    """
+    work_dir = tempfile.mkdtemp(prefix="screensaver_bench_")
+    try:
+        with open(os.path.join(work_dir, "config.json"), "w", encoding="utf-8") as f:
+            json.dump(config or {"video_path": "video.mp4"}, f)
+        env = dict(os.environ, PYTHONPATH=ROOT_DIR, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+        result = subprocess.run([sys.executable, "-c", code], cwd=work_dir, env=env,
+                                capture_output=True, text=True, timeout=timeout)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or f"子进程退出码 {result.returncode}")
+        return json.loads(result.stdout.strip().splitlines()[-1])
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+@benchmark("daemon_rss")
+def bench_daemon_rss() -> dict:
+    """守护模式等待空闲时的常驻内存，对比加载Qt后的常驻内存"""
+    waiting = run_child("""
+import json, sys, time
+from metrics import get_rss_bytes
+from screensaver_daemon import ScreensaverDaemon
+daemon = ScreensaverDaemon()
+daemon.start_monitoring()
+time.sleep(1.0)
+print(json.dumps({"rss": get_rss_bytes(), "qt_loaded": "PyQt5" in sys.modules, "modules": len(sys.modules)}))
+""")
+    assert not waiting["qt_loaded"], "守护模式等待期间不应导入PyQt5"
+    result = {
+        "waiting_rss_mb": round(waiting["rss"] / 1048576, 1),
+        "waiting_modules": waiting["modules"],
+    }
+
+    if has_module("PyQt5"):
+        with_qt = run_child("""
+import json, sys
+from metrics import get_rss_bytes
+from PyQt5.QtWidgets import QApplication
+from PyQt5 import QtMultimedia, QtMultimediaWidgets
+app = QApplication(sys.argv[:1])
+print(json.dumps({"rss": get_rss_bytes()}))
+""")
+        result["qt_loaded_rss_mb"] = round(with_qt["rss"] / 1048576, 1)
+        result["saved_mb"] = round(result["qt_loaded_rss_mb"] - result["waiting_rss_mb"], 1)
+    return result
+
+
+@benchmark("split_process")
+def bench_split_process() -> dict:
+    """分离进程架构：监控进程常驻内存与播放器进程启动延迟"""
+    monitor = run_child("""
+import json, sys, time
+from metrics import get_rss_bytes
+from screensaver_daemon import ScreensaverDaemon
+daemon = ScreensaverDaemon()
+daemon.start_monitoring()
+time.sleep(1.0)
+print(json.dumps({"rss": get_rss_bytes(), "qt_loaded": "PyQt5" in sys.modules}))
+""", config={"video_path": "video.mp4", "player_mode": "process"})
+    assert not monitor["qt_loaded"], "监控进程不应导入PyQt5"
+    result = {"monitor_rss_mb": round(monitor["rss"] / 1048576, 1)}
+
+    if not has_module("PyQt5"):
+        result["player_startup"] = "跳过（未安装PyQt5）"
+        return result
+
+    from metrics import metrics
+    from player_host import PlayerProcessHost
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    samples = []
+    for _ in range(3):
+        host = PlayerProcessHost()
+        host.prespawn()
+        assert host.ready.wait(30), "播放器进程启动超时"
+        samples.append(metrics.snapshot()["timings"]["player.startup_ms"]["last"])
+        host.shutdown()
+    result["player_startup_ms"] = round(min(samples), 1)
+    result["player_startup_ms_max"] = round(max(samples), 1)
+    return result
+
+
+@benchmark("wake_latency")
+def bench_wake_latency() -> dict:
+    """快速唤醒：从用户输入到窗口隐藏的延迟，以及延后执行的清理耗时"""
+    if not has_module("PyQt5"):
+        raise BenchmarkSkipped("未安装PyQt5")
+    return run_child("""
+import json, sys
+from PyQt5.QtCore import Qt, QEvent
+from PyQt5.QtGui import QKeyEvent
+from PyQt5.QtWidgets import QApplication
+from metrics import metrics
+from video_player import FullScreenVideoPlayer
+app = QApplication(sys.argv[:1])
+for _ in range(10):
+    player = FullScreenVideoPlayer()
+    app.processEvents()
+    QApplication.sendEvent(player, QKeyEvent(QEvent.KeyPress, Qt.Key_Space, Qt.NoModifier))
+    for _ in range(5):
+        app.processEvents()
+timings = metrics.snapshot()["timings"]
+print(json.dumps({
+    "input_to_hidden_ms_avg": round(timings["wake.input_to_hidden_ms"]["avg"], 2),
+    "input_to_hidden_ms_max": round(timings["wake.input_to_hidden_ms"]["max"], 2),
+    "deferred_teardown_ms_avg": round(timings["wake.teardown_ms"]["avg"], 2),
+}))
+""")
+
+
+@benchmark("poster_frame")
+def bench_poster_frame() -> dict:
+    """
+    封面帧：从创建播放器到封面帧显示的延迟（无需等待解码器）
+
+    另测新视频（内容哈希尚未计算）：查询不应在界面线程读取视频，创建播放器不被哈希计算拖慢
+    """
+    if not has_module("PyQt5"):
+        raise BenchmarkSkipped("未安装PyQt5")
+    result = run_child("""
+import json, os, sys, time
+from PyQt5.QtGui import QColor, QImage
+from PyQt5.QtWidgets import QApplication
+from media_tools import PosterCache
+from metrics import metrics
+from video_player import FullScreenVideoPlayer
+app = QApplication(sys.argv[:1])
+with open("video.mp4", "wb") as f:
+    f.write(os.urandom(1024 * 1024))
+cache = PosterCache("poster_cache")
+screen = app.primaryScreen().size()
+image = QImage(screen, QImage.Format_RGB32)
+image.fill(QColor(40, 80, 120))
+cache.store_image("video.mp4", image)
+for _ in range(5):
+    player = FullScreenVideoPlayer("video.mp4", poster_cache=cache)
+    for _ in range(3):
+        app.processEvents()
+    player.exit_player()
+    app.processEvents()
+
+# 新视频：索引中没有记录，查询立即返回并在后台计算哈希
+with open("fresh.mp4", "wb") as f:
+    f.write(os.urandom(64 * 1024 * 1024))
+fresh_cache = PosterCache("poster_cache")
+started = time.perf_counter()
+missed = fresh_cache.lookup("fresh.mp4", screen.width(), screen.height())
+uncached_lookup_ms = (time.perf_counter() - started) * 1000
+with open("fresh2.mp4", "wb") as f:
+    f.write(os.urandom(64 * 1024 * 1024))
+started = time.perf_counter()
+player = FullScreenVideoPlayer("fresh2.mp4", poster_cache=fresh_cache)
+uncached_player_init_ms = (time.perf_counter() - started) * 1000
+player.exit_player()
+app.processEvents()
+deadline = time.perf_counter() + 10
+while not fresh_cache.known_hash("fresh.mp4") and time.perf_counter() < deadline:
+    time.sleep(0.01)
+timings = metrics.snapshot()["timings"]
+print(json.dumps({
+    "poster_shown_ms_avg": round(timings["player.poster_shown_ms"]["avg"], 2),
+    "poster_shown_ms_max": round(timings["player.poster_shown_ms"]["max"], 2),
+    "uncached_lookup_ms": round(uncached_lookup_ms, 2),
+    "uncached_player_init_ms": round(uncached_player_init_ms, 2),
+    "uncached_missed": missed is None,
+    "hashed_in_background": fresh_cache.known_hash("fresh.mp4") is not None,
+}))
+""")
+    assert result.pop("uncached_missed"), "哈希尚未计算时应直接返回未命中"
+    assert result.pop("hashed_in_background"), "未命中后应在后台计算内容哈希"
+    assert result["uncached_lookup_ms"] < 5, f"新视频的封面帧查询耗时 {result['uncached_lookup_ms']} 毫秒"
+    return result
+
+
+@benchmark("fallback_switch")
+def bench_fallback_switch() -> dict:
+    """备用内容：主视频损坏时切换到下一个候选的耗时（应在一帧之内）"""
+    if not has_module("PyQt5"):
+        raise BenchmarkSkipped("未安装PyQt5")
+    result = run_child("""
+import json, os, sys
+from PyQt5.QtWidgets import QApplication
+from metrics import metrics
+from video_player import FullScreenVideoPlayer
+app = QApplication(sys.argv[:1])
+with open("broken.mp4", "wb") as f:
+    f.write(os.urandom(256 * 1024))
+failures = []
+for _ in range(5):
+    player = FullScreenVideoPlayer(os.path.abspath("broken.mp4"), fallbacks=[{"kind": "pattern"}],
+                                   on_media_failed=lambda path, reason: failures.append(path))
+    player.play_video()
+    for _ in range(50):
+        app.processEvents()
+        if player.content_kind == "pattern":
+            break
+    visible = player.isVisible()
+    player.exit_player()
+    app.processEvents()
+    assert visible, "切换期间窗口被隐藏"
+timings = metrics.snapshot()["timings"]
+print(json.dumps({
+    "failures_reported": len(failures),
+    "switch_ms_avg": round(timings["player.fallback_switch_ms"]["avg"], 2),
+    "switch_ms_max": round(timings["player.fallback_switch_ms"]["max"], 2),
+}))
+""")
+    assert result["switch_ms_max"] < 16.7, f"切换耗时 {result['switch_ms_max']} 毫秒，超过一帧"
+    return result
+
+
+@benchmark("silent_playback")
+def bench_silent_playback() -> dict:
+    """静音播放：原视频（解码音频但不输出）与无音轨版本各播放10秒的CPU时间"""
+    from media_tools import SilentRenditionCache, find_ffmpeg
+
+    if not has_module("PyQt5"):
+        raise BenchmarkSkipped("未安装PyQt5")
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        raise BenchmarkSkipped("未安装ffmpeg")
+
+    work_dir = tempfile.mkdtemp(prefix="silent_bench_")
+    try:
+        video = os.path.join(work_dir, "video.mp4")
+        subprocess.run([ffmpeg, "-v", "error", "-y", "-f", "lavfi", "-i", "testsrc=size=1280x720:rate=30",
+                        "-f", "lavfi", "-i", "sine=frequency=440:sample_rate=48000", "-ac", "2",
+                        "-t", "15", "-c:v", "libx264", "-c:a", "aac", video],
+                       capture_output=True, timeout=120, check=True)
+        silent = SilentRenditionCache(os.path.join(work_dir, "silent_cache")).generate(video)
+        assert silent, "生成无音轨版本失败"
+
+        code = """
+import json, sys, time
+from PyQt5.QtWidgets import QApplication
+from video_player import FullScreenVideoPlayer
+app = QApplication(sys.argv[:1])
+player = FullScreenVideoPlayer(%r, volume=0, silent_path=%r)
+player.play_video()
+cpu_started, started = time.process_time(), time.perf_counter()
+while time.perf_counter() - started < 10:
+    app.processEvents()
+    time.sleep(0.005)
+print(json.dumps({"cpu_seconds": time.process_time() - cpu_started}))
+"""
+        muted = run_child(code % (video, None))["cpu_seconds"]
+        stripped = run_child(code % (video, silent))["cpu_seconds"]
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return {
+        "muted_cpu_seconds": round(muted, 2),
+        "silent_rendition_cpu_seconds": round(stripped, 2),
+        "cpu_saved_percent": round((muted - stripped) / muted * 100, 1) if muted else 0.0,
+    }
+
+
+@benchmark("resume_seek")
+def bench_resume_seek() -> dict:
+    """续播：从头播放、从关键帧续播、从关键帧之间续播的首帧延迟"""
+    from media_tools import KeyframeIndex, find_ffmpeg, keyframe_at_or_before
+
+    if not has_module("PyQt5"):
+        raise BenchmarkSkipped("未安装PyQt5")
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        raise BenchmarkSkipped("未安装ffmpeg")
+
+    work_dir = tempfile.mkdtemp(prefix="resume_bench_")
+    try:
+        video = os.path.join(work_dir, "video.mp4")
+        # 每 4 秒一个关键帧，关键帧之间的位置需要从前一个关键帧解码过去
+        subprocess.run([ffmpeg, "-v", "error", "-y", "-f", "lavfi", "-i", "testsrc=size=1920x1080:rate=30",
+                        "-t", "120", "-c:v", "libx264", "-g", "120", video],
+                       capture_output=True, timeout=300, check=True)
+        keyframes = KeyframeIndex(os.path.join(work_dir, "keyframe_cache")).generate(video)
+        assert keyframes, "生成关键帧索引失败"
+
+        code = """
+import json, sys, time
+from PyQt5.QtWidgets import QApplication
+from metrics import metrics
+from video_player import FullScreenVideoPlayer
+app = QApplication(sys.argv[:1])
+for _ in range(3):
+    player = FullScreenVideoPlayer(%r, prewarmed=False, start_ms=%d)
+    player.play_video()
+    started = time.perf_counter()
+    while not player._first_frame_seen and time.perf_counter() - started < 10:
+        app.processEvents()
+        time.sleep(0.001)
+    player.exit_player()
+    app.processEvents()
+print(json.dumps({"first_frame_ms": metrics.snapshot()["timings"]["player.first_frame_cold_ms"]["avg"]}))
+"""
+        target = 61000
+        aligned = keyframe_at_or_before(keyframes, target)
+        results = {
+            "beginning_ms": run_child(code % (video, 0))["first_frame_ms"],
+            "keyframe_ms": run_child(code % (video, aligned))["first_frame_ms"],
+            "between_keyframes_ms": run_child(code % (video, aligned + 3500))["first_frame_ms"],
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return {name: round(value, 1) for name, value in results.items()}
+
+
+@benchmark("transitions")
+def bench_transitions() -> dict:
+    """内容切换：停止-打开-播放 与预先打开后直接切换/交叉淡化，从切换到新内容第一帧的间隔"""
+    from media_tools import find_ffmpeg
+
+    if not has_module("PyQt5"):
+        raise BenchmarkSkipped("未安装PyQt5")
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        raise BenchmarkSkipped("未安装ffmpeg")
+
+    work_dir = tempfile.mkdtemp(prefix="transition_bench_")
+    try:
+        videos = []
+        for name, source in (("a.mp4", "testsrc"), ("b.mp4", "smptebars")):
+            videos.append(os.path.join(work_dir, name))
+            subprocess.run([ffmpeg, "-v", "error", "-y", "-f", "lavfi", "-i", f"{source}=size=1920x1080:rate=30",
+                            "-t", "4", "-c:v", "libx264", videos[-1]],
+                           capture_output=True, timeout=120, check=True)
+
+        code = """
+import json, sys, time
+from PyQt5.QtWidgets import QApplication
+from metrics import metrics
+from video_player import FullScreenVideoPlayer
+app = QApplication(sys.argv[:1])
+videos, transition = %r, %r
+player = FullScreenVideoPlayer(videos[0], transition=transition, playlist=videos[1:])
+player.play_video()
+
+def wait(condition, timeout=20):
+    started = time.perf_counter()
+    while not condition() and time.perf_counter() - started < timeout:
+        app.processEvents()
+        time.sleep(0.001)
+
+gaps = []
+if transition:
+    wait(lambda: metrics.snapshot()["counters"].get("player.transitions", 0) >= 4 and player._switched_at is None)
+    gaps = [metrics.snapshot()["timings"]["player.transition_gap_ms"]["avg"]]
+else:
+    wait(lambda: player._first_frame_seen)
+    for index in range(4):
+        started = time.perf_counter()
+        player.start_candidate({"kind": "video", "path": videos[(index + 1) %% 2]})
+        wait(lambda: player.media_player.position() > 0)
+        gaps.append((time.perf_counter() - started) * 1000.0)
+player.exit_player()
+app.processEvents()
+print(json.dumps({"gap_ms": sum(gaps) / len(gaps)}))
+"""
+        results = {
+            "stop_open_play_ms": run_child(code % (videos, None))["gap_ms"],
+            "preroll_cut_ms": run_child(code % (videos, {"type": "cut", "preroll_seconds": 2}))["gap_ms"],
+            "preroll_crossfade_ms": run_child(code % (videos, {"type": "crossfade", "duration_ms": 500,
+                                                              "preroll_seconds": 2}))["gap_ms"],
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    assert results["preroll_cut_ms"] < results["stop_open_play_ms"], "预先打开后切换应快于重新打开"
+    return {name: round(value, 1) for name, value in results.items()}
+
+
+@benchmark("overlay")
+def bench_overlay() -> dict:
+    """叠加层：1080p 下显示带秒的时钟、静态提示和台标，稳定后每秒的重绘面积和耗时"""
+    if not has_module("PyQt5"):
+        raise BenchmarkSkipped("未安装PyQt5")
+    code = """
+import json, sys, time
+from PyQt5.QtGui import QColor, QPixmap
+from PyQt5.QtWidgets import QApplication
+from metrics import metrics
+from overlays import OverlaySource
+from video_player import OverlayLayer
+app = QApplication(sys.argv[:1])
+logo = QPixmap(320, 120)
+logo.fill(QColor("#2060c0"))
+logo.save("logo.png")
+source = OverlaySource([
+    {"type": "clock", "format": "%H:%M:%S", "position": "top-right", "size": 64},
+    {"type": "text", "text": "触摸屏幕继续", "position": "bottom-center", "size": 40},
+    {"type": "logo", "path": "logo.png", "position": "top-left", "width": 160},
+])
+layer = OverlayLayer(source)
+layer.resize(1920, 1080)
+layer.show()
+started = time.perf_counter()
+while time.perf_counter() - started < 6:
+    app.processEvents()
+    time.sleep(0.005)
+gauges = metrics.snapshot()["gauges"]
+print(json.dumps({"repaint_px_per_s": gauges["overlay.repaint_px_per_s"],
+                  "cost_ms_per_s": gauges["overlay.cost_ms_per_s"]}))
+"""
+    result = run_child(code)
+    # 稳定后只重绘时钟所在的小矩形，远小于整屏
+    assert result["repaint_px_per_s"] < 1920 * 1080 * 0.05, result
+    result["full_screen_px"] = 1920 * 1080
+    return result
+
+
+@benchmark("thumbnail_gallery")
+def bench_thumbnail_gallery() -> dict:
+    """内容选择：500 张图片的列表填充耗时，首屏缩略图在冷缓存/热缓存下的就绪时间"""
+    if not has_module("PyQt5"):
+        raise BenchmarkSkipped("未安装PyQt5")
+    code = """
+import json, os, sys, time
+from PyQt5.QtGui import QColor, QImage
+from PyQt5.QtWidgets import QApplication
+from main import ContentGallery
+from metrics import metrics
+from thumbnails import ThumbnailCache
+app = QApplication(sys.argv[:1])
+os.makedirs("images", exist_ok=True)
+if not os.listdir("images"):
+    for index in range(500):
+        image = QImage(960, 540, QImage.Format_RGB32)
+        image.fill(QColor(index % 256, 80, 160))
+        image.save(os.path.join("images", "%03d.jpg" % index), "JPG", 90)
+candidates = [(os.path.join("images", name), "image") for name in sorted(os.listdir("images"))]
+gallery = ContentGallery(ThumbnailCache("thumbnail_cache"))
+gallery.resize(380, 220)
+gallery.show()
+gallery.set_candidates(candidates)
+started = time.perf_counter()
+while time.perf_counter() - started < 60:
+    app.processEvents()
+    loaded = [gallery.item(row).data(ContentGallery.LOADED_ROLE) for row in range(gallery.count())]
+    if all(loaded[:6]):
+        break
+    time.sleep(0.002)
+visible_ms = (time.perf_counter() - started) * 1000.0
+gallery.loader.shutdown()
+print(json.dumps({"populate_ms": metrics.snapshot()["timings"]["gallery.populate_ms"]["avg"],
+                  "visible_ms": visible_ms, "generated": sum(1 for value in loaded if value)}))
+"""
+    work_dir = tempfile.mkdtemp(prefix="gallery_bench_")
+    try:
+        cold = run_child(f"import os; os.chdir({work_dir!r})\n" + code)
+        warm = run_child(f"import os; os.chdir({work_dir!r})\n" + code)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    assert cold["populate_ms"] < 100, f"填充列表耗时 {cold['populate_ms']:.1f} 毫秒"
+    assert cold["generated"] < 100, "不应为不可见的项生成缩略图"
+    return {
+        "populate_ms": round(cold["populate_ms"], 1),
+        "first_screen_cold_ms": round(cold["visible_ms"], 1),
+        "first_screen_warm_ms": round(warm["visible_ms"], 1),
+        "generated_for_first_screen": cold["generated"],
+    }
+
+
+@benchmark("frame_filters")
+def bench_frame_filters() -> dict:
+    """帧滤镜：1080p 下平移+调暗+暗角（遮罩叠加）每帧增加的绘制耗时，以及伽马校正逐帧查表的耗时"""
+    if not has_module("numpy"):
+        raise BenchmarkSkipped("未安装numpy")
+    if not has_module("PyQt5"):
+        raise BenchmarkSkipped("未安装PyQt5")
+    import time
+    import numpy
+    from frame_filters import FrameFilterChain
+
+    height, width = 1080, 1920
+    frame = numpy.random.default_rng(1).integers(0, 256, (height, width, 4), dtype=numpy.uint8)
+    chain = FrameFilterChain({"dimming": {"brightness": 0.7, "gamma": 1.2}})
+    timings = []
+    for _ in range(30):
+        started = time.perf_counter()
+        chain.apply(frame, width, height, width * 4)
+        timings.append((time.perf_counter() - started) * 1000.0)
+    timings.sort()
+    results = {"gamma_ms_median": round(timings[len(timings) // 2], 2)}
+
+    code = """
+import json, sys, time
+import numpy
+from PyQt5.QtCore import QRectF
+from PyQt5.QtGui import QImage, QPainter
+from PyQt5.QtWidgets import QApplication
+from frame_filters import FrameFilterChain
+app = QApplication(sys.argv[:1])
+width, height = 1920, 1080
+pixels = numpy.random.default_rng(1).integers(0, 256, (height, width, 4), dtype=numpy.uint8)
+frame = QImage(pixels.data, width, height, width * 4, QImage.Format_RGB32)
+chain = FrameFilterChain({"pixel_orbit": True, "dimming": {"brightness": 0.7}, "vignette": True})
+mask_pixels = chain.mask(width, height)
+mask = QImage(mask_pixels.data, width, height, width * 4, QImage.Format_ARGB32_Premultiplied)
+target = QImage(width, height, QImage.Format_RGB32)
+plain, filtered = [], []
+for index in range(60):
+    painter = QPainter(target)
+    started = time.perf_counter()
+    painter.drawImage(QRectF(0, 0, width, height), frame, QRectF(0, 0, width, height))
+    drawn = time.perf_counter()
+    dx, dy = chain.offset(index / 30)
+    painter.drawImage(QRectF(0, 0, width, height).translated(dx, dy), frame, QRectF(0, 0, width, height))
+    painter.drawImage(0, 0, mask)
+    painter.end()
+    plain.append((drawn - started) * 1000.0)
+    filtered.append((time.perf_counter() - drawn) * 1000.0)
+median = lambda values: sorted(values)[len(values) // 2]
+print(json.dumps({"plain_ms": median(plain), "filtered_ms": median(filtered)}))
+"""
+    drawn = run_child(code)
+    results["frame_draw_ms_median"] = round(drawn["plain_ms"], 2)
+    results["all_overhead_ms_median"] = round(drawn["filtered_ms"] - drawn["plain_ms"], 2)
+    assert results["all_overhead_ms_median"] < 4.0, \
+        f"平移+调暗+暗角每帧增加 {results['all_overhead_ms_median']} 毫秒，超过 4 毫秒的预算"
+    return results
+
+
+def bench_effect(name: str) -> dict:
+    """生成效果：1920x1080 下完整渲染一帧的耗时，以及按默认帧预算运行后的分辨率和帧率"""
+    if not has_module("numpy"):
+        raise BenchmarkSkipped("未安装numpy")
+    import time
+    from effects import EffectRenderer
+
+    renderer = EffectRenderer(name, 1920, 1080, budget_ms=float("inf"))
+    timings = []
+    for frame in range(90):
+        if name == "clock":
+            # 时钟只在文字或位置变化时重绘，这里每帧都强制完整重绘
+            renderer.effect._drawn = None
+        started = time.perf_counter()
+        renderer.effect.render(frame / 30)
+        timings.append((time.perf_counter() - started) * 1000.0)
+
+    budgeted = EffectRenderer(name, 1920, 1080)
+    for frame in range(150):
+        budgeted.frame(frame / 30)
+    timings.sort()
+    return {
+        "frame_ms_median": round(timings[len(timings) // 2], 2),
+        "frame_ms_max": round(timings[-1], 2),
+        "budget_ms": budgeted.budget_ms,
+        "budgeted_size": "x".join(map(str, budgeted.size)),
+        "budgeted_fps": budgeted.fps,
+    }
+
+
+for _effect in ("starfield", "gradient_flow", "clock"):
+    benchmark(f"effect_{_effect}")(lambda name=_effect: bench_effect(name))
+
+
+@benchmark("monitor_shutdown")
+def bench_monitor_shutdown() -> dict:
+    """监控循环：修改触发时间原地生效（不重启线程），停止监控在100毫秒内完成"""
+    result = run_child("""
+import json, threading, time
+from screensaver import VideoScreensaver
+screensaver = VideoScreensaver(activation_callback=lambda: None)
+thread = threading.Thread(target=screensaver.start_monitoring, daemon=True)
+thread.start()
+time.sleep(0.5)
+
+# 触发时间为5分钟时检查间隔为5秒，修改配置不应等待当前间隔
+config = screensaver.config_manager.get_config()
+config["idle_time_minutes"], config["idle_time_seconds"] = 0, 20
+started = time.perf_counter()
+screensaver.config_manager.save_config(config)
+apply_ms = (time.perf_counter() - started) * 1000
+applied = screensaver.idle_threshold == 20
+time.sleep(0.2)
+
+started = time.perf_counter()
+screensaver.stop_monitoring()
+thread.join(5)
+stop_ms = (time.perf_counter() - started) * 1000
+print(json.dumps({"apply_ms": apply_ms, "applied": applied,
+                  "stop_ms": stop_ms, "stopped": not thread.is_alive()}))
+""", config={"video_path": "video.mp4", "idle_time_minutes": 5, "idle_time_seconds": 0})
+    assert result["applied"], "新的触发时间没有立即生效"
+    assert result["stopped"], "监控线程没有退出"
+    assert result["stop_ms"] < 100, f"停止监控耗时 {result['stop_ms']:.1f} ms，应小于100 ms"
+    return {"apply_ms": round(result["apply_ms"], 2), "stop_ms": round(result["stop_ms"], 2)}
+
+
+@benchmark("idle_stages")
+def bench_idle_stages() -> dict:
+    """
+    空闲阶段：各阶段在到达时刻切换（由监控循环的等待时刻驱动，不额外轮询）
+
+    另模拟分离进程模式：进程内没有播放器窗口，显示状态由所有者提供，
+    且播放器自身的全屏窗口会触发抑制条件；阶段仍应推进，屏保只启动一次
+    """
+    code = """
+import json, threading, time
+from screensaver import VideoScreensaver
+process_mode = %r
+changes, activations = [], []
+screensaver = VideoScreensaver(activation_callback=lambda: activations.append(time.monotonic()),
+                               stage_callback=lambda stage: changes.append((stage, time.monotonic())),
+                               visibility_callback=(lambda: bool(activations)) if process_mode else None)
+if process_mode:
+    # 播放器进程的全屏窗口（以及声音、解码负载）会被抑制条件检测到
+    screensaver.inhibitors.check = lambda: "fullscreen" if activations else None
+# 模拟空闲时间从4秒开始增长：5秒触发，之后各阶段的时刻不在1秒检查间隔的整数倍上
+started = time.monotonic()
+screensaver.system_monitor.get_idle_time = lambda: 4.0 + time.monotonic() - started
+deadlines = {"dimmed": 6.3, "blank": 7.7, "off": 9.1}
+screensaver.config_manager.update({"idle_stages": {key: value / 60 for key, value in (
+    ("dim_after_minutes", 6.3), ("blank_after_minutes", 7.7), ("display_off_after_minutes", 9.1))}})
+thread = threading.Thread(target=screensaver.start_monitoring, daemon=True)
+thread.start()
+time.sleep(6)
+screensaver.stop_monitoring()
+thread.join(5)
+late = {stage: (at - started + 4.0 - deadlines[stage]) * 1000 for stage, at in changes}
+print(json.dumps({"stages": [stage for stage, _ in changes], "late_ms": late, "activations": len(activations)}))
+"""
+    config = {"video_path": "video.mp4", "idle_time_minutes": 0, "idle_time_seconds": 5}
+    results = {}
+    for name, process_mode in (("inprocess", False), ("process", True)):
+        result = run_child(code % process_mode, config=config)
+        assert result["stages"] == ["dimmed", "blank", "off"], (name, result["stages"])
+        worst = max(result["late_ms"].values())
+        assert worst < 100, f"{name}: 阶段切换晚了 {worst:.0f} 毫秒"
+        if process_mode:
+            assert result["activations"] == 1, f"播放中重复启动屏保 {result['activations']} 次"
+        results.update({f"{name}_{stage}_late_ms": round(value, 1) for stage, value in result["late_ms"].items()})
+    return results
+
+
+@benchmark("trace_replay")
+def bench_trace_replay() -> dict:
+    """空闲轨迹：记录器只写入空闲时段，回放模拟器数秒内处理三个月的轨迹"""
+    import random
+    import time
+    from idle_trace import RECORD, MAGIC, IdleTraceRecorder, TriggerPolicy, read_trace, simulate
+
+    work_dir = tempfile.mkdtemp(prefix="screensaver_bench_")
+    try:
+        # 记录器：一小时逐秒采样（每10分钟离开3分钟）只产生6条记录
+        recorder = IdleTraceRecorder(os.path.join(work_dir, "recorded.bin"))
+        base = time.time()
+        for second in range(3600):
+            away = second % 600 >= 420
+            recorder.observe(second % 600 - 420 if away else 0.0, now=base + second)
+        recorder.close()
+        recorded = read_trace(recorder.path)
+        assert len(recorded) == 6, f"应记录6段空闲，实际 {len(recorded)}"
+
+        # 合成90天的轨迹：工作时间频繁短暂离开，夜间长时间空闲
+        rng = random.Random(1)
+        path = os.path.join(work_dir, "trace.bin")
+        gaps = 0
+        with open(path, "wb") as f:
+            f.write(MAGIC)
+            t = base - 90 * 86400
+            while t < base:
+                length = rng.lognormvariate(4, 1.5)
+                f.write(RECORD.pack(t, int(min(length, 16 * 3600) * 1000)))
+                gaps += 1
+                t += length + rng.expovariate(1 / 120)
+
+        started = time.perf_counter()
+        trace = read_trace(path)
+        policies = [TriggerPolicy(f"{seconds}s", seconds) for seconds in (10, 30, 60, 180, 300, 600)]
+        policies.append(TriggerPolicy("规则", 300, [
+            {"days": "weekdays", "start": "09:00", "end": "18:00", "idle_seconds": 180},
+            {"idle_seconds": 30},
+        ]))
+        results = [simulate(trace, policy) for policy in policies]
+        elapsed = time.perf_counter() - started
+        assert elapsed < 10, f"回放耗时 {elapsed:.1f} 秒"
+        return {
+            "recorded_gaps_per_hour": len(recorded),
+            "trace_gaps": gaps,
+            "trace_bytes": os.path.getsize(path),
+            "replay_seconds": round(elapsed, 2),
+            "activations": {r["policy"]: r["activations"] for r in results},
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+@benchmark("prewarm_prediction")
+def bench_prewarm_prediction() -> dict:
+    """预热：用模拟的空闲时段按顺序回放，比较固定提前量与学习的提前量的命中率"""
+    import random
+    from prewarm import LeadTimePredictor
+
+    random.seed(7)
+    threshold, max_lead = 300, 15
+    # 大多数空闲很短，有一部分习惯性地在阈值前几秒结束（如阅读后翻页），其余达到阈值
+    lengths = [random.choice((random.uniform(5, 200), random.uniform(288, 299), random.uniform(400, 3600)))
+               for _ in range(3000)]
+
+    def replay(learn: bool) -> tuple:
+        predictor = LeadTimePredictor(max_lead=max_lead)
+        preparations = hits = 0
+        for length in lengths:
+            lead = predictor.lead_for(threshold) if learn else max_lead
+            if lead > 0 and length >= threshold - lead:
+                preparations += 1
+                hits += length >= threshold
+            predictor.seed([length])
+        return preparations, hits, lead
+
+    fixed_preparations, fixed_hits, _ = replay(learn=False)
+    learned_preparations, learned_hits, lead = replay(learn=True)
+    fixed_rate = fixed_hits / fixed_preparations
+    learned_rate = learned_hits / learned_preparations
+    assert learned_rate > fixed_rate, "学习的提前量应减少浪费的预热"
+    assert learned_hits == fixed_hits, "缩短提前量不应漏掉真正的触发"
+    return {
+        "fixed_lead_hit_rate": round(fixed_rate, 3),
+        "learned_lead_hit_rate": round(learned_rate, 3),
+        "learned_lead_seconds": lead,
+        "wasted_preparations_avoided": (fixed_preparations - fixed_hits) - (learned_preparations - learned_hits),
+    }
+
+
+@benchmark("readahead")
+def bench_readahead() -> dict:
+    """文件预读：清出文件缓存后，直接读取与预读之后读取视频开头 32MB 的耗时"""
+    import time
+    from readahead import MB, prefetch
+
+    if not hasattr(os, "posix_fadvise"):
+        raise BenchmarkSkipped("当前平台没有posix_fadvise，无法清出文件缓存")
+
+    fd, path = tempfile.mkstemp(prefix="readahead_", suffix=".mp4", dir=ROOT_DIR)
+    try:
+        os.write(fd, os.urandom(64 * MB))
+        os.fsync(fd)
+
+        def evict():
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+
+        def read_head() -> float:
+            started = time.perf_counter()
+            with open(path, "rb", buffering=0) as f:
+                while f.tell() < 32 * MB and f.read(MB):
+                    pass
+            return (time.perf_counter() - started) * 1000
+
+        evict()
+        cold_ms = read_head()
+        evict()
+        prefetch(path, 0, 32 * MB)
+        # 预读在触发前的提前量内完成
+        time.sleep(1.0)
+        warm_ms = read_head()
+    finally:
+        os.close(fd)
+        os.remove(path)
+    return {"cold_read_ms": round(cold_ms, 1), "prefetched_read_ms": round(warm_ms, 1)}
+
+
+@benchmark("profiling")
+def bench_profiling() -> dict:
+    """诊断工具：未使用时不加载、不跟踪；CPU 采样期间与结束后的开销"""
+    return run_child("""
+import json, sys, threading, time, tracemalloc
+from screensaver_daemon import ScreensaverDaemon
+daemon = ScreensaverDaemon()
+assert "profiling" not in sys.modules and not tracemalloc.is_tracing(), "未使用时不应加载诊断模块"
+
+def work(seconds):
+    started = time.perf_counter()
+    count = 0
+    while time.perf_counter() - started < seconds:
+        sum(range(1000))
+        count += 1
+    return count
+
+baseline = work(1.0)
+daemon.profile_command(["cpu", "1"])
+sampled = work(1.0)
+from profiling import get_profiler
+get_profiler()._cpu_thread.join()
+after = work(1.0)
+threads = threading.active_count()
+print(json.dumps({
+    "sampling_slowdown_percent": round((1 - sampled / baseline) * 100, 1),
+    "after_sampling_slowdown_percent": round((1 - after / baseline) * 100, 1),
+    "threads_after": threads,
+}))
+""")
+
+
+@benchmark("inhibitor_scan")
+def bench_inhibitor_scan() -> dict:
+    """抑制条件：进程表首次扫描、增量刷新与单次查询的耗时"""
+    import time
+    from inhibitors import ProcessScanner
+
+    scanner = ProcessScanner()
+    started = time.perf_counter()
+    scanner.refresh(force=True)
+    full_ms = (time.perf_counter() - started) * 1000
+
+    samples = []
+    for _ in range(20):
+        started = time.perf_counter()
+        scanner.refresh(force=True)
+        samples.append((time.perf_counter() - started) * 1000)
+
+    names = ["zoom", "teams", "powerpnt", "vlc"]
+    started = time.perf_counter()
+    for _ in range(10000):
+        scanner.find_running(names)
+    lookup_us = (time.perf_counter() - started) / 10000 * 1e6
+    assert lookup_us < 100, f"单次进程查询 {lookup_us:.1f} 微秒，应为微秒级"
+    return {
+        "processes": len(scanner),
+        "full_scan_ms": round(full_ms, 2),
+        "incremental_refresh_ms": round(min(samples), 2),
+        "lookup_us": round(lookup_us, 2),
+    }
+
+
+def main(argv) -> int:
+    names = argv or list(BENCHMARKS)
+    failed = False
+
+    for name in names:
+        func = BENCHMARKS.get(name)
+        if not func:
+            print(f"❌ 未知基准: {name}（可用: {', '.join(BENCHMARKS)}）")
+            failed = True
+            continue
+        try:
+            result = func()
+        except BenchmarkSkipped as e:
+            print(f"⏭️ {name}: 跳过（{e}）")
+            continue
+        except AssertionError as e:
+            print(f"❌ {name}: {e}")
+            failed = True
+            continue
+        print(f"✅ {name}: {json.dumps(result, ensure_ascii=False)}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
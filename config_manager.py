@@ -1,11 +1,21 @@
 """
 配置文件管理模块
 负责读取、验证和管理config.json配置文件
+
+配置变化按顶层配置项发布：订阅者只关注自己需要的配置项，收到 {键: (旧值, 新值)} 形式的差异，
+并可指定投递函数（如 GuiInvoker.post）让回调在界面线程执行
 """
 
+import copy
 import json
 import os
-from typing import Dict, Any
+import threading
+from functools import partial
+from typing import Dict, Any, Callable, Iterable, List, Optional, Tuple
+
+# 订阅回调: (变化的配置项 {键: (旧值, 新值)}, 新的生效配置)
+ConfigChanges = Dict[str, Tuple[Any, Any]]
+SubscriberCallback = Callable[[ConfigChanges, Dict[str, Any]], None]
 
 
 class ConfigManager:
@@ -17,7 +27,14 @@ class ConfigManager:
             "video_path": "video.mp4",
             "idle_minutes": 5
         }
+        self.remote_config: Dict[str, Any] = {}
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._subscriptions: List[tuple] = []
+        self._publish_lock = threading.Lock()
+        # 上次发布的生效配置，用于计算差异
+        self._published: Dict[str, Any] = {}
         self.config = self.load_config()
+        self._published = self.get_config()
     
     def load_config(self) -> Dict[str, Any]:
         """加载配置文件"""
@@ -39,8 +56,12 @@ class ConfigManager:
         """保存配置文件"""
         try:
             config_to_save = config if config is not None else self.config
+            config_to_save = self._strip_remote(config_to_save)
             with open(self.config_file, 'w', encoding='utf-8') as f:
                 json.dump(config_to_save, f, indent=2, ensure_ascii=False)
+            if config is not None:
+                self.config = config_to_save
+                self._notify_listeners()
             return True
         except Exception as e:
             print(f"保存配置文件失败: {e}")
@@ -50,6 +71,9 @@ class ConfigManager:
         """验证配置参数"""
         validated_config = self.default_config.copy()
         
+        # 保留其他配置项（音量、预设等）
+        validated_config.update({k: v for k, v in config.items() if k not in self.default_config})
+        
         # 验证视频路径
         if "video_path" in config and isinstance(config["video_path"], str):
             validated_config["video_path"] = config["video_path"]
@@ -65,13 +89,17 @@ class ConfigManager:
         
         return validated_config
     
+    def get_config(self) -> Dict[str, Any]:
+        """获取生效配置（远程配置覆盖本地配置）的副本"""
+        return _deep_merge(self.config, self.remote_config)
+    
     def get_video_path(self) -> str:
         """获取视频文件路径"""
-        return self.config.get("video_path", self.default_config["video_path"])
+        return self.get_config().get("video_path", self.default_config["video_path"])
     
     def get_idle_minutes(self) -> int:
         """获取空闲触发时间（分钟）"""
-        return self.config.get("idle_minutes", self.default_config["idle_minutes"])
+        return self.get_config().get("idle_minutes", self.default_config["idle_minutes"])
     
     def get_idle_seconds(self) -> int:
         """获取空闲触发时间（秒）"""
@@ -91,10 +119,153 @@ class ConfigManager:
             return self.save_config()
         return False
     
+    def update(self, values: Dict[str, Any]) -> bool:
+        """
+        修改部分配置项并保存，订阅者会收到变化
+        
+        Args:
+            values (Dict[str, Any]): 要修改的顶层配置项
+        """
+        config = copy.deepcopy(self.config)
+        config.update(values)
+        return self.save_config(config)
+    
     def reload_config(self) -> Dict[str, Any]:
-        """重新加载配置文件"""
+        """重新加载配置文件（外部修改了config.json时调用）"""
         self.config = self.load_config()
+        self._notify_listeners()
         return self.config
+    
+    def add_listener(self, callback: Callable[[Dict[str, Any]], None]):
+        """
+        注册配置变化回调
+        
+        Args:
+            callback (Callable): 生效配置变化时以新配置调用
+        """
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+    
+    def remove_listener(self, callback: Callable[[Dict[str, Any]], None]):
+        """取消配置变化回调"""
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+    
+    def subscribe(self, keys: Optional[Iterable[str]], callback: SubscriberCallback,
+                  invoker: Callable[[Callable], None] = None) -> SubscriberCallback:
+        """
+        订阅配置项变化
+        
+        Args:
+            keys (Iterable[str] | None): 关注的顶层配置项，None 表示全部
+            callback (Callable): 以 (变化, 新配置) 调用，变化只包含关注的配置项
+            invoker (Callable, optional): 投递函数，用于在指定线程执行回调；默认在发布配置的线程直接调用
+            
+        Returns:
+            Callable: callback 本身，用于取消订阅
+        """
+        self._subscriptions.append((frozenset(keys) if keys is not None else None, callback, invoker))
+        return callback
+    
+    def unsubscribe(self, callback: SubscriberCallback):
+        """取消订阅"""
+        self._subscriptions = [sub for sub in self._subscriptions if sub[1] is not callback]
+    
+    def apply_remote_config(self, remote_config: Dict[str, Any]):
+        """
+        应用远程下发的配置（只保存在内存中，不写入本地config.json）
+        
+        Args:
+            remote_config (Dict[str, Any]): 远程配置，覆盖同名本地设置
+        """
+        if remote_config == self.remote_config:
+            return
+        self.remote_config = copy.deepcopy(remote_config)
+        self._notify_listeners()
+    
+    def _notify_listeners(self):
+        """计算与上次发布的差异，只通知关注变化配置项的订阅者"""
+        with self._publish_lock:
+            config = self.get_config()
+            changes = diff_config(self._published, config)
+            self._published = config
+        if not changes:
+            return
+        
+        for callback in list(self._listeners):
+            try:
+                callback(config)
+            except Exception as e:
+                print(f"配置变化回调失败: {e}")
+        
+        for keys, callback, invoker in list(self._subscriptions):
+            relevant = changes if keys is None else {k: v for k, v in changes.items() if k in keys}
+            if not relevant:
+                continue
+            try:
+                if invoker:
+                    invoker(partial(callback, relevant, config))
+                else:
+                    callback(relevant, config)
+            except Exception as e:
+                print(f"配置变化回调失败: {e}")
+    
+    def _strip_remote(self, config: Dict[str, Any]) -> Dict[str, Any]:
+        """保存前去掉来自远程配置的值（逐层比较嵌套的配置项），避免把集中下发的设置固化到本地文件"""
+        if not self.remote_config:
+            return config
+        return _strip_values(config, self.remote_config, self.config)
+
+
+def _strip_values(config: Dict[str, Any], remote: Dict[str, Any], local: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    去掉 config 中与远程配置相同的值
+
+    Args:
+        config (Dict[str, Any]): 要保存的配置（可能是合并了远程配置的生效配置）
+        remote (Dict[str, Any]): 同一层的远程配置
+        local (Dict[str, Any]): 同一层的本地配置；本地设置过的项保留本地的值
+
+    Returns:
+        Dict[str, Any]: 去掉远程值后的配置
+    """
+    stripped = {}
+    for key, value in config.items():
+        if key not in remote:
+            stripped[key] = value
+            continue
+        local_value = local.get(key)
+        if isinstance(value, dict) and isinstance(remote[key], dict):
+            nested = _strip_values(value, remote[key], local_value if isinstance(local_value, dict) else {})
+            # 整项都来自远程时不保存空的字典
+            if nested or key in local:
+                stripped[key] = nested
+        elif value != remote[key]:
+            stripped[key] = value
+        elif key in local:
+            # 值被远程覆盖，保存时还原本地原来的设置
+            stripped[key] = local_value
+    return stripped
+
+
+def diff_config(old: Dict[str, Any], new: Dict[str, Any]) -> ConfigChanges:
+    """比较两份配置的顶层配置项，返回 {键: (旧值, 新值)}"""
+    return {
+        key: (old.get(key), new.get(key))
+        for key in old.keys() | new.keys()
+        if old.get(key) != new.get(key)
+    }
+
+
+def _deep_merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    """递归合并字典，override中的值优先"""
+    merged = copy.deepcopy(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _deep_merge(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
 
 
 if __name__ == "__main__":
@@ -103,4 +274,20 @@ if __name__ == "__main__":
     print("当前配置:")
     print(f"视频路径: {config_manager.get_video_path()}")
     print(f"空闲时间: {config_manager.get_idle_minutes()} 分钟")
-    print(f"空闲时间: {config_manager.get_idle_seconds()} 秒") 
\ No newline at end of file
+    print(f"空闲时间: {config_manager.get_idle_seconds()} 秒")
+
+    # 测试保存时去掉嵌套的远程配置
+    import tempfile
+    path = os.path.join(tempfile.mkdtemp(prefix="config_"), "config.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"idle_stages": {"blank_after_minutes": 60, "dim_brightness": 0.5}}, f)
+    manager = ConfigManager(path)
+    manager.apply_remote_config({"idle_stages": {"dim_after_minutes": 30, "dim_brightness": 0.3},
+                                 "inhibitors": {"processes": ["zoom"]}})
+    manager.save_config(manager.get_config())
+    with open(path, 'r', encoding='utf-8') as f:
+        saved = json.load(f)
+    assert saved["idle_stages"] == {"blank_after_minutes": 60, "dim_brightness": 0.5}, saved
+    assert "inhibitors" not in saved, saved
+    assert manager.get_config()["idle_stages"]["dim_after_minutes"] == 30, "远程配置仍然生效"
+    print("✅ 保存时已去掉嵌套的远程配置")
@@ -0,0 +1,400 @@
+"""
+HTTP内容源模块
+从内部内容服务器获取屏保视频：断点续传、ETag/Last-Modified条件校验、下载限速，
+下载在后台线程进行，文件校验通过后才切换给播放器使用
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlparse
+
+
+def is_http_url(path: str) -> bool:
+    """判断视频路径是否为HTTP(S)地址"""
+    return isinstance(path, str) and path.lower().startswith(("http://", "https://"))
+
+
+class BandwidthLimiter:
+    """令牌桶限速器：桶从空开始，容量只有 0.1 秒的流量，小文件和空闲后的第一块数据同样受限速"""
+
+    BURST_SECONDS = 0.1
+
+    def __init__(self, bytes_per_second: int):
+        self.rate = max(0, int(bytes_per_second))
+        self._allowance = 0.0
+        self._last = time.monotonic()
+
+    def consume(self, nbytes: int):
+        """
+        消耗令牌，超出速率时阻塞等待
+
+        Args:
+            nbytes (int): 本次读取的字节数
+        """
+        if self.rate <= 0:
+            return
+
+        now = time.monotonic()
+        # 空闲期间积累的令牌最多 BURST_SECONDS 秒的流量，避免空闲后突发
+        self._allowance = min(self.rate * self.BURST_SECONDS, self._allowance + (now - self._last) * self.rate)
+        self._last = now
+        self._allowance -= nbytes
+
+        if self._allowance < 0:
+            time.sleep(-self._allowance / self.rate)
+
+
+class HttpContentSource:
+    """HTTP视频内容源"""
+
+    USER_AGENT = "pingmubaohu-content/1.0"
+
+    def __init__(self, url: str, cache_dir: str = "content_cache",
+                 rate_limit_kbps: int = 0, check_interval: float = 600,
+                 expected_sha256: str = None, chunk_size: int = 64 * 1024,
+                 on_updated: Callable[[str], None] = None):
+        self.url = url
+        self.cache_dir = cache_dir
+        self.rate_limit_kbps = rate_limit_kbps
+        self.check_interval = check_interval
+        self.expected_sha256 = expected_sha256.lower() if expected_sha256 else None
+        self.chunk_size = chunk_size
+        self.on_updated = on_updated
+        self.timeout = 30
+
+        # 本地文件名：URL哈希前缀 + 原文件名，避免不同URL同名冲突
+        name = os.path.basename(urlparse(url).path) or "video.mp4"
+        prefix = hashlib.sha1(url.encode("utf-8")).hexdigest()[:8]
+        base = os.path.join(cache_dir, f"{prefix}_{name}")
+        self.local_path = base
+        self.part_path = base + ".part"
+        self.ready_path = base + ".ready"
+        self.meta_path = base + ".meta.json"
+
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_status = None
+        self.last_error = None
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self.meta = self._load_meta()
+
+    # ---------- 元数据 ----------
+
+    def _load_meta(self) -> Dict[str, Any]:
+        """读取缓存元数据（current: 已校验版本，pending: 下载中/待切换版本）"""
+        try:
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get("url") == self.url:
+                return meta
+        except (OSError, ValueError):
+            pass
+        return {"url": self.url, "current": None, "pending": None}
+
+    def _save_meta(self):
+        tmp_path = self.meta_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.meta_path)
+
+    # ---------- 对外接口 ----------
+
+    def get_local_path(self) -> Optional[str]:
+        """
+        获取可播放的本地文件路径
+
+        Returns:
+            Optional[str]: 已校验的本地文件路径，尚未下载完成时返回None
+        """
+        with self._lock:
+            self._promote_ready()
+            if self.meta.get("current") and os.path.exists(self.local_path):
+                return self.local_path
+        return None
+
+    def start(self):
+        """启动后台下载/校验线程"""
+        if self._thread and self._thread.is_alive():
+            return self
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        print(f"内容源已启动: {self.url}")
+        return self
+
+    def stop(self):
+        """停止后台线程（正在进行的下载会在当前数据块后中止，保留断点）"""
+        self._stop_event.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=2.0)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.check_now()
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"内容同步失败: {e}")
+            self._stop_event.wait(self.check_interval)
+
+    def check_now(self) -> bool:
+        """
+        执行一次校验/下载
+
+        Returns:
+            bool: 本次是否得到了新版本文件
+        """
+        # 按需导入：urllib.request会连带加载ssl等模块（约9MB），未配置网络功能时不常驻
+        import urllib.error
+        import urllib.request
+
+        pending = self.meta.get("pending") or {}
+        headers = {"User-Agent": self.USER_AGENT}
+        offset = 0
+
+        if pending and os.path.exists(self.ready_path):
+            # 新版本已下载校验完毕，等待切换，只需确认是否又有更新
+            self._add_conditional_headers(headers, pending)
+        elif pending and os.path.exists(self.part_path):
+            # 断点续传：If-Range保证服务器文件未变时才返回206
+            offset = os.path.getsize(self.part_path)
+            validator = pending.get("etag") or pending.get("last_modified")
+            if offset > 0 and validator:
+                headers["Range"] = f"bytes={offset}-"
+                headers["If-Range"] = validator
+            else:
+                offset = 0
+        elif self.meta.get("current") and os.path.exists(self.local_path):
+            self._add_conditional_headers(headers, self.meta["current"])
+
+        request = urllib.request.Request(self.url, headers=headers)
+        try:
+            response = urllib.request.urlopen(request, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            self.last_status = e.code
+            if e.code == 304:
+                return False
+            if e.code == 416:
+                # 断点已无效，丢弃后下次重新下载
+                self._discard_pending()
+                return False
+            raise
+
+        with response:
+            self.last_status = response.status
+            if response.status == 206:
+                total = self._parse_content_range(response.headers.get("Content-Range"))
+                return self._receive(response, offset, total, pending)
+
+            # 200：完整响应，从头开始写
+            length = response.headers.get("Content-Length")
+            version = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "size": int(length) if length is not None else None,
+            }
+            with self._lock:
+                for path in (self.part_path, self.ready_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+                self.meta["pending"] = version
+                self._save_meta()
+            return self._receive(response, 0, version["size"], version)
+
+    # ---------- 内部实现 ----------
+
+    @staticmethod
+    def _add_conditional_headers(headers: Dict[str, str], version: Dict[str, Any]):
+        if version.get("etag"):
+            headers["If-None-Match"] = version["etag"]
+        if version.get("last_modified"):
+            headers["If-Modified-Since"] = version["last_modified"]
+
+    @staticmethod
+    def _parse_content_range(value: Optional[str]) -> Optional[int]:
+        """解析 'bytes 100-199/200' 中的总长度"""
+        if not value or "/" not in value:
+            return None
+        total = value.rsplit("/", 1)[1].strip()
+        return int(total) if total.isdigit() else None
+
+    def _receive(self, response, offset: int, total: Optional[int], version: Dict[str, Any]) -> bool:
+        """把响应体写入.part文件，完成后校验并切换"""
+        limiter = BandwidthLimiter(self.rate_limit_kbps * 1024)
+        received = offset
+        mode = 'ab' if offset else 'wb'
+
+        with open(self.part_path, mode) as f:
+            while True:
+                if self._stop_event.is_set():
+                    print(f"下载中止，已保存 {received} 字节，下次续传")
+                    return False
+                chunk = response.read(self.chunk_size)
+                if not chunk:
+                    break
+                f.write(chunk)
+                received += len(chunk)
+                limiter.consume(len(chunk))
+
+        if total is not None and received != total:
+            print(f"下载未完成: {received}/{total} 字节，下次续传")
+            return False
+
+        if not self._verify(self.part_path, received, version):
+            self._discard_pending()
+            raise ValueError(f"下载文件校验失败: {self.url}")
+
+        with self._lock:
+            version["size"] = received
+            self.meta["pending"] = version
+            os.replace(self.part_path, self.ready_path)
+            self._save_meta()
+            promoted = self._promote_ready()
+
+        print(f"新视频已下载并校验: {self.url} ({received} 字节)")
+        if promoted and self.on_updated:
+            self.on_updated(self.local_path)
+        return True
+
+    def _verify(self, path: str, size: int, version: Dict[str, Any]) -> bool:
+        """校验文件长度和（可选的）SHA-256"""
+        if version.get("size") is not None and size != version["size"]:
+            return False
+        if size == 0:
+            return False
+        if self.expected_sha256:
+            digest = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+            if digest.hexdigest() != self.expected_sha256:
+                print(f"SHA-256不匹配: {digest.hexdigest()}")
+                return False
+        return True
+
+    def _promote_ready(self) -> bool:
+        """
+        把已校验的新版本切换为当前版本（调用方需持有锁）
+
+        播放器占用文件时（Windows下替换会失败）保留.ready，下次激活前再切换
+        """
+        if not os.path.exists(self.ready_path):
+            return False
+        try:
+            os.replace(self.ready_path, self.local_path)
+        except PermissionError:
+            return False
+        self.meta["current"] = self.meta.get("pending")
+        self.meta["pending"] = None
+        self._save_meta()
+        return True
+
+    def _discard_pending(self):
+        with self._lock:
+            for path in (self.part_path, self.ready_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self.meta["pending"] = None
+            self._save_meta()
+
+    def get_status(self) -> dict:
+        """获取内容源状态"""
+        current = self.meta.get("current") or {}
+        return {
+            "url": self.url,
+            "local_path": self.local_path if current else None,
+            "size": current.get("size"),
+            "etag": current.get("etag"),
+            "downloading": os.path.exists(self.part_path),
+            "last_status": self.last_status,
+            "last_error": self.last_error,
+        }
+
+
+def _run_self_test():
+    """使用本地HTTP服务器验证续传、条件请求和限速"""
+    import shutil
+    import tempfile
+    from email.utils import formatdate
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    # 限速器：传输量为速率的 3 倍时至少需要约 3 秒
+    limiter = BandwidthLimiter(256 * 1024)
+    started = time.monotonic()
+    for _ in range(12):
+        limiter.consume(64 * 1024)
+    elapsed = time.monotonic() - started
+    assert elapsed >= 3 * 0.95, f"限速无效: {elapsed:.2f}s"
+    print(f"✅ 限速: 768 KB 用时 {elapsed:.2f}s (限速 256 KB/s)")
+
+    payload = os.urandom(512 * 1024)
+    etag = '"v1-' + hashlib.sha1(payload).hexdigest()[:12] + '"'
+    last_modified = formatdate(time.time() - 3600, usegmt=True)
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            requests_seen.append(dict(self.headers))
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            start = 0
+            range_header = self.headers.get("Range")
+            if range_header and self.headers.get("If-Range") == etag:
+                start = int(range_header.split("=")[1].rstrip("-"))
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{len(payload) - 1}/{len(payload)}")
+            else:
+                self.send_response(200)
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", last_modified)
+            self.send_header("Content-Length", str(len(payload) - start))
+            self.end_headers()
+            self.wfile.write(payload[start:])
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/clips/video.mp4"
+    cache_dir = tempfile.mkdtemp(prefix="content_cache_")
+
+    try:
+        source = HttpContentSource(url, cache_dir, rate_limit_kbps=2048,
+                                   expected_sha256=hashlib.sha256(payload).hexdigest())
+
+        # 模拟中断：预先写入一半数据作为断点
+        half = len(payload) // 2
+        with open(source.part_path, 'wb') as f:
+            f.write(payload[:half])
+        source.meta["pending"] = {"etag": etag, "last_modified": last_modified, "size": len(payload)}
+        source._save_meta()
+
+        started = time.monotonic()
+        assert source.check_now(), "续传失败"
+        elapsed = time.monotonic() - started
+        assert elapsed >= (len(payload) - half) / (2048 * 1024) * 0.95, f"续传未限速: {elapsed:.2f}s"
+        assert requests_seen[-1].get("Range") == f"bytes={half}-"
+        with open(source.get_local_path(), 'rb') as f:
+            assert f.read() == payload
+        print(f"✅ 断点续传: {len(payload) - half} 字节，用时 {elapsed:.2f}s (限速 2048 KB/s)")
+
+        assert not source.check_now() and source.last_status == 304
+        print("✅ 条件请求: 文件未变化时返回304")
+
+        print("✅ 自检通过")
+    finally:
+        server.shutdown()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    _run_self_test()
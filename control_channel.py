@@ -0,0 +1,292 @@
+"""
+本地控制通道模块
+单实例锁 + 本地IPC（Unix域套接字 / Windows命名管道），
+命令行客户端无需加载Qt即可控制正在运行的屏保程序
+
+注意：本模块只能依赖标准库，命令行客户端需要在毫秒级完成
+"""
+
+import getpass
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from typing import Any, Callable, Dict, List, Optional
+
+from metrics import metrics
+
+
+# 命令行可用的控制命令
+CLI_COMMANDS = ("trigger", "stop", "pause", "resume", "set-threshold", "status", "metrics", "profile", "show")
+
+CLI_USAGE = """用法: main.py <命令> [参数]
+
+命令:
+  trigger              立即启动屏保
+  stop                 关闭正在播放的屏保
+  pause                暂停空闲监控
+  resume               恢复空闲监控
+  set-threshold <秒>   设置空闲触发时间
+  status               查看运行状态
+  metrics              查看运行指标
+  profile cpu [秒]     CPU 采样剖析（默认 10 秒），报告写到 config.json 所在目录
+  profile memory [stop] 内存快照（再次执行报告增长），stop 停止跟踪
+  profile objects      Qt/Python 对象数量
+  show                 显示控制面板"""
+
+
+def _instance_name() -> str:
+    try:
+        user = getpass.getuser()
+    except Exception:
+        user = str(os.getpid())
+    safe_user = "".join(c if c.isalnum() else "_" for c in user)
+    return f"pingmubaohu-{safe_user}"
+
+
+def get_lock_path() -> str:
+    """单实例锁文件路径"""
+    return os.path.join(tempfile.gettempdir(), _instance_name() + ".lock")
+
+
+def get_info_path() -> str:
+    """实例信息文件路径（控制地址和认证密钥）"""
+    return os.path.join(tempfile.gettempdir(), _instance_name() + ".json")
+
+
+def get_control_address() -> str:
+    """控制通道地址：Windows使用命名管道，其他系统使用Unix域套接字"""
+    if sys.platform == "win32":
+        return "\\\\.\\pipe\\" + _instance_name()
+    return os.path.join(tempfile.gettempdir(), _instance_name() + ".sock")
+
+
+class InstanceLock:
+    """单实例文件锁（进程退出时由系统自动释放）"""
+
+    def __init__(self, lock_path: str = None):
+        self.lock_path = lock_path or get_lock_path()
+        self._file = None
+
+    def acquire(self) -> bool:
+        """
+        尝试获取锁
+
+        Returns:
+            bool: 获取成功返回True，已有实例运行时返回False
+        """
+        if self._file:
+            return True
+        lock_file = open(self.lock_path, "a+b")
+        try:
+            if sys.platform == "win32":
+                import msvcrt
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._file = lock_file
+        return True
+
+    def release(self):
+        """释放锁"""
+        if not self._file:
+            return
+        try:
+            if sys.platform == "win32":
+                import msvcrt
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        except OSError:
+            pass
+        self._file.close()
+        self._file = None
+
+
+class ControlServer:
+    """本地控制服务端，在后台线程中逐个处理命令"""
+
+    # 接受连接失败时的退避上限（秒）和连续失败多少次后停止
+    ACCEPT_BACKOFF_MAX = 1.0
+    MAX_ACCEPT_FAILURES = 20
+
+    def __init__(self, handlers: Dict[str, Callable[[List[str]], Any]], address: str = None):
+        self.handlers = handlers
+        self.address = address or get_control_address()
+        self.authkey = os.urandom(16)
+        self._listener: Optional[Listener] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    def start(self):
+        """开始监听控制命令"""
+        if self._listener is not None:
+            return self
+        if sys.platform != "win32" and os.path.exists(self.address):
+            # 持有单实例锁时，残留的套接字文件一定来自已退出的进程
+            os.remove(self.address)
+
+        self._listener = Listener(self.address, authkey=self.authkey)
+        if sys.platform != "win32":
+            os.chmod(self.address, 0o600)
+        self._write_info()
+
+        self._running = True
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+        print(f"控制通道已启动: {self.address}")
+        return self
+
+    def stop(self):
+        """停止监听（监听线程已因连续出错自行停止时同样关闭监听并清理实例信息）"""
+        if self._listener is None:
+            return
+        if self._running:
+            self._running = False
+            # 连接一次唤醒阻塞中的accept；监听线程可能已经退出循环、不再接受连接，
+            # 连接的握手会一直等待，放在后台线程中，关闭监听后自行结束
+            threading.Thread(target=self._wake, daemon=True).start()
+        if self._thread:
+            self._thread.join(timeout=1.0)
+        self._listener.close()
+        self._listener = None
+        try:
+            os.remove(get_info_path())
+        except OSError:
+            pass
+
+    def _wake(self):
+        try:
+            Client(self.address, authkey=self.authkey).close()
+        except Exception:
+            pass
+
+    def _write_info(self):
+        """写入仅当前用户可读的实例信息，供命令行客户端认证"""
+        info = {"pid": os.getpid(), "address": self.address, "authkey": self.authkey.hex()}
+        info_path = get_info_path()
+        if os.path.exists(info_path):
+            os.remove(info_path)
+        fd = os.open(info_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(info, f)
+
+    def _serve(self):
+        failures = 0
+        while self._running:
+            try:
+                conn = self._listener.accept()
+            except AuthenticationError as e:
+                if self._running:
+                    print(f"控制连接认证失败: {e}")
+                continue
+            except Exception as e:
+                if not self._running:
+                    break
+                # 监听套接字出错（文件描述符耗尽、已被关闭等）时退避重试，连续失败过多则停止控制通道
+                failures += 1
+                metrics.increment("control.accept_errors")
+                if failures >= self.MAX_ACCEPT_FAILURES:
+                    print(f"⚠️ 控制通道连续 {failures} 次接受连接失败，已停止: {e}")
+                    self._running = False
+                    break
+                print(f"接受控制连接失败: {e}")
+                time.sleep(min(self.ACCEPT_BACKOFF_MAX, 0.05 * 2 ** (failures - 1)))
+                continue
+            failures = 0
+            with conn:
+                if not self._running:
+                    break
+                try:
+                    request = json.loads(conn.recv_bytes(64 * 1024).decode("utf-8"))
+                    response = self.dispatch(request.get("command"), request.get("args", []))
+                    conn.send_bytes(json.dumps(response, ensure_ascii=False, default=str).encode("utf-8"))
+                except Exception as e:
+                    print(f"处理控制命令失败: {e}")
+
+    def dispatch(self, command: str, args: List[str]) -> Dict[str, Any]:
+        """
+        执行一条控制命令
+
+        Returns:
+            Dict[str, Any]: {"ok": bool, "result": ...} 或 {"ok": False, "error": ...}
+        """
+        metrics.increment("control.commands")
+        handler = self.handlers.get(command)
+        if not handler:
+            return {"ok": False, "error": f"未知命令: {command}"}
+        try:
+            return {"ok": True, "result": handler(list(args))}
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
+
+def send_command(command: str, args: List[str] = None, timeout: float = 5.0) -> Dict[str, Any]:
+    """
+    向正在运行的实例发送命令
+
+    Raises:
+        ConnectionError: 没有正在运行的实例
+    """
+    try:
+        with open(get_info_path(), "r", encoding="utf-8") as f:
+            info = json.load(f)
+        conn = Client(info["address"], authkey=bytes.fromhex(info["authkey"]))
+    except (OSError, ValueError, KeyError, AuthenticationError) as e:
+        raise ConnectionError("屏保程序未在运行") from e
+
+    with conn:
+        conn.send_bytes(json.dumps({"command": command, "args": args or []}).encode("utf-8"))
+        if not conn.poll(timeout):
+            raise TimeoutError("等待响应超时")
+        return json.loads(conn.recv_bytes().decode("utf-8"))
+
+
+def run_cli(argv: List[str]) -> int:
+    """
+    命令行入口
+
+    Args:
+        argv (List[str]): 命令及参数，如 ["set-threshold", "120"]
+
+    Returns:
+        int: 进程退出码
+    """
+    if not argv or argv[0] not in CLI_COMMANDS:
+        print(CLI_USAGE)
+        return 2
+
+    started = time.perf_counter()
+    try:
+        response = send_command(argv[0], argv[1:])
+    except (ConnectionError, TimeoutError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    if not response.get("ok"):
+        print(f"❌ {response.get('error')}")
+        return 1
+
+    result = response.get("result")
+    if isinstance(result, (dict, list)):
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+    elif result is not None:
+        print(result)
+    if os.environ.get("SCREENSAVER_CLI_TIMING"):
+        print(f"({(time.perf_counter() - started) * 1000:.1f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_cli(sys.argv[1:]))
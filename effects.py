@@ -0,0 +1,292 @@
+"""
+生成效果模块
+没有视频素材时播放程序生成的画面：星空、渐变流动、时钟
+
+每帧用 NumPy 数组运算写入复用的缓冲区（BGRX，与 QImage.Format_RGB32 的内存布局一致），
+播放器用指向该缓冲区的 QImage 绘制，不复制像素；渲染超出帧预算时自动降低分辨率，再降低帧率
+
+NumPy 只在第一次创建效果时导入，不使用生成效果时不加载
+"""
+
+import math
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Optional, Tuple
+
+from metrics import metrics
+
+# 超出预算时依次尝试的分辨率比例和帧率
+SCALE_STEPS = (1.0, 0.75, 0.5, 0.35, 0.25)
+FPS_STEPS = (30, 24, 20, 15, 10)
+
+
+def _numpy():
+    import numpy
+    return numpy
+
+
+class Effect:
+    """生成效果基类，子类实现 setup()（按尺寸预先计算）和 render(t)"""
+
+    def __init__(self, width: int, height: int, **options):
+        self.np = _numpy()
+        self.options = options
+        self.resize(width, height)
+
+    def resize(self, width: int, height: int):
+        self.width, self.height = max(1, width), max(1, height)
+        self.buffer = self.np.zeros((self.height, self.width, 4), self.np.uint8)
+        self.setup()
+
+    def setup(self):
+        pass
+
+    def render(self, t: float):
+        """
+        把时刻 t（秒）的画面写入 self.buffer
+
+        Returns:
+            bool: 画面是否有变化（没有变化时不必重绘）
+        """
+        raise NotImplementedError
+
+
+class Starfield(Effect):
+    """星空：向观察者飞来的星点，亮度随距离增加，上一帧减半留下拖尾"""
+
+    def setup(self):
+        np = self.np
+        count = int(self.options.get("stars", 1500))
+        self.speed = float(self.options.get("speed", 0.25))
+        self.rng = np.random.default_rng()
+        self.x = self.rng.uniform(-1, 1, count).astype(np.float32)
+        self.y = self.rng.uniform(-1, 1, count).astype(np.float32)
+        self.z = self.rng.uniform(0.05, 1, count).astype(np.float32)
+        self.focal = 0.5 * min(self.width, self.height)
+        self._last_t = None
+
+    def render(self, t: float) -> bool:
+        np = self.np
+        dt = 0.0 if self._last_t is None else min(0.1, max(0.0, t - self._last_t))
+        self._last_t = t
+        self.z -= self.speed * dt
+        # 飞过观察者的星点回到远处
+        passed = self.z <= 0.02
+        count = int(passed.sum())
+        if count:
+            self.z[passed] = 1.0
+            self.x[passed] = self.rng.uniform(-1, 1, count)
+            self.y[passed] = self.rng.uniform(-1, 1, count)
+
+        sx = (self.x / self.z * self.focal + self.width / 2).astype(np.int32)
+        sy = (self.y / self.z * self.focal + self.height / 2).astype(np.int32)
+        visible = (sx >= 0) & (sx < self.width) & (sy >= 0) & (sy < self.height)
+        brightness = ((1.0 - self.z[visible]) * 255).clip(0, 255).astype(np.uint8)
+
+        np.right_shift(self.buffer, 1, out=self.buffer)
+        self.buffer[sy[visible], sx[visible], :3] = brightness[:, None]
+        return True
+
+
+class GradientFlow(Effect):
+    """渐变流动：几组正弦波叠加后经调色板着色，调色板随时间循环"""
+
+    def setup(self):
+        np = self.np
+        frequency = float(self.options.get("frequency", 3.0))
+        self.speed = float(self.options.get("speed", 0.3))
+        self.xs = np.linspace(0, 2 * math.pi * frequency, self.width, dtype=np.float32)
+        self.ys = np.linspace(0, 2 * math.pi * frequency * self.height / self.width, self.height, dtype=np.float32)
+        # 复用的中间结果，每帧不分配新数组
+        self.field = np.empty((self.height, self.width), np.float32)
+        self.term = np.empty((self.height, self.width), np.float32)
+        self.index = np.empty((self.height, self.width), np.uint8)
+        self.base_palette = self._palette(float(self.options.get("hue", 0.55)))
+
+    def _palette(self, hue: float):
+        """256 色调色板：色相在 hue 附近摆动，亮度较低"""
+        np = self.np
+        steps = np.linspace(0, 2 * math.pi, 256, endpoint=False, dtype=np.float32)
+        palette = np.zeros((256, 4), np.uint8)
+        for channel, shift in ((2, 0.0), (1, 2.1), (0, 4.2)):  # BGRX
+            palette[:, channel] = (70 + 60 * np.sin(steps + shift + hue * 2 * math.pi)).astype(np.uint8)
+        palette[:, 3] = 255
+        return palette
+
+    def render(self, t: float) -> bool:
+        np = self.np
+        phase = t * self.speed
+        # sin(x+y+p) = sin(x)cos(y+p) + cos(x)sin(y+p)，斜向的波也能拆成两个外积，避免逐像素求正弦
+        np.multiply(np.sin(self.ys + phase)[:, None], np.cos(self.xs * 0.7)[None, :], out=self.field)
+        np.multiply(np.cos(self.ys + phase)[:, None], np.sin(self.xs * 0.7)[None, :], out=self.term)
+        self.field += self.term
+        self.field += np.sin(self.xs + phase * 1.3)[None, :]
+        self.field += np.sin(self.ys * 1.4 - phase * 0.8)[:, None]
+        # 取值范围 [-3, 3] 映射到调色板下标
+        self.field += 3.0
+        self.field *= 255 / 6.0
+        np.copyto(self.index, self.field, casting="unsafe")
+        # mode="clip" 时直接写入 out，不经过临时缓冲
+        np.take(np.roll(self.base_palette, int(phase * 20) % 256, axis=0), self.index, axis=0, out=self.buffer,
+                mode="clip")
+        return True
+
+
+# 七段数码管：每个数字点亮的段（a 上、b 右上、c 右下、d 下、e 左下、f 左上、g 中）
+SEGMENTS = {
+    "0": "abcdef", "1": "bc", "2": "abdeg", "3": "abcdg", "4": "bcfg",
+    "5": "acdfg", "6": "acdefg", "7": "abc", "8": "abcdefg", "9": "abcdfg",
+}
+
+
+class Clock(Effect):
+    """时钟：七段数码管样式的时间，位置缓慢漂移防止烧屏；每秒只重绘一次"""
+
+    def setup(self):
+        self.color = tuple(self.options.get("color", (230, 200, 120)))  # RGB
+        self.show_seconds = bool(self.options.get("seconds", True))
+        self._drawn = None
+
+    def render(self, t: float) -> bool:
+        now = datetime.now()
+        text = now.strftime("%H:%M:%S" if self.show_seconds else "%H:%M")
+        # 漂移范围为屏幕的 10%，约一小时走完一圈
+        drift = (math.sin(t / 600.0) * 0.1, math.sin(t / 470.0 + 1.0) * 0.1)
+        offset = (int(drift[0] * self.width), int(drift[1] * self.height))
+        if (text, offset) == self._drawn:
+            return False
+        self._drawn = (text, offset)
+
+        self.buffer.fill(0)
+        self.buffer[:, :, 3] = 255
+        digit_height = self.height // 4
+        digit_width = digit_height // 2
+        thickness = max(2, digit_height // 10)
+        gap = thickness * 2
+        widths = [thickness if char == ":" else digit_width for char in text]
+        x = (self.width - sum(widths) - gap * (len(text) - 1)) // 2 + offset[0]
+        y = (self.height - digit_height) // 2 + offset[1]
+        color = self.color[::-1] + (255,)
+        for char, width in zip(text, widths):
+            if char == ":":
+                for row in (digit_height // 3, digit_height * 2 // 3):
+                    self._fill(x, y + row - thickness // 2, thickness, thickness, color)
+            else:
+                self._draw_digit(char, x, y, digit_width, digit_height, thickness, color)
+            x += width + gap
+        return True
+
+    def _draw_digit(self, char, x, y, width, height, thickness, color):
+        half = height // 2
+        rectangles = {
+            "a": (x, y, width, thickness),
+            "b": (x + width - thickness, y, thickness, half),
+            "c": (x + width - thickness, y + half, thickness, height - half),
+            "d": (x, y + height - thickness, width, thickness),
+            "e": (x, y + half, thickness, height - half),
+            "f": (x, y, thickness, half),
+            "g": (x, y + half - thickness // 2, width, thickness),
+        }
+        for segment in SEGMENTS[char]:
+            self._fill(*rectangles[segment], color)
+
+    def _fill(self, x, y, width, height, color):
+        x0, y0 = max(0, x), max(0, y)
+        x1, y1 = min(self.width, x + width), min(self.height, y + height)
+        if x1 > x0 and y1 > y0:
+            self.buffer[y0:y1, x0:x1] = color
+
+
+EFFECTS = {"starfield": Starfield, "gradient_flow": GradientFlow, "clock": Clock}
+
+
+class EffectRenderer:
+    """
+    按帧预算运行生成效果
+
+    最近 window 帧（渲染 + 显示）耗时的中位数超过 budget_ms 时先降低分辨率，已到最低后降低帧率
+    """
+
+    def __init__(self, name: str, width: int, height: int, fps: int = 30, budget_ms: float = 12.0,
+                 window: int = 15, **options):
+        if name not in EFFECTS:
+            raise ValueError(f"未知的生成效果: {name}（可用: {', '.join(EFFECTS)}）")
+        self.name = name
+        self.full_size = (width, height)
+        self.budget_ms = budget_ms
+        self.fps_steps = (fps,) + tuple(step for step in FPS_STEPS if step < fps)
+        self.scale_index = 0
+        self.fps_index = 0
+        self.step_downs = 0
+        self._frames = deque(maxlen=window)
+        self.effect = EFFECTS[name](*self.size, **options)
+
+    @property
+    def scale(self) -> float:
+        return SCALE_STEPS[self.scale_index]
+
+    @property
+    def fps(self) -> int:
+        return self.fps_steps[self.fps_index]
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return int(self.full_size[0] * self.scale), int(self.full_size[1] * self.scale)
+
+    def frame(self, t: float, present: Optional[Callable[[], None]] = None) -> bool:
+        """
+        渲染一帧并显示
+
+        Args:
+            t (float): 时刻（秒）
+            present (Callable): 显示缓冲区的函数（如重绘窗口），计入帧耗时
+
+        Returns:
+            bool: 画面是否有变化
+        """
+        started = time.perf_counter()
+        changed = self.effect.render(t)
+        if changed and present:
+            present()
+        elapsed = (time.perf_counter() - started) * 1000.0
+        metrics.observe(f"effects.{self.name}_frame_ms", elapsed)
+        # 没有变化的帧（如时钟在同一秒内）不参与预算判断
+        if changed:
+            self._frames.append(elapsed)
+            if len(self._frames) == self._frames.maxlen and sorted(self._frames)[len(self._frames) // 2] > self.budget_ms:
+                self.step_down()
+        return changed
+
+    def step_down(self) -> bool:
+        """降低一级分辨率或帧率，已到最低时返回False"""
+        if self.scale_index < len(SCALE_STEPS) - 1:
+            self.scale_index += 1
+            self.effect.resize(*self.size)
+        elif self.fps_index < len(self.fps_steps) - 1:
+            self.fps_index += 1
+        else:
+            return False
+        self._frames.clear()
+        self.step_downs += 1
+        metrics.increment("effects.step_downs")
+        metrics.set_gauge("effects.level", {"effect": self.name, "scale": self.scale, "fps": self.fps})
+        print(f"🎨 {self.name} 超出帧预算 {self.budget_ms:g} 毫秒，降到 {self.size[0]}x{self.size[1]} @ {self.fps} fps")
+        return True
+
+
+if __name__ == "__main__":
+    # 测试各效果的输出和预算降级
+    for name in EFFECTS:
+        renderer = EffectRenderer(name, 320, 180)
+        for frame in range(20):
+            renderer.frame(frame / 30)
+        assert renderer.effect.buffer.shape == (180, 320, 4)
+        assert renderer.effect.buffer[:, :, :3].any(), f"{name} 没有输出画面"
+        print(f"{name}: 每帧平均 {metrics.snapshot()['timings'][f'effects.{name}_frame_ms']['avg']:.2f} 毫秒")
+
+    slow = EffectRenderer("gradient_flow", 320, 180, budget_ms=0.0, window=3)
+    for frame in range(60):
+        slow.frame(frame / 30)
+    assert (slow.scale, slow.fps) == (SCALE_STEPS[-1], FPS_STEPS[-1]), (slow.scale, slow.fps)
+    print(f"✅ 预算为0时降到 {slow.size} @ {slow.fps} fps，共降级 {slow.step_downs} 次")
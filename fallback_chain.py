@@ -0,0 +1,216 @@
+"""
+备用播放链模块
+主视频无法播放时依次切换到备用视频、图片轮播和程序生成的图案，不会因为一个坏文件露出桌面
+
+候选视频在后台预先校验（文件可读、ffprobe 能找到视频流）；校验或播放失败的文件按
+路径+大小+修改时间 记录到文件，下次启动直接跳过，不再重试；文件被替换后记录自动失效
+"""
+
+import json
+import os
+import subprocess
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from media_library import IMAGE_EXTENSIONS, list_media_files
+from media_tools import find_ffprobe
+from metrics import metrics
+
+
+def file_key(path: str) -> Optional[str]:
+    """文件的 路径+大小+修改时间 标识，文件不存在时返回None"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return f"{os.path.abspath(path)}|{stat.st_size}|{int(stat.st_mtime)}"
+
+
+def validate_video(path: str, ffprobe: str = None) -> Optional[str]:
+    """
+    检查视频能否播放
+
+    Args:
+        path (str): 视频文件路径
+        ffprobe (str, optional): ffprobe 路径；未提供时只检查文件可读
+
+    Returns:
+        Optional[str]: 失败原因，可以播放时返回None
+    """
+    try:
+        if os.path.getsize(path) == 0:
+            return "空文件"
+        with open(path, "rb") as f:
+            f.read(4096)
+    except OSError as e:
+        return f"无法读取: {e}"
+    if not ffprobe:
+        return None
+    command = [ffprobe, "-v", "error", "-select_streams", "v:0",
+               "-show_entries", "stream=codec_type", "-of", "csv=p=0", path]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, timeout=30)
+    except (OSError, subprocess.SubprocessError) as e:
+        print(f"ffprobe 运行失败: {e}")
+        return None
+    if result.returncode != 0:
+        return (result.stderr.strip().splitlines() or ["无法解析"])[-1]
+    if "video" not in result.stdout:
+        return "没有视频流"
+    return None
+
+
+class FailureRegistry:
+    """无法播放的文件记录（持久化到JSON）"""
+
+    def __init__(self, path: str = "media_failures.json"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._failures: Dict[str, Dict[str, Any]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        try:
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(self._failures, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"保存失败记录出错: {e}")
+
+    def is_failed(self, path: str) -> bool:
+        key = file_key(path)
+        with self._lock:
+            return key is not None and key in self._failures
+
+    def record(self, path: str, reason: str):
+        key = file_key(path)
+        if key is None:
+            return
+        with self._lock:
+            # 同一文件的旧记录（大小或修改时间已变）一并清除
+            prefix = key.rsplit("|", 2)[0] + "|"
+            self._failures = {k: v for k, v in self._failures.items() if not k.startswith(prefix)}
+            self._failures[key] = {"reason": reason, "time": time.time()}
+            self._save()
+
+    def __len__(self):
+        return len(self._failures)
+
+
+class FallbackChain:
+    """备用播放链：生成播放候选，并在后台预先校验候选视频"""
+
+    def __init__(self, failures: FailureRegistry, ffmpeg_path: str = None):
+        self.failures = failures
+        self.ffmpeg_path = ffmpeg_path
+        self._lock = threading.Lock()
+        # 已校验通过的文件（按文件标识，本次运行内有效）
+        self._validated = set()
+
+    def candidates(self, primary: Optional[str], config: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        按顺序生成播放候选，跳过不存在和已记录失败的视频
+
+        Args:
+            primary (str, optional): 主视频
+            config (dict): 配置（effect / fallback_videos / fallback_slideshow / fallback_pattern）
+
+        Returns:
+            List[dict]: {"kind": "effect", "name": ...} / {"kind": "video", "path": ...} /
+                        {"kind": "slideshow", "paths": [...], "interval": ...} / {"kind": "pattern"}，
+                        可直接传给播放器（包括播放器进程）
+        """
+        chain = []
+        # 配置了生成效果时效果优先，视频等作为效果不可用（如未安装 NumPy）时的备用
+        if config.get('effect'):
+            chain.append({"kind": "effect", "name": config['effect'], "options": config.get('effect_options', {}),
+                          "fps": config.get('effect_fps', 30),
+                          "budget_ms": config.get('effect_frame_budget_ms', 12)})
+        videos = ([primary] if primary else []) + self.fallback_videos(config)
+        for path in dict.fromkeys(videos):
+            if os.path.exists(path) and not self.failures.is_failed(path):
+                chain.append({"kind": "video", "path": os.path.abspath(path)})
+
+        slideshow = config.get('fallback_slideshow')
+        images = list_media_files(slideshow, IMAGE_EXTENSIONS) if slideshow else []
+        if images:
+            chain.append({"kind": "slideshow", "paths": [os.path.abspath(path) for path in images],
+                          "interval": config.get('slideshow_interval_seconds', 8)})
+        if config.get('fallback_pattern', True):
+            chain.append({"kind": "pattern"})
+        return chain
+
+    @staticmethod
+    def fallback_videos(config: Dict[str, Any]) -> List[str]:
+        """配置的备用视频（文件夹展开为其中的视频）"""
+        videos = []
+        for path in config.get('fallback_videos', []):
+            videos += list_media_files(path) if os.path.isdir(path) else [path]
+        return videos
+
+    def record_failure(self, path: str, reason: str):
+        """记录播放失败，下次启动时跳过该文件"""
+        print(f"⚠️ 跳过无法播放的视频 {os.path.basename(path)}: {reason}")
+        metrics.increment("player.media_failures")
+        self.failures.record(path, reason)
+
+    def validate_async(self, paths: Iterable[str]):
+        """在后台校验视频，校验失败的文件记录为失败"""
+        with self._lock:
+            pending = [path for path in dict.fromkeys(paths)
+                       if file_key(path) and file_key(path) not in self._validated]
+        if not pending:
+            return
+
+        def run():
+            ffprobe = find_ffprobe(self.ffmpeg_path)
+            for path in pending:
+                key = file_key(path)
+                if key is None or self.failures.is_failed(path):
+                    continue
+                reason = validate_video(path, ffprobe)
+                if reason:
+                    self.record_failure(path, reason)
+                else:
+                    with self._lock:
+                        self._validated.add(key)
+
+        threading.Thread(target=run, daemon=True).start()
+
+
+if __name__ == "__main__":
+    # 测试候选生成与失败记录
+    import shutil
+    import tempfile
+
+    work_dir = tempfile.mkdtemp(prefix="fallback_chain_")
+    good = os.path.join(work_dir, "good.mp4")
+    broken = os.path.join(work_dir, "broken.mp4")
+    with open(good, "wb") as f:
+        f.write(os.urandom(64 * 1024))
+    open(broken, "wb").close()
+
+    registry_path = os.path.join(work_dir, "media_failures.json")
+    chain = FallbackChain(FailureRegistry(registry_path))
+    config = {"fallback_videos": [good]}
+    assert validate_video(broken) == "空文件"
+    chain.record_failure(broken, validate_video(broken))
+
+    reloaded = FallbackChain(FailureRegistry(registry_path))
+    kinds = [(c["kind"], c.get("path")) for c in reloaded.candidates(broken, config)]
+    assert kinds == [("video", os.path.abspath(good)), ("pattern", None)], kinds
+
+    # 文件被替换后重新尝试
+    with open(broken, "wb") as f:
+        f.write(b"\0" * 1024)
+    assert not reloaded.failures.is_failed(broken)
+    print(f"✅ 候选: {kinds}")
+    shutil.rmtree(work_dir, ignore_errors=True)
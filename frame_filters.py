@@ -0,0 +1,183 @@
+"""
+帧滤镜模块
+OLED 屏幕长时间播放带固定台标的视频会烧屏；视频帧显示时可以：
+
+- pixel_orbit：整幅画面沿小圆周缓慢平移几个像素，固定的像素不会一直点亮
+- dimming：整体调暗（brightness），可选伽马校正（gamma）
+- vignette：四周渐暗（边缘像素的点亮时间更长）
+
+平移只是绘制时的偏移，调暗和暗角合并为一张按窗口尺寸预先计算的黑色透明度遮罩，绘制帧后叠加一次，
+都不需要逐帧处理像素；只有 gamma 不为 1 时才对颜色通道逐帧查表。NumPy 只在启用滤镜时导入
+"""
+
+import math
+import time
+from typing import Optional, Tuple
+
+from metrics import metrics
+
+
+def _numpy():
+    import numpy
+    return numpy
+
+
+class PixelOrbit:
+    """像素轨道：画面偏移 (dx, dy) 沿半径 radius 的圆周移动，period_minutes 分钟一圈"""
+
+    def __init__(self, radius: int = 4, period_minutes: float = 10):
+        self.radius = max(1, int(radius))
+        self.period = max(1.0, period_minutes * 60)
+
+    def offset(self, t: float) -> Tuple[int, int]:
+        angle = 2 * math.pi * t / self.period
+        return int(round(self.radius * math.cos(angle))), int(round(self.radius * math.sin(angle)))
+
+
+class ToneCurve:
+    """伽马查找表：out = 255 × (in / 255) ^ gamma，只作用于颜色通道"""
+
+    def __init__(self, gamma: float = 1.0):
+        self.gamma = max(0.1, float(gamma))
+        self.lut = None
+
+    def prepare(self, np):
+        if self.lut is None:
+            values = np.arange(256, dtype=np.float32) / 255.0
+            self.lut = np.clip(255.0 * values ** self.gamma + 0.5, 0, 255).astype(np.uint8)
+
+    def apply(self, src, dst):
+        # mode="clip" 时直接写入 out，不经过临时缓冲；第四个字节（X/alpha）不处理
+        _numpy().take(self.lut, src[:, :, :3], out=dst[:, :, :3], mode="clip")
+
+
+class Vignette:
+    """暗角：距中心的归一化距离超过 inner 后亮度按平方下降，角落降低 strength"""
+
+    def __init__(self, strength: float = 0.4, inner: float = 0.5):
+        self.strength = min(1.0, max(0.0, float(strength)))
+        self.inner = min(0.95, max(0.0, float(inner)))
+
+    def factors(self, np, height: int, width: int):
+        """每个像素的亮度系数 (height, width)"""
+        ys = np.linspace(-1, 1, height, dtype=np.float32)[:, None]
+        xs = np.linspace(-1, 1, width, dtype=np.float32)[None, :]
+        distance = np.sqrt(xs * xs + ys * ys) / math.sqrt(2)
+        falloff = np.clip((distance - self.inner) / (1 - self.inner), 0, 1) ** 2
+        return 1.0 - self.strength * falloff
+
+
+class FrameFilterChain:
+    """按配置组合的帧滤镜"""
+
+    def __init__(self, settings: dict):
+        """
+        Args:
+            settings (dict): {"pixel_orbit": {...}, "dimming": {...}, "vignette": {...}}，值为各滤镜的参数；
+                             值为 false 或不存在时不启用
+
+        Raises:
+            ValueError: 没有启用任何滤镜
+        """
+        self.np = _numpy()
+        self.orbit = PixelOrbit(**_options(settings["pixel_orbit"])) if settings.get("pixel_orbit") else None
+        dimming = _options(settings["dimming"]) if settings.get("dimming") else {}
+        self.brightness = min(1.0, max(0.0, float(dimming.get("brightness", 0.8)))) if settings.get("dimming") else 1.0
+        gamma = float(dimming.get("gamma", 1.0))
+        self.tone = ToneCurve(gamma) if gamma != 1.0 else None
+        self.vignette = Vignette(**_options(settings["vignette"])) if settings.get("vignette") else None
+        if not (self.orbit or self.tone or self.vignette or self.brightness < 1.0):
+            raise ValueError("没有启用任何帧滤镜")
+        self._shape = None
+        self._buffer = None
+        self._mask_size = None
+        self._mask = None
+
+    @property
+    def processes_pixels(self) -> bool:
+        """是否需要逐帧处理像素（只有伽马校正需要）"""
+        return self.tone is not None
+
+    def offset(self, t: float) -> Tuple[int, int]:
+        """t 秒时画面的平移量（像素）"""
+        return self.orbit.offset(t) if self.orbit else (0, 0)
+
+    def apply(self, data, width: int, height: int, stride: int):
+        """
+        对一帧的颜色通道做伽马校正
+
+        Args:
+            data: 帧数据（支持缓冲区协议，RGB32，每行 stride 字节）
+            width (int): 宽度
+            height (int): 高度
+            stride (int): 每行字节数
+
+        Returns:
+            numpy.ndarray: (height, width, 4) 的结果，属于复用的缓冲区，下一帧会被覆盖；
+                           不需要处理像素时返回None
+        """
+        if not self.tone:
+            return None
+        np = self.np
+        started = time.perf_counter()
+        if self._shape != (height, width):
+            self._shape = (height, width)
+            self._buffer = np.full((height, width, 4), 255, np.uint8)
+            self.tone.prepare(np)
+        src = np.frombuffer(data, np.uint8, count=stride * height).reshape(height, stride)[:, :width * 4]
+        self.tone.apply(src.reshape(height, width, 4), self._buffer)
+        metrics.observe("filters.gamma_ms", (time.perf_counter() - started) * 1000.0)
+        return self._buffer
+
+    def mask(self, width: int, height: int):
+        """
+        调暗和暗角的遮罩（按尺寸缓存，尺寸不变时不重新计算）
+
+        Returns:
+            Optional[numpy.ndarray]: (height, width, 4) 的预乘 ARGB32 黑色遮罩（BGRA 字节序，只有 alpha 非零）；
+                                     不需要调暗和暗角时返回None
+        """
+        if self.brightness >= 1.0 and not self.vignette:
+            return None
+        if self._mask_size != (width, height):
+            np = self.np
+            started = time.perf_counter()
+            factors = np.full((height, width), self.brightness, np.float32)
+            if self.vignette:
+                factors *= self.vignette.factors(np, height, width)
+            self._mask = np.zeros((height, width, 4), np.uint8)
+            self._mask[:, :, 3] = np.clip((1.0 - factors) * 255 + 0.5, 0, 255).astype(np.uint8)
+            self._mask_size = (width, height)
+            metrics.observe("filters.mask_build_ms", (time.perf_counter() - started) * 1000.0)
+        return self._mask
+
+
+def _options(value) -> dict:
+    """滤镜配置可以是 true（使用默认参数）或参数字典"""
+    return value if isinstance(value, dict) else {}
+
+
+if __name__ == "__main__":
+    # 测试各滤镜的效果和耗时
+    np = _numpy()
+    height, width = 1080, 1920
+    frame = np.full((height, width, 4), 200, np.uint8)
+
+    orbit = FrameFilterChain({"pixel_orbit": {"radius": 4, "period_minutes": 1}})
+    assert orbit.offset(0.0) == (4, 0) and orbit.offset(15.0) == (0, 4)
+    assert not orbit.processes_pixels and orbit.mask(width, height) is None, "只平移时不处理像素"
+
+    chain = FrameFilterChain({"pixel_orbit": True, "dimming": {"brightness": 0.5}, "vignette": {"strength": 0.5}})
+    mask = chain.mask(width, height)
+    assert chain.mask(width, height) is mask, "尺寸不变时复用遮罩"
+    assert mask[540, 960, 3] == 128 and mask[0, 0, 3] > 190, (mask[540, 960, 3], mask[0, 0, 3])
+    assert not mask[:, :, :3].any(), "遮罩应为黑色"
+    assert chain.apply(frame, width, height, width * 4) is None
+
+    gamma = FrameFilterChain({"dimming": {"brightness": 1.0, "gamma": 2.0}})
+    for index in range(30):
+        result = gamma.apply(frame, width, height, width * 4)
+    assert result[0, 0, 0] == 157 and result[0, 0, 3] == 255, result[0, 0]
+    timings = metrics.snapshot()["timings"]
+    print(f"✅ 遮罩生成 {timings['filters.mask_build_ms']['avg']:.2f} 毫秒（每种尺寸一次），"
+          f"伽马每帧 {timings['filters.gamma_ms']['avg']:.2f} 毫秒")
@@ -0,0 +1,125 @@
+"""
+空闲阶段模块
+屏保触发后随空闲时长逐级降低消耗：视频 → 调暗并降低帧率 → 黑屏（暂停解码）→ 关闭显示器
+
+各阶段的时间与触发时间一样从最后一次输入算起，由监控循环在下一个阶段的时刻推进，不另外轮询
+"""
+
+import shutil
+import subprocess
+import sys
+from typing import Optional
+
+VIDEO = "video"
+DIMMED = "dimmed"
+BLANK = "blank"
+DISPLAY_OFF = "off"
+
+# 配置项 -> 阶段，按先后顺序
+STAGE_KEYS = (
+    ("dim_after_minutes", DIMMED),
+    ("blank_after_minutes", BLANK),
+    ("display_off_after_minutes", DISPLAY_OFF),
+)
+
+
+class IdleStages:
+    """空闲阶段设置（idle_stages 配置项）"""
+
+    def __init__(self, settings: dict = None):
+        self.configure(settings or {})
+
+    def configure(self, settings: dict):
+        """
+        Args:
+            settings (dict): dim_after_minutes / blank_after_minutes / display_off_after_minutes（0 表示不使用该阶段），
+                             dim_brightness（调暗后的亮度 0-1）、dim_fps（调暗后每秒显示的帧数）、
+                             dim_slow_motion（改为降低播放速度达到 dim_fps，慢放并静音；默认丢弃多余的帧）
+        """
+        thresholds = []
+        for key, stage in STAGE_KEYS:
+            minutes = settings.get(key, 0) or 0
+            if minutes > 0:
+                # 后面的阶段不早于前面的阶段
+                seconds = max([minutes * 60] + [previous for previous, _ in thresholds])
+                thresholds.append((seconds, stage))
+        self.brightness = min(1.0, max(0.0, float(settings.get("dim_brightness", 0.35))))
+        self.fps = max(1.0, float(settings.get("dim_fps", 10)))
+        self.slow_motion = bool(settings.get("dim_slow_motion", False))
+        # 整体替换，监控线程读取时不需要加锁
+        self.thresholds = tuple(thresholds)
+
+    def stage_for(self, idle_time: float) -> str:
+        """空闲 idle_time 秒时应处于的阶段（未达到任何阶段时为 video）"""
+        stage = VIDEO
+        for seconds, name in self.thresholds:
+            if idle_time >= seconds:
+                stage = name
+        return stage
+
+    def until_next(self, idle_time: float) -> Optional[float]:
+        """距下一个阶段的秒数，已是最后阶段时返回None"""
+        for seconds, _ in self.thresholds:
+            if idle_time < seconds:
+                return seconds - idle_time
+        return None
+
+    @property
+    def dims(self) -> bool:
+        """是否使用调暗阶段"""
+        return any(stage == DIMMED for _, stage in self.thresholds)
+
+    def player_options(self) -> dict:
+        """FullScreenVideoPlayer.set_idle_stage 的参数"""
+        return {"brightness": self.brightness, "fps": self.fps, "slow_motion": self.slow_motion}
+
+
+def set_display_power(on: bool, hwnd: int = None) -> bool:
+    """
+    打开或关闭显示器（用户输入时系统会自动重新打开）
+
+    Windows 向窗口发送 SC_MONITORPOWER；Linux 使用 xset dpms；macOS 使用 pmset（只能关闭）
+
+    Args:
+        on (bool): True 打开，False 关闭
+        hwnd (int): Windows 下接收消息的顶层窗口句柄（None 时广播）
+
+    Returns:
+        bool: 是否已执行
+    """
+    try:
+        if sys.platform == "win32":
+            import ctypes
+
+            WM_SYSCOMMAND, SC_MONITORPOWER, HWND_BROADCAST = 0x0112, 0xF170, 0xFFFF
+            # PostMessage 不等待处理结果，广播时不会被无响应的窗口阻塞
+            return bool(ctypes.windll.user32.PostMessageW(hwnd or HWND_BROADCAST, WM_SYSCOMMAND,
+                                                          SC_MONITORPOWER, -1 if on else 2))
+        if sys.platform == "darwin":
+            if on:
+                return False
+            command = ["pmset", "displaysleepnow"]
+        else:
+            if not shutil.which("xset"):
+                return False
+            command = ["xset", "dpms", "force", "on" if on else "off"]
+        subprocess.run(command, capture_output=True, timeout=5, check=True)
+        return True
+    except (OSError, AttributeError, subprocess.SubprocessError) as e:
+        print(f"切换显示器电源失败: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    # 测试阶段推进和下一个阶段时刻
+    stages = IdleStages({"dim_after_minutes": 30, "blank_after_minutes": 20, "display_off_after_minutes": 90})
+    assert stages.thresholds == ((1800, DIMMED), (1800, BLANK), (5400, DISPLAY_OFF)), "blank 不应早于 dimmed"
+    assert stages.stage_for(600) == VIDEO and stages.stage_for(1800) == BLANK
+    assert stages.until_next(600) == 1200 and stages.until_next(6000) is None
+    assert stages.dims and not stages.player_options()["slow_motion"], "默认丢帧，不慢放"
+
+    stages.configure({"blank_after_minutes": 60})
+    assert [stages.stage_for(t) for t in (0, 3599, 3600)] == [VIDEO, VIDEO, BLANK]
+    assert not stages.dims
+    assert IdleStages().until_next(10 ** 6) is None, "默认不启用任何阶段"
+    print(f"✅ 阶段: {stages.thresholds}，调暗参数: {stages.player_options()}")
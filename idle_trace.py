@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+空闲轨迹记录与回放模块
+记录用户的空闲时段（不是逐秒采样），用真实的使用习惯评估不同的触发时间和时间规则
+
+文件格式：8字节文件头，之后是定长记录，每条记录为一个空闲时段
+(开始时间 double 秒, 持续时间 uint32 毫秒)，只追加写入
+
+用法:
+    python idle_trace.py idle_trace.bin                  # 用当前配置和快速预设回放
+    python idle_trace.py idle_trace.bin 60 180 600       # 额外比较指定的触发时间（秒）
+"""
+
+import os
+import struct
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from schedule_rules import ScheduleIndex
+
+MAGIC = b"IDLTRC01"
+RECORD = struct.Struct("<dI")
+
+
+class IdleTraceRecorder:
+    """
+    空闲轨迹记录器
+
+    监控循环每次读取空闲时间后调用 observe()；检测到新的用户输入时，
+    把上一段空闲（从最后一次输入到最后一次确认仍在空闲的采样时刻）追加到文件
+    """
+
+    def __init__(self, path: str, min_gap_seconds: float = 3.0, tolerance: float = 1.0):
+        self.path = path
+        self.min_gap_seconds = min_gap_seconds
+        # 系统计时与墙上时间之间的误差，小于该值的变化不视为新输入
+        self.tolerance = tolerance
+        self._lock = threading.Lock()
+        self._file = None
+        self._started = time.time()
+        self._gap_start: Optional[float] = None
+        self._last_sample: Optional[float] = None
+        self.records_written = 0
+
+    def _open(self):
+        new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        self._file = open(self.path, "ab", buffering=0)
+        if new_file:
+            self._file.write(MAGIC)
+
+    def observe(self, idle_time: float, now: float = None):
+        """
+        记录一次空闲时间采样
+
+        Args:
+            idle_time (float): 当前空闲时间（秒）
+            now (float, optional): 采样时刻（time.time()）
+        """
+        now = time.time() if now is None else now
+        last_input = now - idle_time
+        with self._lock:
+            if self._gap_start is not None and last_input > self._gap_start + self.tolerance:
+                # 上次采样之后有新输入，上一段空闲结束
+                self._write_gap(self._gap_start, self._last_sample)
+                self._gap_start = None
+            if self._gap_start is None:
+                # 程序启动前的空闲时间无法确认，从启动时刻算起
+                self._gap_start = max(last_input, self._started)
+            self._last_sample = now
+
+    def _write_gap(self, start: float, end: float):
+        length = end - start
+        if length < self.min_gap_seconds:
+            return
+        try:
+            if self._file is None:
+                self._open()
+            self._file.write(RECORD.pack(start, min(int(length * 1000), 0xFFFFFFFF)))
+            self.records_written += 1
+        except OSError as e:
+            print(f"写入空闲轨迹失败: {e}")
+
+    def close(self):
+        """结束记录，把当前未结束的空闲时段写入文件"""
+        with self._lock:
+            if self._gap_start is not None and self._last_sample is not None:
+                self._write_gap(self._gap_start, self._last_sample)
+            self._gap_start = None
+            # 暂停期间不记录，恢复后从恢复时刻重新算起
+            self._started = time.time()
+            if self._file:
+                self._file.close()
+                self._file = None
+
+
+def read_trace(path: str) -> List[Tuple[float, float]]:
+    """
+    读取空闲轨迹
+
+    Returns:
+        List[Tuple[float, float]]: (开始时间, 持续秒数) 列表，按开始时间排序
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"不是空闲轨迹文件: {path}")
+    body = memoryview(data)[len(MAGIC):]
+    # 忽略写入中断留下的不完整记录
+    body = body[:len(body) - len(body) % RECORD.size]
+    return sorted((start, millis / 1000.0) for start, millis in RECORD.iter_unpack(body))
+
+
+class TriggerPolicy:
+    """
+    候选触发策略：固定触发时间，或与屏保相同的时间规则（规则未指定时使用 idle_seconds）
+    """
+
+    def __init__(self, name: str, idle_seconds: float, schedule_rules: List[Dict[str, Any]] = None,
+                 presets: Dict[str, Any] = None):
+        self.name = name
+        self.idle_seconds = idle_seconds
+        self.schedule = ScheduleIndex(schedule_rules or [], presets or {})
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], name: str = "当前配置") -> "TriggerPolicy":
+        idle_seconds = config.get('idle_time_minutes', 5) * 60 + config.get('idle_time_seconds', 0)
+        return cls(name, idle_seconds, config.get('schedule_rules', []), config.get('quick_presets', {}))
+
+    def trigger_time(self, start: float, end: float) -> Optional[float]:
+        """
+        一段空闲中屏保的启动时刻（与监控循环相同：规则在边界处切换，按边界时的规则判断）
+
+        Returns:
+            Optional[float]: 启动时刻，这段空闲内不会触发时返回None
+        """
+        if not self.schedule:
+            trigger = start + self.idle_seconds
+            return trigger if trigger < end else None
+
+        t = start
+        while t < end:
+            rule, boundary = self.schedule.lookup(datetime.fromtimestamp(t))
+            boundary_ts = boundary.timestamp() if boundary != datetime.max else float("inf")
+            if rule is None or rule.enabled:
+                threshold = rule.idle_seconds if rule and rule.idle_seconds is not None else self.idle_seconds
+                trigger = max(t, start + threshold)
+                if trigger < min(end, boundary_ts):
+                    return trigger
+            t = boundary_ts
+        return None
+
+
+def simulate(gaps: List[Tuple[float, float]], policy: TriggerPolicy,
+             false_trigger_seconds: float = 10.0) -> Dict[str, Any]:
+    """
+    用空闲轨迹回放触发策略（按事件推进的虚拟时间，不实际等待）
+
+    Args:
+        gaps: read_trace() 返回的空闲时段
+        policy: 触发策略
+        false_trigger_seconds: 屏保启动后这么短时间内用户就回来，视为误触发
+
+    Returns:
+        Dict[str, Any]: 启动次数、误触发次数、屏保播放总时长等
+    """
+    activations = 0
+    false_triggers = 0
+    screen_on = 0.0
+    for start, length in gaps:
+        end = start + length
+        trigger = policy.trigger_time(start, end)
+        if trigger is None:
+            continue
+        activations += 1
+        screen_on += end - trigger
+        if end - trigger < false_trigger_seconds:
+            false_triggers += 1
+    return {
+        "policy": policy.name,
+        "activations": activations,
+        "false_triggers": false_triggers,
+        "false_trigger_rate": round(false_triggers / activations, 3) if activations else 0.0,
+        "screen_on_hours": round(screen_on / 3600, 2),
+    }
+
+
+def candidate_policies(config: Dict[str, Any], extra_thresholds: List[float] = ()) -> Iterator[TriggerPolicy]:
+    """当前配置（含时间规则）、各快速预设以及额外指定的触发时间"""
+    yield TriggerPolicy.from_config(config)
+    for name, preset in config.get('quick_presets', {}).items():
+        yield TriggerPolicy(name, preset.get('minutes', 0) * 60 + preset.get('seconds', 0))
+    for seconds in extra_thresholds:
+        yield TriggerPolicy(f"{seconds:g}秒", seconds)
+
+
+def main(argv) -> int:
+    if not argv:
+        print(__doc__)
+        return 1
+
+    from config_manager import ConfigManager
+
+    path = argv[0]
+    extra = [float(value) for value in argv[1:]]
+    started = time.perf_counter()
+    gaps = read_trace(path)
+    if not gaps:
+        print("轨迹文件中没有记录")
+        return 1
+    days = (gaps[-1][0] + gaps[-1][1] - gaps[0][0]) / 86400
+    print(f"📈 {len(gaps)} 段空闲，覆盖 {days:.1f} 天")
+
+    print(f"{'策略':<12}{'启动次数':>8}{'误触发':>8}{'误触发率':>10}{'播放小时':>10}")
+    for policy in candidate_policies(ConfigManager().get_config(), extra):
+        result = simulate(gaps, policy)
+        print(f"{result['policy']:<12}{result['activations']:>8}{result['false_triggers']:>8}"
+              f"{result['false_trigger_rate']:>10.1%}{result['screen_on_hours']:>10.1f}")
+    print(f"用时 {time.perf_counter() - started:.2f} 秒")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
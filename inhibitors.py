@@ -0,0 +1,385 @@
+"""
+屏保抑制模块
+演示、视频会议、播放媒体或系统繁忙时不触发屏保：
+指定进程运行中、前台窗口全屏、正在播放音频、CPU占用超过阈值
+
+抑制条件只在接近触发时间时评估；进程检查使用增量扫描器，
+按 PID + 启动时间缓存进程名，每次只读取新出现的进程
+"""
+
+import os
+import sys
+import time
+from ctypes import Structure, byref, c_long, c_uint, c_ulong, c_ulonglong, c_void_p, c_wchar, sizeof
+from typing import Any, Dict, Iterable, Optional, Set
+
+from metrics import metrics
+
+try:
+    from ctypes import windll
+except ImportError:
+    windll = None
+
+# Windows 常量
+TH32CS_SNAPPROCESS = 0x00000002
+INVALID_HANDLE_VALUE = c_void_p(-1).value
+MONITOR_DEFAULTTONEAREST = 2
+MAX_PATH = 260
+
+
+class PROCESSENTRY32W(Structure):
+    _fields_ = [
+        ("dwSize", c_ulong), ("cntUsage", c_ulong), ("th32ProcessID", c_ulong),
+        ("th32DefaultHeapID", c_void_p), ("th32ModuleID", c_ulong), ("cntThreads", c_ulong),
+        ("th32ParentProcessID", c_ulong), ("pcPriClassBase", c_ulong), ("dwFlags", c_ulong),
+        ("szExeFile", c_wchar * MAX_PATH),
+    ]
+
+
+class RECT(Structure):
+    _fields_ = [("left", c_long), ("top", c_long), ("right", c_long), ("bottom", c_long)]
+
+
+class MONITORINFO(Structure):
+    _fields_ = [("cbSize", c_uint), ("rcMonitor", RECT), ("rcWork", RECT), ("dwFlags", c_uint)]
+
+
+class FILETIME(Structure):
+    _fields_ = [("low", c_ulong), ("high", c_ulong)]
+
+    @property
+    def value(self) -> int:
+        return c_ulonglong((self.high << 32) | self.low).value
+
+
+def normalize_process_name(name: str) -> str:
+    """进程名统一为小写、去掉 .exe，便于跨平台配置"""
+    name = os.path.basename(name).lower()
+    return name[:-4] if name.endswith(".exe") else name
+
+
+class ProcessScanner:
+    """
+    增量进程扫描器
+
+    Linux 下列出 /proc 中的 PID，只为新出现的 PID 读取 stat（进程名和启动时间），
+    已退出的 PID 从缓存删除；Windows 下使用 Toolhelp 快照。
+    查询时只查名称索引，并复核命中进程的启动时间以排除 PID 复用
+    """
+
+    # Linux 的 comm 字段最长 15 个字符
+    COMM_LENGTH = 15
+
+    def __init__(self, proc_root: str = "/proc", min_refresh_interval: float = 2.0):
+        self.proc_root = proc_root
+        self.min_refresh_interval = min_refresh_interval
+        self._entries: Dict[int, tuple] = {}      # pid -> (启动时间, 进程名)
+        self._by_name: Dict[str, Set[int]] = {}   # 进程名 -> pid集合
+        self._last_refresh = 0.0
+
+    def _read_stat(self, pid: int) -> Optional[tuple]:
+        try:
+            with open(f"{self.proc_root}/{pid}/stat", "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        # 格式: pid (comm) state ppid ...，comm 中可能含空格和括号
+        head, _, tail = data.rpartition(b")")
+        name = head.partition(b"(")[2].decode("utf-8", "replace")
+        fields = tail.split()
+        # starttime 是第22个字段，tail 从第3个字段开始
+        return int(fields[19]), normalize_process_name(name)
+
+    def _add(self, pid: int, entry: tuple):
+        self._entries[pid] = entry
+        self._by_name.setdefault(entry[1], set()).add(pid)
+
+    def _remove(self, pid: int):
+        _, name = self._entries.pop(pid)
+        pids = self._by_name.get(name)
+        if pids:
+            pids.discard(pid)
+            if not pids:
+                del self._by_name[name]
+
+    def refresh(self, force: bool = False):
+        """更新进程缓存（两次刷新间隔不小于 min_refresh_interval）"""
+        now = time.monotonic()
+        if not force and now - self._last_refresh < self.min_refresh_interval:
+            return
+        self._last_refresh = now
+
+        with metrics.timer("inhibitor.process_scan_ms"):
+            if windll is not None:
+                self._refresh_toolhelp()
+            else:
+                self._refresh_proc()
+
+    def _refresh_proc(self):
+        try:
+            pids = {int(name) for name in os.listdir(self.proc_root) if name.isdigit()}
+        except OSError:
+            return
+        for pid in self._entries.keys() - pids:
+            self._remove(pid)
+        for pid in pids - self._entries.keys():
+            entry = self._read_stat(pid)
+            if entry:
+                self._add(pid, entry)
+
+    def _refresh_toolhelp(self):
+        snapshot = windll.kernel32.CreateToolhelp32Snapshot(TH32CS_SNAPPROCESS, 0)
+        if snapshot == INVALID_HANDLE_VALUE:
+            return
+        seen = {}
+        try:
+            entry = PROCESSENTRY32W()
+            entry.dwSize = sizeof(entry)
+            ok = windll.kernel32.Process32FirstW(snapshot, byref(entry))
+            while ok:
+                # Toolhelp 不提供启动时间，以父进程ID区分复用的PID
+                seen[entry.th32ProcessID] = (entry.th32ParentProcessID, normalize_process_name(entry.szExeFile))
+                ok = windll.kernel32.Process32NextW(snapshot, byref(entry))
+        finally:
+            windll.kernel32.CloseHandle(snapshot)
+
+        for pid, cached in list(self._entries.items()):
+            if seen.get(pid) != cached:
+                self._remove(pid)
+        for pid, entry in seen.items():
+            if pid not in self._entries:
+                self._add(pid, entry)
+
+    def find_running(self, names: Iterable[str]) -> Optional[str]:
+        """
+        查找正在运行的指定进程
+
+        Returns:
+            Optional[str]: 第一个正在运行的进程名，都未运行时返回None
+        """
+        for name in names:
+            key = normalize_process_name(name)
+            if windll is None:
+                key = key[:self.COMM_LENGTH]
+            for pid in list(self._by_name.get(key, ())):
+                if windll is not None or self._read_stat(pid) == self._entries[pid]:
+                    return name
+                # PID 已被复用或进程已退出
+                self._remove(pid)
+                entry = self._read_stat(pid)
+                if entry:
+                    self._add(pid, entry)
+                    if entry[1] == key:
+                        return name
+        return None
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class CpuSampler:
+    """按两次采样之间的差值计算整机CPU占用率"""
+
+    def __init__(self):
+        self._last = None
+
+    @staticmethod
+    def _read_times() -> Optional[tuple]:
+        """返回 (空闲时间, 总时间)"""
+        if windll is not None:
+            idle, kernel, user = FILETIME(), FILETIME(), FILETIME()
+            if not windll.kernel32.GetSystemTimes(byref(idle), byref(kernel), byref(user)):
+                return None
+            # 内核时间已包含空闲时间
+            return idle.value, kernel.value + user.value
+        try:
+            with open("/proc/stat", "rb") as f:
+                values = [int(v) for v in f.readline().split()[1:]]
+        except (OSError, ValueError):
+            return None
+        # idle + iowait
+        return values[3] + values[4], sum(values)
+
+    def reset(self):
+        """重新开始采样"""
+        self._last = self._read_times()
+
+    def usage_percent(self) -> Optional[float]:
+        """距离上次采样的平均CPU占用率，数据不足时返回None"""
+        current = self._read_times()
+        last, self._last = self._last, current
+        if not last or not current or current[1] <= last[1]:
+            return None
+        idle = current[0] - last[0]
+        total = current[1] - last[1]
+        return 100.0 * (1 - idle / total)
+
+
+def is_foreground_fullscreen() -> bool:
+    """前台窗口是否覆盖整个显示器（全屏演示、视频、游戏等）"""
+    if windll is None:
+        return False
+    user32 = windll.user32
+    hwnd = user32.GetForegroundWindow()
+    if not hwnd or hwnd in (user32.GetDesktopWindow(), user32.GetShellWindow()):
+        return False
+
+    window = RECT()
+    if not user32.GetWindowRect(hwnd, byref(window)):
+        return False
+    info = MONITORINFO()
+    info.cbSize = sizeof(info)
+    monitor = user32.MonitorFromWindow(hwnd, MONITOR_DEFAULTTONEAREST)
+    if not monitor or not user32.GetMonitorInfoW(monitor, byref(info)):
+        return False
+    screen = info.rcMonitor
+    return (window.left, window.top, window.right, window.bottom) == \
+        (screen.left, screen.top, screen.right, screen.bottom)
+
+
+def is_audio_playing(asound_root: str = "/proc/asound") -> bool:
+    """
+    是否有程序正在播放声音
+
+    Linux 读取 ALSA 播放设备状态；Windows 需要安装可选依赖 pycaw
+    """
+    if windll is not None:
+        try:
+            from pycaw.pycaw import AudioUtilities
+        except ImportError:
+            return False
+        # AudioSessionStateActive = 1
+        return any(session.State == 1 for session in AudioUtilities.GetAllSessions())
+
+    try:
+        cards = [name for name in os.listdir(asound_root) if name.startswith("card")]
+    except OSError:
+        return False
+    for card in cards:
+        card_dir = os.path.join(asound_root, card)
+        try:
+            pcms = [name for name in os.listdir(card_dir) if name.startswith("pcm") and name.endswith("p")]
+        except OSError:
+            continue
+        for pcm in pcms:
+            pcm_dir = os.path.join(card_dir, pcm)
+            for sub in os.listdir(pcm_dir):
+                if not sub.startswith("sub"):
+                    continue
+                try:
+                    with open(os.path.join(pcm_dir, sub, "status"), "r") as f:
+                        if "RUNNING" in f.readline():
+                            return True
+                except OSError:
+                    continue
+    return False
+
+
+class InhibitorSet:
+    """
+    按配置评估抑制条件
+
+    配置示例（config.json 中的 "inhibitors"）:
+        {"processes": ["zoom", "POWERPNT.EXE"], "fullscreen": true, "audio": true,
+         "cpu_percent": 85, "lead_seconds": 10}
+    """
+
+    def __init__(self, config: Dict[str, Any] = None):
+        self.scanner = ProcessScanner()
+        self.cpu = CpuSampler()
+        self._armed = False
+        self._last_reason = None
+        self._last_evaluated = 0.0
+        self.configure(config or {})
+
+    def configure(self, config: Dict[str, Any]):
+        """应用新配置"""
+        self.processes = list(config.get("processes", []))
+        self.fullscreen = bool(config.get("fullscreen", False))
+        self.audio = bool(config.get("audio", False))
+        self.cpu_percent = float(config.get("cpu_percent", 0))
+        # 距离触发多少秒时开始评估（同时作为CPU占用率的统计窗口）
+        self.lead_seconds = float(config.get("lead_seconds", 10))
+        # 已被抑制时的复查间隔
+        self.recheck_seconds = float(config.get("recheck_seconds", 5))
+
+    def enabled(self) -> bool:
+        return bool(self.processes or self.fullscreen or self.audio or self.cpu_percent > 0)
+
+    def arm(self):
+        """进入触发前窗口：开始CPU统计并预先扫描进程"""
+        if self._armed or not self.enabled():
+            return
+        self._armed = True
+        self._last_evaluated = 0.0
+        self.cpu.reset()
+        if self.processes:
+            self.scanner.refresh()
+
+    def disarm(self):
+        """离开触发前窗口（用户恢复操作）"""
+        self._armed = False
+        self._last_reason = None
+
+    def check(self) -> Optional[str]:
+        """
+        评估抑制条件（开销小的先查），结果在 recheck_seconds 内复用
+
+        Returns:
+            Optional[str]: 抑制原因，不抑制时返回None
+        """
+        if not self.enabled():
+            return None
+        now = time.monotonic()
+        if self._last_evaluated and now - self._last_evaluated < self.recheck_seconds:
+            return self._last_reason
+        self.arm()
+        self._last_evaluated = now
+
+        with metrics.timer("inhibitor.check_ms"):
+            reason = self._evaluate()
+        if reason and reason != self._last_reason:
+            metrics.increment("inhibitor.blocked")
+            print(f"🚫 屏保已被抑制: {reason}")
+        self._last_reason = reason
+        return reason
+
+    def _evaluate(self) -> Optional[str]:
+        if self.processes:
+            self.scanner.refresh()
+            name = self.scanner.find_running(self.processes)
+            if name:
+                return f"进程运行中 {name}"
+        if self.cpu_percent > 0:
+            usage = self.cpu.usage_percent()
+            if usage is not None and usage >= self.cpu_percent:
+                return f"CPU占用 {usage:.0f}%"
+        if self.fullscreen and is_foreground_fullscreen():
+            return "前台窗口全屏"
+        if self.audio and is_audio_playing():
+            return "正在播放声音"
+        return None
+
+
+if __name__ == "__main__":
+    # 测试进程扫描器：首次全量扫描和之后的增量刷新、查询耗时
+    scanner = ProcessScanner()
+    started = time.perf_counter()
+    scanner.refresh(force=True)
+    full_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    scanner.refresh(force=True)
+    incremental_ms = (time.perf_counter() - started) * 1000
+    print(f"进程数 {len(scanner)}，首次扫描 {full_ms:.2f} ms，增量刷新 {incremental_ms:.2f} ms")
+
+    me = normalize_process_name(os.path.basename(sys.executable))
+    assert scanner.find_running(["not-a-real-process", me]) == me, me
+    assert scanner.find_running(["not-a-real-process"]) is None
+    started = time.perf_counter()
+    for _ in range(10000):
+        scanner.find_running(["zoom", "teams", "powerpnt"])
+    print(f"单次进程查询 {(time.perf_counter() - started) / 10000 * 1e6:.2f} 微秒")
+
+    inhibitors = InhibitorSet({"processes": [me], "cpu_percent": 95, "audio": True})
+    print(f"抑制原因: {inhibitors.check()}")
+    print(f"正在播放声音: {is_audio_playing()}，前台全屏: {is_foreground_fullscreen()}")
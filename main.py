@@ -3,11 +3,34 @@
 
 import sys
 import os
-from PyQt5.QtWidgets import QApplication, QSystemTrayIcon, QMenu, QAction, QMessageBox, QWidget, QVBoxLayout, QLabel, QPushButton, QHBoxLayout, QComboBox, QSpinBox, QGroupBox
-from PyQt5.QtCore import QTimer, QThread, pyqtSignal
-from PyQt5.QtGui import QIcon, QPixmap, QPainter, QFont
-from screensaver import VideoScreensaver
+
+if __name__ == "__main__" and len(sys.argv) > 1:
+    # 守护模式：无托盘/控制面板，首次触发前不导入Qt
+    if sys.argv[1] == "--daemon":
+        from screensaver_daemon import main as daemon_main
+        sys.exit(daemon_main())
+    
+    # 播放器子进程入口（打包后由守护进程以 --player 启动）
+    if sys.argv[1] == "--player":
+        from player_process import main as player_main
+        sys.exit(player_main())
+    
+    # 控制子命令（如 `main.py status`）直接与运行中的实例通信，不导入Qt
+    if not sys.argv[1].startswith("-"):
+        from control_channel import run_cli
+        sys.exit(run_cli(sys.argv[1:]))
+
+import threading
+import time
+from PyQt5.QtWidgets import QApplication, QSystemTrayIcon, QMenu, QAction, QMessageBox, QWidget, QVBoxLayout, QLabel, QPushButton, QHBoxLayout, QComboBox, QSpinBox, QGroupBox, QListWidget, QListWidgetItem
+from PyQt5.QtCore import QObject, Qt, QTimer, QThread, QPoint, QSize, pyqtSignal
+from PyQt5.QtGui import QIcon, QPixmap, QPainter, QFont, QColor
+from screensaver import IDLE_KEYS, SCHEDULE_KEYS, VideoScreensaver
 from config_manager import ConfigManager
+from content_source import is_http_url
+from control_channel import ControlServer, InstanceLock, send_command
+from metrics import metrics
+from thumbnails import ThumbnailCache, ThumbnailLoader
 import json
 
 class ScreensaverThread(QThread):
@@ -30,17 +53,158 @@ class ScreensaverThread(QThread):
         if self.screensaver:
             self.screensaver.stop_monitoring()
 
+class GuiInvoker(QObject):
+    """把后台线程的调用转发到GUI线程执行"""
+    invoke_requested = pyqtSignal(object)
+    
+    def __init__(self):
+        super().__init__()
+        self.invoke_requested.connect(self._invoke)
+    
+    def _invoke(self, call):
+        call()
+    
+    def post(self, func):
+        """在GUI线程中异步执行func，不等待结果"""
+        self.invoke_requested.emit(func)
+    
+    def call(self, func, *args, timeout=5.0):
+        """在GUI线程中执行func并等待返回值"""
+        done = threading.Event()
+        result = {}
+        
+        def call():
+            try:
+                result["value"] = func(*args)
+            except Exception as e:
+                result["error"] = e
+            finally:
+                done.set()
+        
+        self.invoke_requested.emit(call)
+        if not done.wait(timeout):
+            raise TimeoutError("界面线程繁忙，命令已排队执行")
+        if "error" in result:
+            raise result["error"]
+        return result.get("value")
+
+class ContentGallery(QListWidget):
+    """内容选择列表：视频和图片的缩略图，滚动到可见区域时才加载"""
+    thumbnail_ready = pyqtSignal(str, str)
+    
+    PATH_ROLE = Qt.UserRole
+    KIND_ROLE = Qt.UserRole + 1
+    LOADED_ROLE = Qt.UserRole + 2
+    
+    def __init__(self, cache, parent=None):
+        super().__init__(parent)
+        width, height = cache.size
+        self.setViewMode(QListWidget.IconMode)
+        self.setIconSize(QSize(width, height))
+        self.setGridSize(QSize(width + 16, height + 28))
+        self.setResizeMode(QListWidget.Adjust)
+        self.setMovement(QListWidget.Static)
+        self.setUniformItemSizes(True)
+        self.setWordWrap(False)
+        
+        # 工作线程生成完成后通过信号回到界面线程
+        self.loader = ThumbnailLoader(cache, lambda path, thumbnail: self.thumbnail_ready.emit(path, thumbnail or ""))
+        self.thumbnail_ready.connect(self.set_thumbnail)
+        self._items = {}
+        self._placeholders = {kind: self._placeholder(width, height, text) for kind, text in (("video", "🎬"), ("image", "🖼️"))}
+        
+        # 滚动停下后再计算可见项
+        self._load_timer = QTimer(self)
+        self._load_timer.setSingleShot(True)
+        self._load_timer.setInterval(50)
+        self._load_timer.timeout.connect(self.load_visible)
+        self.verticalScrollBar().valueChanged.connect(lambda value: self._load_timer.start())
+    
+    @staticmethod
+    def _placeholder(width, height, text):
+        pixmap = QPixmap(width, height)
+        pixmap.fill(QColor("#E9ECEF"))
+        painter = QPainter(pixmap)
+        painter.setFont(QFont("Arial", 20))
+        painter.drawText(pixmap.rect(), Qt.AlignCenter, text)
+        painter.end()
+        return QIcon(pixmap)
+    
+    def set_candidates(self, candidates, current=None):
+        """填充列表（只创建占位项，不读取任何文件）"""
+        started = time.perf_counter()
+        self.setUpdatesEnabled(False)
+        self.clear()
+        self._items = {}
+        for path, kind in candidates:
+            item = QListWidgetItem(self._placeholders[kind], os.path.basename(path))
+            item.setData(self.PATH_ROLE, path)
+            item.setData(self.KIND_ROLE, kind)
+            item.setToolTip(path if kind == "video" else f"{path}\n（备用轮播图片）")
+            self.addItem(item)
+            self._items[path] = item
+            if current and os.path.abspath(path) == os.path.abspath(current):
+                self.setCurrentItem(item)
+        self.setUpdatesEnabled(True)
+        metrics.observe("gallery.populate_ms", (time.perf_counter() - started) * 1000.0)
+        self._load_timer.start()
+    
+    def load_visible(self):
+        """为可见区域（以及下方一屏）的项请求缩略图，取消已滚出范围的请求"""
+        viewport = self.viewport().rect()
+        area = viewport.adjusted(0, 0, 0, viewport.height())
+        first = self.indexAt(QPoint(self.gridSize().width() // 2, 1)).row()
+        wanted = []
+        for row in range(max(0, first), self.count()):
+            item = self.item(row)
+            rect = self.visualItemRect(item)
+            if rect.top() > area.bottom():
+                break
+            if rect.bottom() < area.top() or item.data(self.LOADED_ROLE):
+                continue
+            path = item.data(self.PATH_ROLE)
+            wanted.append(path)
+            thumbnail = self.loader.request(path)
+            if thumbnail:
+                self.set_thumbnail(path, thumbnail)
+        self.loader.cancel_except(wanted)
+    
+    def set_thumbnail(self, path, thumbnail):
+        """缩略图就绪（thumbnail 为空表示生成失败，保留占位图）"""
+        item = self._items.get(path)
+        if item is None:
+            return
+        item.setData(self.LOADED_ROLE, True)
+        if thumbnail:
+            item.setIcon(QIcon(QPixmap(thumbnail)))
+    
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._load_timer.start()
+    
+    def hideEvent(self, event):
+        self.loader.cancel_except(())
+        super().hideEvent(event)
+
 class StatusWindow(QWidget):
     """状态显示窗口"""
     def __init__(self, screensaver_app):
         super().__init__()
         self.screensaver_app = screensaver_app
-        self.config_manager = ConfigManager()
+        self.config_manager = screensaver_app.config_manager
         self.init_ui()
         
+        # 配置变化（托盘、命令行、远程下发）在界面线程同步到控件
+        invoker = screensaver_app.gui_invoker.post
+        self.config_manager.subscribe(IDLE_KEYS, lambda changes, config: self.load_current_settings(), invoker)
+        self.config_manager.subscribe(('quick_presets',), self.on_presets_changed, invoker)
+        self.config_manager.subscribe(('video_path', 'volume'), self.on_info_changed, invoker)
+        self.config_manager.subscribe(('video_path', 'fallback_videos', 'fallback_slideshow'),
+                                      lambda changes, config: self.refresh_gallery(), invoker)
+        
     def init_ui(self):
         self.setWindowTitle("视频屏保程序 - 控制面板")
-        self.setFixedSize(400, 350)
+        self.setFixedSize(400, 640)
         
         layout = QVBoxLayout()
         
@@ -65,10 +229,7 @@ class StatusWindow(QWidget):
         preset_layout.addWidget(QLabel("快速设置:"))
         
         self.preset_combo = QComboBox()
-        presets = self.config_manager.get_config().get('quick_presets', {})
-        self.preset_combo.addItem("自定义", None)
-        for name, setting in presets.items():
-            self.preset_combo.addItem(name, setting)
+        self.fill_presets(self.config_manager.get_config().get('quick_presets', {}))
         self.preset_combo.currentTextChanged.connect(self.on_preset_changed)
         preset_layout.addWidget(self.preset_combo)
         
@@ -118,14 +279,31 @@ class StatusWindow(QWidget):
         time_group.setLayout(time_layout)
         layout.addWidget(time_group)
         
+        # 今日统计
+        self.stats_label = QLabel()
+        self.stats_label.setStyleSheet("color: #666; margin: 5px; padding: 8px; background-color: #F1F3F4; border-radius: 5px; font-size: 12px;")
+        layout.addWidget(self.stats_label)
+        
         # 配置信息
+        self.info_label = QLabel()
+        self.info_label.setStyleSheet("color: #666; margin: 5px; padding: 8px; background-color: #F1F3F4; border-radius: 5px; font-size: 12px;")
+        self.on_info_changed({}, self.config_manager.get_config())
+        layout.addWidget(self.info_label)
+        
+        # 内容选择（窗口显示后才扫描文件夹，缩略图滚动到可见时才加载）
+        gallery_group = QGroupBox("🎞️ 内容选择（双击视频设为屏保内容）")
+        gallery_group.setStyleSheet("QGroupBox { font-weight: bold; margin: 5px; }")
+        gallery_layout = QVBoxLayout()
         config = self.config_manager.get_config()
-        info_text = f"""📁 视频文件: {config.get('video_path', 'video.mp4')}
-🔊 音量: {config.get('volume', 50)}%"""
-        
-        info_label = QLabel(info_text)
-        info_label.setStyleSheet("color: #666; margin: 5px; padding: 8px; background-color: #F1F3F4; border-radius: 5px; font-size: 12px;")
-        layout.addWidget(info_label)
+        self.gallery = ContentGallery(ThumbnailCache(config.get('thumbnail_cache_dir', 'thumbnail_cache'),
+                                                     config.get('thumbnail_cache_entries', 1000),
+                                                     ffmpeg_path=config.get('ffmpeg_path')))
+        self.gallery.setFixedHeight(220)
+        self.gallery.itemActivated.connect(self.on_content_picked)
+        gallery_layout.addWidget(self.gallery)
+        gallery_group.setLayout(gallery_layout)
+        layout.addWidget(gallery_group)
+        self._gallery_dirty = True
         
         # 按钮区域
         button_layout = QHBoxLayout()
@@ -178,6 +356,52 @@ class StatusWindow(QWidget):
         
         # 初始化当前设置
         self.load_current_settings()
+        
+        # 窗口显示期间定期刷新今日统计
+        self.stats_timer = QTimer(self)
+        self.stats_timer.timeout.connect(self.update_today_stats)
+        self.stats_timer.start(30000)
+        self.update_today_stats()
+    
+    def update_today_stats(self):
+        """显示今日屏保统计"""
+        screensaver = self.screensaver_app.screensaver
+        if not screensaver or not screensaver.history:
+            return
+        if not self.isVisible() and self.stats_label.text():
+            return  # 窗口隐藏时不刷新，显示时再更新
+        stats = screensaver.history.day_stats()
+        text = f"📊 今日: 启动 {stats['activations']} 次，共 {stats['total_minutes']:g} 分钟"
+        if stats['activations']:
+            text += f"，平均 {stats['avg_seconds']:g} 秒后唤醒"
+            if stats['quick_dismissals']:
+                text += f"，{stats['quick_dismissals']} 次在10秒内唤醒"
+        self.stats_label.setText(text)
+    
+    def showEvent(self, event):
+        self.update_today_stats()
+        if self._gallery_dirty:
+            # 先显示窗口，下一轮事件循环再填充列表
+            QTimer.singleShot(0, self.refresh_gallery)
+        super().showEvent(event)
+    
+    def refresh_gallery(self):
+        """重新列出可选内容；窗口隐藏时只做标记，显示时再刷新"""
+        screensaver = self.screensaver_app.screensaver
+        if not self.isVisible() or not screensaver:
+            self._gallery_dirty = True
+            return
+        self._gallery_dirty = False
+        config = self.config_manager.get_config()
+        self.gallery.set_candidates(screensaver.content_candidates(config), config.get('video_path'))
+    
+    def on_content_picked(self, item):
+        """双击列表项：视频设为屏保内容，图片只用于备用轮播"""
+        path = item.data(ContentGallery.PATH_ROLE)
+        if item.data(ContentGallery.KIND_ROLE) != "video":
+            QMessageBox.information(self, "内容选择", "图片用于备用轮播，请在 fallback_slideshow 中配置所在文件夹")
+            return
+        self.config_manager.update({'video_path': path})
     
     def load_current_settings(self):
         """加载当前设置"""
@@ -189,6 +413,24 @@ class StatusWindow(QWidget):
         self.seconds_spin.setValue(seconds)
         self.update_time_display()
     
+    def fill_presets(self, presets):
+        """填充快速预设下拉框"""
+        self.preset_combo.blockSignals(True)
+        self.preset_combo.clear()
+        self.preset_combo.addItem("自定义", None)
+        for name, setting in presets.items():
+            self.preset_combo.addItem(name, setting)
+        self.preset_combo.blockSignals(False)
+    
+    def on_presets_changed(self, changes, config):
+        """快速预设变化"""
+        self.fill_presets(config.get('quick_presets', {}))
+    
+    def on_info_changed(self, changes, config):
+        """视频文件或音量变化"""
+        self.info_label.setText(f"""📁 视频文件: {config.get('video_path', 'video.mp4')}
+🔊 音量: {config.get('volume', 50)}%""")
+    
     def on_preset_changed(self, preset_name):
         """预设改变时的处理"""
         if preset_name == "自定义":
@@ -232,16 +474,8 @@ class StatusWindow(QWidget):
             QMessageBox.warning(self, "时间设置", "空闲时间不能少于5秒！")
             return
         
-        # 更新配置
-        config = self.config_manager.get_config()
-        config['idle_time_minutes'] = minutes
-        config['idle_time_seconds'] = seconds
-        self.config_manager.save_config(config)
-        
-        # 重新启动监控
-        if self.screensaver_app.monitoring_active:
-            self.screensaver_app.stop_monitoring()
-            self.screensaver_app.start_monitoring()
+        # 更新配置，监控线程订阅了触发时间，立即使用新值
+        self.config_manager.update({'idle_time_minutes': minutes, 'idle_time_seconds': seconds})
         
         QMessageBox.information(self, "设置应用", f"空闲时间已设置为 {minutes}分{seconds}秒")
     
@@ -270,12 +504,17 @@ class StatusWindow(QWidget):
 class ScreensaverApp:
     """带托盘图标的屏保应用"""
     
-    def __init__(self):
+    def __init__(self, instance_lock=None):
         self.app = QApplication(sys.argv)
         self.screensaver = None
         self.screensaver_thread = None
         self.monitoring_active = False
         self.status_window = None
+        self.instance_lock = instance_lock
+        self.control_server = None
+        self.gui_invoker = GuiInvoker()
+        # 全程共用一个配置管理器，各组件订阅自己关注的配置项
+        self.config_manager = ConfigManager()
         
         # 检查系统托盘支持
         if not QSystemTrayIcon.isSystemTrayAvailable():
@@ -284,6 +523,7 @@ class ScreensaverApp:
         
         self.create_tray_icon()
         self.init_screensaver()
+        self.start_control_server()
         
     def create_icon(self):
         """创建程序图标"""
@@ -339,6 +579,18 @@ class ScreensaverApp:
         test_action.triggered.connect(self.test_screensaver)
         tray_menu.addAction(test_action)
         
+        # 诊断工具（隐藏菜单，按住 Shift 打开托盘菜单时显示）
+        profile_menu = QMenu("🔬 诊断", None)
+        for name, args in [("CPU 采样 30 秒", ["cpu", "30"]), ("内存快照", ["memory"]),
+                           ("停止内存跟踪", ["memory", "stop"]), ("对象统计", ["objects"])]:
+            action = QAction(name, None)
+            action.triggered.connect(lambda checked, a=args: self.run_profile_from_tray(a))
+            profile_menu.addAction(action)
+        self.profile_menu_action = tray_menu.addMenu(profile_menu)
+        self.profile_menu_action.setVisible(False)
+        tray_menu.aboutToShow.connect(lambda: self.profile_menu_action.setVisible(
+            bool(QApplication.keyboardModifiers() & Qt.ShiftModifier)))
+        
         tray_menu.addSeparator()
         
         # 退出程序
@@ -359,17 +611,8 @@ class ScreensaverApp:
         )
     
     def quick_set_time(self, minutes, seconds):
-        """快速设置时间"""
-        config_manager = ConfigManager()
-        config = config_manager.get_config()
-        config['idle_time_minutes'] = minutes
-        config['idle_time_seconds'] = seconds
-        config_manager.save_config(config)
-        
-        # 重新启动监控
-        if self.monitoring_active:
-            self.stop_monitoring()
-            self.start_monitoring()
+        """快速设置时间（监控线程原地生效，无需重启）"""
+        self.config_manager.update({'idle_time_minutes': minutes, 'idle_time_seconds': seconds})
         
         total_seconds = minutes * 60 + seconds
         self.tray_icon.showMessage(
@@ -379,6 +622,26 @@ class ScreensaverApp:
             2000
         )
     
+    def profile_command(self, args):
+        """处理 profile 命令（按需加载诊断模块，未使用时没有开销）"""
+        from profiling import get_profiler
+        return get_profiler(self.config_manager.config_file).command(args)
+    
+    def run_profile_from_tray(self, args):
+        """从托盘菜单运行诊断，结果以通知显示"""
+        try:
+            message = self.profile_command(args)
+            icon = QSystemTrayIcon.Information
+        except Exception as e:
+            message = str(e)
+            icon = QSystemTrayIcon.Warning
+        self.tray_icon.showMessage("诊断", message, icon, 5000)
+    
+    def update_tooltip(self):
+        """托盘提示显示当前生效的触发时间"""
+        if self.screensaver:
+            self.tray_icon.setToolTip(f"视频屏保程序 - 空闲 {self.screensaver.idle_threshold} 秒后触发")
+    
     def tray_icon_activated(self, reason):
         """托盘图标点击事件"""
         if reason == QSystemTrayIcon.DoubleClick:
@@ -396,11 +659,11 @@ class ScreensaverApp:
     def init_screensaver(self):
         """初始化屏保"""
         try:
-            config_manager = ConfigManager()
+            config_manager = self.config_manager
             
             # 检查视频文件
             video_path = config_manager.get_config().get('video_path', 'video.mp4')
-            if not os.path.exists(video_path):
+            if not is_http_url(video_path) and not os.path.exists(video_path):
                 self.tray_icon.showMessage(
                     "提醒",
                     f"未找到视频文件: {video_path}\n请将视频文件重命名为 video.mp4",
@@ -408,13 +671,69 @@ class ScreensaverApp:
                     5000
                 )
             
-            self.screensaver = VideoScreensaver(config_manager)
+            # 监控线程达到阈值后，在GUI线程中创建播放器
+            self.screensaver = VideoScreensaver(
+                config_manager,
+                activation_callback=lambda: self.gui_invoker.post(self.screensaver.show_screensaver),
+                stage_callback=lambda stage: self.gui_invoker.post(lambda: self.screensaver.apply_idle_stage(stage))
+            )
+            config_manager.subscribe(IDLE_KEYS + SCHEDULE_KEYS, lambda changes, config: self.update_tooltip(),
+                                     self.gui_invoker.post)
+            self.update_tooltip()
             self.start_monitoring()
             
         except Exception as e:
             QMessageBox.critical(None, "初始化失败", f"程序初始化失败: {str(e)}")
             sys.exit(1)
     
+    def start_control_server(self):
+        """启动本地控制通道，供命令行客户端控制"""
+        gui = self.gui_invoker.call
+        
+        handlers = {
+            "trigger": lambda args: gui(self.test_screensaver) or "屏保已启动",
+            "stop": lambda args: gui(self.screensaver.hide_screensaver) or "屏保已关闭",
+            "pause": lambda args: gui(self.stop_monitoring) or "监控已暂停",
+            "resume": lambda args: gui(self.start_monitoring) or "监控已恢复",
+            "set-threshold": lambda args: gui(self.set_threshold_command, args),
+            "status": lambda args: self.get_status(),
+            "metrics": lambda args: metrics.snapshot(),
+            "profile": self.profile_command,
+            "show": lambda args: gui(self.show_status_window) or "控制面板已显示",
+        }
+        
+        try:
+            self.control_server = ControlServer(handlers).start()
+        except Exception as e:
+            print(f"控制通道启动失败: {e}")
+    
+    def set_threshold_command(self, args):
+        """处理 set-threshold 命令"""
+        if len(args) != 1 or not args[0].isdigit():
+            raise ValueError("用法: set-threshold <秒>")
+        total_seconds = int(args[0])
+        if total_seconds < 5:
+            raise ValueError("空闲时间不能少于5秒")
+        self.quick_set_time(total_seconds // 60, total_seconds % 60)
+        return f"空闲触发时间已设置为 {total_seconds} 秒"
+    
+    def get_status(self):
+        """获取运行状态"""
+        config = self.screensaver.config_manager.get_config() if self.screensaver else {}
+        player = self.screensaver.video_player if self.screensaver else None
+        return {
+            "pid": os.getpid(),
+            "monitoring": self.monitoring_active,
+            "idle_threshold": self.screensaver.idle_threshold if self.screensaver else None,
+            "active_rule": self.screensaver.active_rule.name if self.screensaver and self.screensaver.active_rule else None,
+            "idle_time": round(self.screensaver.system_monitor.get_idle_time(), 1) if self.screensaver else None,
+            "screensaver_visible": bool(player and player.isVisible()),
+            "idle_stage": self.screensaver.idle_stage if self.screensaver else None,
+            "video_path": config.get('video_path', 'video.mp4'),
+            "today": self.screensaver.history.day_stats() if self.screensaver and self.screensaver.history else None,
+            "prewarm": self.screensaver.prewarm.report(self.screensaver.idle_threshold) if self.screensaver else None,
+        }
+    
     def start_monitoring(self):
         """开始监控"""
         if not self.monitoring_active and self.screensaver:
@@ -423,8 +742,7 @@ class ScreensaverApp:
             self.monitoring_active = True
             self.toggle_action.setText("⏸️ 暂停监控")
             
-            config = ConfigManager().get_config()
-            total_seconds = config.get('idle_time_minutes', 5) * 60 + config.get('idle_time_seconds', 0)
+            total_seconds = self.screensaver.idle_threshold
             
             self.tray_icon.showMessage(
                 "监控开始",
@@ -471,8 +789,13 @@ class ScreensaverApp:
     def quit_application(self):
         """退出应用程序"""
         self.stop_monitoring()
+        if self.control_server:
+            self.control_server.stop()
+        if self.instance_lock:
+            self.instance_lock.release()
         if self.status_window:
             self.status_window.close()
+            self.status_window.gallery.loader.shutdown()
         self.tray_icon.hide()
         self.app.quit()
     
@@ -481,8 +804,18 @@ class ScreensaverApp:
         return self.app.exec_()
 
 def main():
+    # 单实例：已有实例运行时打开它的控制面板后退出
+    instance_lock = InstanceLock()
+    if not instance_lock.acquire():
+        try:
+            send_command("show")
+        except Exception:
+            pass
+        print("屏保程序已在运行")
+        sys.exit(0)
+    
     try:
-        app = ScreensaverApp()
+        app = ScreensaverApp(instance_lock)
         sys.exit(app.run())
     except Exception as e:
         print(f"程序启动失败: {str(e)}")
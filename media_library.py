@@ -0,0 +1,31 @@
+"""
+媒体文件工具模块
+识别内容文件夹中的视频和图片文件
+"""
+
+import os
+from typing import Iterable, List
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mkv", ".mov", ".wmv", ".m4v", ".webm")
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".gif", ".webp")
+
+
+def list_media_files(folder: str, extensions: Iterable[str] = VIDEO_EXTENSIONS) -> List[str]:
+    """
+    列出文件夹中的媒体文件（不递归，按文件名排序）
+
+    Args:
+        folder (str): 文件夹路径
+        extensions (Iterable[str]): 允许的扩展名（小写，带点）
+
+    Returns:
+        List[str]: 文件路径列表，文件夹不存在时返回空列表
+    """
+    extensions = tuple(extensions)
+    try:
+        with os.scandir(folder) as entries:
+            files = [entry.path for entry in entries
+                     if entry.is_file() and entry.name.lower().endswith(extensions)]
+    except OSError:
+        return []
+    return sorted(files, key=lambda path: os.path.basename(path).lower())
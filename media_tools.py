@@ -0,0 +1,524 @@
+"""
+媒体处理工具模块
+视频内容指纹、封面帧（poster）提取与缓存、无音轨版本、关键帧索引
+
+封面帧按视频内容哈希和屏幕分辨率缓存，屏保启动时先显示封面帧，
+解码出第一帧后再切换到视频，避免全屏黑屏等待；
+静音播放时使用去掉音轨的版本，播放器不再解码和混音音频
+"""
+
+import bisect
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import threading
+from typing import Callable, Iterable, List, Optional, Tuple
+
+try:
+    from ctypes import windll
+except ImportError:
+    windll = None
+
+# 计算内容哈希时读取的样本大小（文件开头、中间、结尾各一块）
+HASH_SAMPLE_BYTES = 1024 * 1024
+
+
+def find_ffmpeg(configured: str = None) -> Optional[str]:
+    """查找 ffmpeg 可执行文件（配置的路径优先）"""
+    if configured and os.path.exists(configured):
+        return configured
+    return shutil.which("ffmpeg")
+
+
+def find_ffprobe(ffmpeg_path: str = None) -> Optional[str]:
+    """查找 ffprobe（优先与配置的 ffmpeg 位于同一目录）"""
+    if ffmpeg_path and os.path.exists(ffmpeg_path):
+        directory, name = os.path.split(ffmpeg_path)
+        candidate = os.path.join(directory, name.replace("ffmpeg", "ffprobe"))
+        if candidate != ffmpeg_path and os.path.exists(candidate):
+            return candidate
+    return shutil.which("ffprobe")
+
+
+def get_screen_size() -> Tuple[int, int]:
+    """主屏幕分辨率（不加载Qt；非Windows平台返回 1920x1080）"""
+    if windll is not None:
+        try:
+            return windll.user32.GetSystemMetrics(0), windll.user32.GetSystemMetrics(1)
+        except Exception:
+            pass
+    return 1920, 1080
+
+
+def compute_content_hash(path: str) -> str:
+    """
+    视频内容哈希：文件大小 + 开头/中间/结尾各1MB 的 SHA-256
+
+    同一视频复制或改名后哈希不变；完整读取大视频代价太高，采样足以区分不同内容
+    """
+    size = os.path.getsize(path)
+    digest = hashlib.sha256(str(size).encode())
+    with open(path, "rb") as f:
+        for offset in sorted({0, max(0, size // 2 - HASH_SAMPLE_BYTES // 2), max(0, size - HASH_SAMPLE_BYTES)}):
+            f.seek(offset)
+            digest.update(f.read(HASH_SAMPLE_BYTES))
+    return digest.hexdigest()[:32]
+
+
+class ContentCache:
+    """按视频内容哈希缓存派生文件的基类"""
+
+    def __init__(self, cache_dir: str, ffmpeg_path: str = None):
+        self.cache_dir = cache_dir
+        self.ffmpeg_path = ffmpeg_path
+        self.index_path = os.path.join(cache_dir, "index.json")
+        # 只保护内存中的索引和排队集合，持有期间不做磁盘读写和哈希计算（界面线程会查询）
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._pending = set()
+        # 绝对路径 -> [大小, 修改时间(ns), 内容哈希]；第一次使用时从 index.json 加载
+        self._index: Optional[dict] = None
+
+    # ---------- 内容哈希（按 路径+大小+修改时间 缓存，避免每次启动都读取视频） ----------
+
+    def _entries(self) -> dict:
+        """内存中的索引（只在第一次使用时读取文件）"""
+        if self._index is None:
+            try:
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+            # 旧格式（"路径|大小|修改时间" 为键）的记录不再使用，重新计算一次
+            entries = {path: entry for path, entry in data.items() if isinstance(entry, list) and len(entry) == 3}
+            with self._lock:
+                if self._index is None:
+                    self._index = entries
+        return self._index
+
+    def known_hash(self, video_path: str) -> Optional[str]:
+        """
+        已记录的内容哈希（一次 stat，不读取视频，可在界面线程调用）
+
+        Returns:
+            Optional[str]: 内容哈希；文件不存在、尚未计算或文件已变化时返回None
+        """
+        try:
+            stat = os.stat(video_path)
+        except OSError:
+            return None
+        entries = self._entries()
+        with self._lock:
+            entry = entries.get(os.path.abspath(video_path))
+        if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            return entry[2]
+        return None
+
+    def content_hash(self, video_path: str) -> Optional[str]:
+        """获取视频的内容哈希（未记录时读取采样计算，耗时，不应在界面线程调用），文件不存在时返回None"""
+        known = self.known_hash(video_path)
+        if known:
+            return known
+        try:
+            stat = os.stat(video_path)
+            content_hash = compute_content_hash(video_path)
+        except OSError:
+            return None
+        path = os.path.abspath(video_path)
+        with self._lock:
+            # 同一路径只保留当前文件的记录，文件修改后旧记录被替换
+            self._entries()[path] = [stat.st_size, stat.st_mtime_ns, content_hash]
+        self._save_index()
+        return content_hash
+
+    def hash_async(self, video_paths: Iterable[str]):
+        """在后台线程计算内容哈希"""
+        self._run_async([(os.path.abspath(path),) for path in video_paths], self.content_hash)
+
+    def _save_index(self):
+        """写入索引文件，去掉已删除的视频的记录（在锁外写入）"""
+        with self._write_lock:
+            with self._lock:
+                snapshot = dict(self._entries())
+            removed = [path for path in snapshot if not os.path.exists(path)]
+            if removed:
+                with self._lock:
+                    for path in removed:
+                        self._index.pop(path, None)
+                        snapshot.pop(path, None)
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                temp_path = self.index_path + ".tmp"
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump(snapshot, f, ensure_ascii=False)
+                os.replace(temp_path, self.index_path)
+            except OSError as e:
+                print(f"保存内容哈希索引失败: {e}")
+
+    def _run_ffmpeg(self, arguments: list, target: str, temp_path: str, timeout: float) -> bool:
+        """运行 ffmpeg 生成文件，成功后原子替换到目标路径"""
+        ffmpeg = find_ffmpeg(self.ffmpeg_path)
+        if not ffmpeg:
+            return False
+        os.makedirs(self.cache_dir, exist_ok=True)
+        try:
+            subprocess.run([ffmpeg, "-v", "error", "-y"] + arguments + [temp_path],
+                           capture_output=True, timeout=timeout, check=True)
+            os.replace(temp_path, target)
+            return True
+        except (OSError, subprocess.SubprocessError) as e:
+            print(f"ffmpeg 处理失败: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return False
+
+    def _run_async(self, keys: list, func: Callable):
+        """在后台线程依次处理（同一任务不会重复排队）"""
+        with self._lock:
+            keys = [key for key in dict.fromkeys(keys) if key not in self._pending]
+            self._pending.update(keys)
+        if not keys:
+            return
+
+        def run():
+            for key in keys:
+                try:
+                    func(*key)
+                finally:
+                    with self._lock:
+                        self._pending.discard(key)
+
+        threading.Thread(target=run, daemon=True).start()
+
+
+class PosterCache(ContentCache):
+    """封面帧缓存"""
+
+    def __init__(self, cache_dir: str = "poster_cache", ffmpeg_path: str = None):
+        super().__init__(cache_dir, ffmpeg_path)
+
+    def poster_path(self, content_hash: str, width: int, height: int) -> str:
+        return os.path.join(self.cache_dir, f"{content_hash}_{width}x{height}.jpg")
+
+    def lookup(self, video_path: str, width: int, height: int) -> Optional[str]:
+        """
+        查找已缓存的封面帧；没有目标分辨率的版本时返回其他分辨率的版本（显示时缩放）
+
+        在界面线程的启动路径上调用，不读取视频：内容哈希尚未计算（新视频或视频已修改）时
+        返回None 并在后台计算，下次即可命中
+
+        Returns:
+            Optional[str]: 封面帧图片路径，未缓存时返回None
+        """
+        content_hash = self.known_hash(video_path)
+        if not content_hash:
+            if os.path.exists(video_path):
+                self.hash_async([video_path])
+            return None
+        exact = self.poster_path(content_hash, width, height)
+        if os.path.exists(exact):
+            return exact
+        try:
+            for name in os.listdir(self.cache_dir):
+                if name.startswith(content_hash + "_") and name.endswith(".jpg"):
+                    return os.path.join(self.cache_dir, name)
+        except OSError:
+            pass
+        return None
+
+    def generate(self, video_path: str, width: int, height: int) -> Optional[str]:
+        """
+        用 ffmpeg 提取第一帧，按屏保的显示方式（保持比例铺满后居中裁剪）缩放到屏幕分辨率
+
+        Returns:
+            Optional[str]: 封面帧路径；没有 ffmpeg 或提取失败时返回None
+        """
+        content_hash = self.content_hash(video_path)
+        if not content_hash:
+            return None
+        target = self.poster_path(content_hash, width, height)
+        if os.path.exists(target):
+            return target
+        arguments = [
+            "-i", video_path, "-frames:v", "1",
+            "-vf", f"scale={width}:{height}:force_original_aspect_ratio=increase,crop={width}:{height}",
+            "-q:v", "3",
+        ]
+        if not self._run_ffmpeg(arguments, target, target + ".part.jpg", timeout=60):
+            return None
+        print(f"🖼️ 已生成封面帧: {os.path.basename(video_path)} ({width}x{height})")
+        return target
+
+    def generate_async(self, video_paths: Iterable[str], width: int = None, height: int = None):
+        """在后台线程依次生成封面帧"""
+        if width is None or height is None:
+            width, height = get_screen_size()
+        self._run_async([(os.path.abspath(path), width, height) for path in video_paths], self.generate)
+
+    def store_image(self, video_path: str, image) -> Optional[str]:
+        """
+        保存播放器截取的画面作为封面帧（没有 ffmpeg 时的后备方式；计算哈希和编码耗时，不应在界面线程调用）
+
+        Args:
+            image (QImage): 截取的画面；视频以覆盖层渲染时截图可能是全黑，这时不保存
+        """
+        if image.isNull():
+            return None
+        points = [(image.width() * x // 4, image.height() * y // 4) for x in (1, 2, 3) for y in (1, 2, 3)]
+        if all(image.pixel(x, y) & 0xFFFFFF == 0 for x, y in points):
+            return None
+        content_hash = self.content_hash(video_path)
+        if not content_hash:
+            return None
+        target = self.poster_path(content_hash, image.width(), image.height())
+        os.makedirs(self.cache_dir, exist_ok=True)
+        return target if image.save(target, "JPG", 85) else None
+
+    def storing(self, video_path: str) -> bool:
+        """该视频截取的画面是否正在后台保存"""
+        with self._lock:
+            return ("store", os.path.abspath(video_path)) in self._pending
+
+    def store_image_async(self, video_path: str, image) -> bool:
+        """
+        在后台线程保存截取的画面（检查、计算哈希、编码和写入都不在调用线程）
+
+        Returns:
+            bool: 是否已排队；同一视频的画面正在保存时不再排队
+        """
+        key = ("store", os.path.abspath(video_path))
+        with self._lock:
+            if key in self._pending:
+                return False
+            self._pending.add(key)
+
+        def run():
+            try:
+                self.store_image(video_path, image)
+            finally:
+                with self._lock:
+                    self._pending.discard(key)
+
+        threading.Thread(target=run, daemon=True).start()
+        return True
+
+
+class SilentRenditionCache(ContentCache):
+    """
+    无音轨版本缓存
+
+    只复制视频流（-an -c:v copy），不重新编码，生成速度接近文件复制
+    """
+
+    def __init__(self, cache_dir: str = "silent_cache", ffmpeg_path: str = None):
+        super().__init__(cache_dir, ffmpeg_path)
+
+    def rendition_path(self, content_hash: str, video_path: str) -> str:
+        return os.path.join(self.cache_dir, content_hash + os.path.splitext(video_path)[1].lower())
+
+    def lookup(self, video_path: str) -> Optional[str]:
+        """已生成的无音轨版本，未生成（或内容哈希尚未计算）时返回None，不读取视频"""
+        content_hash = self.known_hash(video_path)
+        if not content_hash:
+            return None
+        path = self.rendition_path(content_hash, video_path)
+        return path if os.path.exists(path) else None
+
+    def generate(self, video_path: str) -> Optional[str]:
+        """生成无音轨版本，没有 ffmpeg 或失败时返回None"""
+        content_hash = self.content_hash(video_path)
+        if not content_hash:
+            return None
+        target = self.rendition_path(content_hash, video_path)
+        if os.path.exists(target):
+            return target
+        extension = os.path.splitext(target)[1]
+        if not self._run_ffmpeg(["-i", video_path, "-map", "0:v", "-an", "-c:v", "copy"],
+                                target, target + ".part" + extension, timeout=600):
+            return None
+        print(f"🔇 已生成无音轨版本: {os.path.basename(video_path)}")
+        return target
+
+    def generate_async(self, video_paths: Iterable[str]):
+        """在后台线程依次生成无音轨版本"""
+        self._run_async([(os.path.abspath(path),) for path in video_paths], self.generate)
+
+
+class KeyframeIndex(ContentCache):
+    """
+    关键帧索引：视频流中关键帧的时间（毫秒，相对视频流的起始时间，与播放位置一致）
+
+    续播或随机起点直接跳到关键帧，解码器不需要先解码再丢弃前面的帧。
+    用 ffprobe 只读取数据包标志（不解码），按内容哈希缓存为JSON；
+    查询只使用内存中的索引，索引文件由后台线程（generate）读取
+    """
+
+    def __init__(self, cache_dir: str = "keyframe_cache", ffmpeg_path: str = None):
+        super().__init__(cache_dir, ffmpeg_path)
+        # 内容哈希 -> 关键帧列表，由 self._lock 保护（界面线程查询，后台线程写入）
+        self._loaded = {}
+
+    def index_file(self, content_hash: str) -> str:
+        return os.path.join(self.cache_dir, content_hash + ".keyframes.json")
+
+    def lookup(self, video_path: str) -> Optional[List[int]]:
+        """
+        已加载的关键帧时间列表（升序，毫秒），不读取磁盘，可在界面线程调用
+
+        Returns:
+            Optional[List[int]]: 关键帧列表；尚未生成或尚未由 generate / generate_async 加载时返回None
+        """
+        content_hash = self.known_hash(video_path)
+        if not content_hash:
+            return None
+        with self._lock:
+            return self._loaded.get(content_hash)
+
+    def _load(self, content_hash: str) -> Optional[List[int]]:
+        """读取索引文件到内存（旧格式的原始时间戳不再使用，重新生成）"""
+        try:
+            with open(self.index_file(content_hash), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        keyframes = data.get("keyframes") if isinstance(data, dict) else None
+        if not isinstance(keyframes, list):
+            return None
+        with self._lock:
+            self._loaded[content_hash] = keyframes
+        return keyframes
+
+    def generate(self, video_path: str) -> Optional[List[int]]:
+        """加载或用 ffprobe 生成关键帧索引（读取磁盘，不应在界面线程调用），没有 ffprobe 或失败时返回None"""
+        content_hash = self.content_hash(video_path)
+        if not content_hash:
+            return None
+        with self._lock:
+            existing = self._loaded.get(content_hash)
+        if existing is None:
+            existing = self._load(content_hash)
+        if existing is not None:
+            return existing
+        ffprobe = find_ffprobe(self.ffmpeg_path)
+        if not ffprobe:
+            return None
+        base = [ffprobe, "-v", "error", "-select_streams", "v:0", "-of", "csv=p=0"]
+        try:
+            start = subprocess.run(base + ["-show_entries", "stream=start_time", video_path],
+                                   capture_output=True, text=True, timeout=60, check=True)
+            result = subprocess.run(base + ["-show_entries", "packet=pts_time,flags", video_path],
+                                    capture_output=True, text=True, timeout=300, check=True)
+        except (OSError, subprocess.SubprocessError) as e:
+            print(f"生成关键帧索引失败: {e}")
+            return None
+        keyframes = parse_keyframes(result.stdout, start.stdout.strip())
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_path = self.index_file(content_hash) + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"keyframes": keyframes}, f)
+        os.replace(temp_path, self.index_file(content_hash))
+        with self._lock:
+            self._loaded[content_hash] = keyframes
+        print(f"🔑 已生成关键帧索引: {os.path.basename(video_path)}（{len(keyframes)} 个关键帧）")
+        return keyframes
+
+    def generate_async(self, video_paths: Iterable[str]):
+        """在后台线程依次加载或生成关键帧索引"""
+        self._run_async([(os.path.abspath(path),) for path in video_paths], self.generate)
+
+
+def parse_keyframes(packets: str, start_time: str = "") -> List[int]:
+    """
+    解析 ffprobe 输出的数据包（pts_time,flags），得到相对视频流起始时间的关键帧时间（毫秒，升序）
+
+    Args:
+        packets (str): ffprobe -show_entries packet=pts_time,flags -of csv=p=0 的输出
+        start_time (str): 视频流的 start_time（秒），N/A 或为空时按 0 处理
+    """
+    try:
+        offset = float(start_time)
+    except ValueError:
+        offset = 0.0
+    keyframes = set()
+    for line in packets.splitlines():
+        pts, _, flags = line.partition(",")
+        if "K" in flags and pts not in ("", "N/A"):
+            keyframes.add(max(0, int(round((float(pts) - offset) * 1000))))
+    return sorted(keyframes)
+
+
+def keyframe_at_or_before(keyframes: List[int], position_ms: int) -> int:
+    """不晚于指定位置的最近关键帧（毫秒）"""
+    index = bisect.bisect_right(keyframes, position_ms) - 1
+    return keyframes[index] if index >= 0 else 0
+
+
+if __name__ == "__main__":
+    # 测试内容哈希与索引缓存
+    import tempfile
+    import time
+
+    work_dir = tempfile.mkdtemp(prefix="poster_cache_")
+    video = os.path.join(work_dir, "sample.mp4")
+    with open(video, "wb") as f:
+        f.write(os.urandom(8 * 1024 * 1024))
+    cache = PosterCache(os.path.join(work_dir, "cache"))
+
+    started = time.perf_counter()
+    first = cache.content_hash(video)
+    cold_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    assert cache.content_hash(video) == first
+    warm_ms = (time.perf_counter() - started) * 1000
+    print(f"内容哈希 {first}：首次 {cold_ms:.2f} ms，命中索引 {warm_ms:.2f} ms")
+    assert PosterCache(cache.cache_dir).known_hash(video) == first, "重启后应从索引文件恢复"
+
+    # 视频修改后旧记录失效，封面帧查询不阻塞、在后台计算新哈希
+    with open(video, "ab") as f:
+        f.write(b"changed")
+    os.utime(video, ns=(time.time_ns(), time.time_ns() + 10 ** 9))
+    assert cache.known_hash(video) is None and cache.lookup(video, 1920, 1080) is None
+    for _ in range(200):
+        if cache.known_hash(video):
+            break
+        time.sleep(0.01)
+    assert cache.known_hash(video) not in (None, first), "应在后台重新计算哈希"
+    deleted = os.path.join(work_dir, "deleted.mp4")
+    with open(deleted, "wb") as f:
+        f.write(b"x")
+    cache.content_hash(deleted)
+    os.remove(deleted)
+    cache.content_hash(video + ".missing")
+    cache._save_index()
+    with open(cache.index_path, "r", encoding="utf-8") as f:
+        assert list(json.load(f)) == [os.path.abspath(video)], "已删除视频的记录应被清理"
+
+    # 截取的画面在后台保存，保存中的视频不再重复排队
+    class _Image:
+        def isNull(self): return False
+        def width(self): return 64
+        def height(self): return 36
+        def pixel(self, x, y): return 0xFF808080
+        def save(self, target, fmt, quality):
+            time.sleep(0.2)
+            open(target, "wb").close()
+            return True
+    assert cache.store_image_async(video, _Image()) and cache.storing(video)
+    assert not cache.store_image_async(video, _Image()), "保存中不应重复排队"
+    for _ in range(100):
+        if not cache.storing(video):
+            break
+        time.sleep(0.01)
+    assert cache.lookup(video, 64, 36), "后台保存的封面帧应可查到"
+    # 关键帧时间相对视频流起始时间；索引只在后台加载，查询不读取磁盘
+    assert parse_keyframes("1.400000,K_\n1.433000,__\n3.400000,K_\n", "1.400000") == [0, 2000]
+    assert parse_keyframes("0.5,K_\nN/A,K_\n", "N/A") == [500]
+    keyframe_index = KeyframeIndex(os.path.join(work_dir, "keyframes"))
+    with open(keyframe_index.index_file(keyframe_index.content_hash(video)), "w", encoding="utf-8") as f:
+        json.dump({"keyframes": [0, 2000]}, f)
+    assert keyframe_index.lookup(video) is None, "查询不应读取索引文件"
+    assert keyframe_index.generate(video) == [0, 2000] and keyframe_index.lookup(video) == [0, 2000]
+    print(f"ffmpeg: {find_ffmpeg() or '未安装'}，封面帧: {cache.generate(video, 1920, 1080)}")
+    shutil.rmtree(work_dir, ignore_errors=True)
@@ -0,0 +1,120 @@
+"""
+运行指标模块
+进程内的计数器、状态值和耗时统计，供控制接口和基准测试读取
+"""
+
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict
+
+
+class Metrics:
+    """线程安全的指标集合"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {}
+        self._gauges: Dict[str, Any] = {}
+        self._timings: Dict[str, Dict[str, float]] = {}
+        self.started_at = time.time()
+
+    def increment(self, name: str, value: int = 1):
+        """计数器加一（或加指定值）"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: Any):
+        """设置状态值（覆盖旧值）"""
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, value: float):
+        """
+        记录一次耗时/数值样本
+
+        Args:
+            name (str): 指标名，约定以单位结尾，如 wake.input_to_hidden_ms
+            value (float): 样本值
+        """
+        with self._lock:
+            timing = self._timings.get(name)
+            if timing is None:
+                self._timings[name] = {"count": 1, "total": value, "min": value, "max": value, "last": value}
+                return
+            timing["count"] += 1
+            timing["total"] += value
+            timing["min"] = min(timing["min"], value)
+            timing["max"] = max(timing["max"], value)
+            timing["last"] = value
+
+    @contextmanager
+    def timer(self, name: str):
+        """以毫秒记录代码块耗时"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - started) * 1000.0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """获取全部指标的快照（可直接序列化为JSON）"""
+        with self._lock:
+            timings = {}
+            for name, timing in self._timings.items():
+                timings[name] = dict(timing, avg=timing["total"] / timing["count"])
+            return {
+                "uptime_seconds": round(time.time() - self.started_at, 1),
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "timings": timings,
+            }
+
+    def reset(self):
+        """清空全部指标"""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._timings.clear()
+
+
+def get_rss_bytes() -> int:
+    """
+    获取当前进程的常驻内存（RSS）
+
+    Returns:
+        int: 字节数，无法获取时返回0
+    """
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [("cb", wintypes.DWORD),
+                            ("PageFaultCount", wintypes.DWORD),
+                            ("PeakWorkingSetSize", ctypes.c_size_t),
+                            ("WorkingSetSize", ctypes.c_size_t),
+                            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                            ("PagefileUsage", ctypes.c_size_t),
+                            ("PeakPagefileUsage", ctypes.c_size_t)]
+
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            process = ctypes.windll.kernel32.GetCurrentProcess()
+            ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb)
+            return counters.WorkingSetSize
+
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+# 进程内共享的指标实例
+metrics = Metrics()
@@ -0,0 +1,212 @@
+"""
+叠加层模块
+视频上方显示时钟、提示文字（如“触摸屏幕继续”）、轮播消息和台标
+
+每一项的内容只在变化时渲染一次并缓存为位图，重绘只覆盖变化的区域：时钟每秒（或每分钟）只重绘自身所在的小矩形，
+静态文字和台标在显示后不再重绘。本模块负责配置解析、各项内容与下一次变化的时刻、叠加层文件的监视和开销统计，
+不依赖 Qt；绘制见 video_player.OverlayLayer
+"""
+
+import json
+import os
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from metrics import metrics
+
+OVERLAY_TYPES = ("clock", "text", "messages", "logo")
+POSITIONS = ("top-left", "top-center", "top-right", "center-left", "center", "center-right",
+             "bottom-left", "bottom-center", "bottom-right")
+# 时间格式中包含秒的指令，包含时每秒变化一次，否则每分钟一次
+SECOND_DIRECTIVES = ("%S", "%T", "%X", "%c", "%s")
+
+
+class OverlayItem:
+    """叠加层中的一项"""
+
+    def __init__(self, settings: dict):
+        """
+        Args:
+            settings (dict): type（clock / text / messages / logo）、position（如 top-right）、margin（距屏幕边缘的像素）、
+                             size（文字像素高度）、color、opacity（0-1）；
+                             clock 的 format（strftime 格式），text 的 text，messages 的 messages 和 interval（秒），
+                             logo 的 path 和 width（缩放后的宽度，0 表示原始大小）
+
+        Raises:
+            ValueError: 类型或位置无效，或缺少该类型必需的内容
+        """
+        self.type = settings.get("type", "text")
+        if self.type not in OVERLAY_TYPES:
+            raise ValueError(f"未知的叠加层类型: {self.type}（可用: {', '.join(OVERLAY_TYPES)}）")
+        self.position = settings.get("position", "bottom-right")
+        if self.position not in POSITIONS:
+            raise ValueError(f"未知的叠加层位置: {self.position}")
+        self.margin = max(0, int(settings.get("margin", 40)))
+        self.size = max(8, int(settings.get("size", 36)))
+        self.color = str(settings.get("color", "#ffffff"))
+        self.opacity = min(1.0, max(0.0, float(settings.get("opacity", 0.85))))
+        self.format = str(settings.get("format", "%H:%M"))
+        self.text = str(settings.get("text", ""))
+        self.messages = [str(message) for message in settings.get("messages", [])]
+        self.interval = max(1.0, float(settings.get("interval", 10)))
+        self.path = settings.get("path")
+        self.width = max(0, int(settings.get("width", 0)))
+        if self.type == "text" and not self.text:
+            raise ValueError("text 类型需要 text")
+        if self.type == "messages" and not self.messages:
+            raise ValueError("messages 类型需要 messages")
+        if self.type == "logo" and not self.path:
+            raise ValueError("logo 类型需要 path")
+
+    def content(self, now: float) -> str:
+        """now（时间戳）时显示的内容：文字，台标为图片路径"""
+        if self.type == "clock":
+            return datetime.fromtimestamp(now).strftime(self.format)
+        if self.type == "messages":
+            return self.messages[int(now // self.interval) % len(self.messages)]
+        if self.type == "logo":
+            return self.path
+        return self.text
+
+    def next_change(self, now: float) -> Optional[float]:
+        """内容下一次可能变化的时刻（时间戳），不会变化时返回None"""
+        if self.type == "clock":
+            period = 1.0 if any(directive in self.format for directive in SECOND_DIRECTIVES) else 60.0
+        elif self.type == "messages" and len(self.messages) > 1:
+            period = self.interval
+        else:
+            return None
+        return (now // period + 1) * period
+
+
+def anchor(position: str, width: int, height: int, area_width: int, area_height: int,
+           margin: int) -> Tuple[int, int]:
+    """
+    按位置计算一项的左上角坐标
+
+    Returns:
+        Tuple[int, int]: (x, y)
+    """
+    vertical, _, horizontal = position.partition("-")
+    horizontal = horizontal or "center"
+    x = {"left": margin, "center": (area_width - width) // 2, "right": area_width - width - margin}[horizontal]
+    y = {"top": margin, "center": (area_height - height) // 2, "bottom": area_height - height - margin}[vertical]
+    return x, y
+
+
+def parse_overlays(settings) -> List[OverlayItem]:
+    """解析叠加层列表，跳过无效的项"""
+    items = []
+    for entry in settings or []:
+        try:
+            items.append(OverlayItem(entry))
+        except (ValueError, TypeError, AttributeError) as e:
+            print(f"忽略无效的叠加层: {e}")
+    return items
+
+
+class OverlaySource:
+    """
+    叠加层内容来源
+
+    配置中的 overlays；指定了 overlays_path 时以该 JSON 文件为准（列表，或带 overlays 键的对象），
+    文件修改后重新读取，文件不存在或无效时保留原有内容
+    """
+
+    def __init__(self, overlays: list = None, path: str = None):
+        self.path = path
+        self.items = parse_overlays(overlays)
+        self._mtime = None
+
+    def load(self) -> List[OverlayItem]:
+        """当前的叠加层（有叠加层文件时先读取一次）"""
+        self.poll()
+        return self.items
+
+    def poll(self) -> Optional[List[OverlayItem]]:
+        """
+        检查叠加层文件是否变化（只有一次 stat）
+
+        Returns:
+            Optional[List[OverlayItem]]: 变化后的叠加层，没有变化时返回None
+        """
+        if not self.path:
+            return None
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+        if mtime == self._mtime:
+            return None
+        self._mtime = mtime
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"读取叠加层文件失败: {e}")
+            return None
+        self.items = parse_overlays(data.get("overlays", []) if isinstance(data, dict) else data)
+        metrics.increment("overlay.reloads")
+        print(f"🏷️ 已重新加载叠加层: {self.path}（{len(self.items)} 项）")
+        return self.items
+
+
+class OverlayCost:
+    """叠加层的渲染和重绘开销：每次绘制记入 overlay.paint_ms，约每秒汇总为每秒耗时和重绘面积"""
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._window_started = clock()
+        self._cost_ms = 0.0
+        self._pixels = 0
+
+    def add(self, cost_ms: float, pixels: int = 0):
+        """
+        Args:
+            cost_ms (float): 本次渲染位图和绘制的耗时（毫秒）
+            pixels (int): 本次重绘的面积（像素）
+        """
+        metrics.observe("overlay.paint_ms", cost_ms)
+        self._cost_ms += cost_ms
+        self._pixels += pixels
+        now = self.clock()
+        elapsed = now - self._window_started
+        if elapsed >= 1.0:
+            metrics.set_gauge("overlay.cost_ms_per_s", round(self._cost_ms / elapsed, 3))
+            metrics.set_gauge("overlay.repaint_px_per_s", int(self._pixels / elapsed))
+            self._window_started = now
+            self._cost_ms = 0.0
+            self._pixels = 0
+
+
+if __name__ == "__main__":
+    # 测试内容、变化时刻、位置计算和文件监视
+    import tempfile
+
+    clock = OverlayItem({"type": "clock", "format": "%H:%M:%S"})
+    assert clock.next_change(1000.25) == 1001.0
+    assert OverlayItem({"type": "clock"}).next_change(1000.25) == 1020.0, "不显示秒时每分钟变化一次"
+    messages = OverlayItem({"type": "messages", "messages": ["a", "b"], "interval": 5})
+    assert [messages.content(t) for t in (0, 4.9, 5, 10)] == ["a", "a", "b", "a"]
+    assert messages.next_change(7) == 10.0
+    assert OverlayItem({"type": "text", "text": "触摸屏幕继续"}).next_change(0) is None, "静态文字不会变化"
+
+    assert anchor("top-right", 200, 50, 1920, 1080, 40) == (1680, 40)
+    assert anchor("bottom-center", 200, 50, 1920, 1080, 40) == (860, 990)
+    assert anchor("center", 200, 50, 1920, 1080, 40) == (860, 515)
+    assert len(parse_overlays([{"type": "logo"}, {"type": "marquee"}, {"type": "clock"}])) == 1
+
+    path = os.path.join(tempfile.mkdtemp(prefix="overlays_"), "overlays.json")
+    source = OverlaySource([{"type": "clock"}], path)
+    assert [item.type for item in source.load()] == ["clock"], "文件不存在时使用配置"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"overlays": [{"type": "text", "text": "欢迎"}]}, f)
+    assert [item.text for item in source.poll()] == ["欢迎"] and source.poll() is None
+
+    ticks = iter([0.0, 0.5, 1.0])
+    cost = OverlayCost(clock=lambda: next(ticks))
+    cost.add(0.2, 5000)
+    cost.add(0.3, 5000)
+    assert metrics.snapshot()["gauges"]["overlay.repaint_px_per_s"] == 10000
+    print(f"✅ 叠加层解析、变化时刻和文件监视正常，每秒开销 {metrics.snapshot()['gauges']['overlay.cost_ms_per_s']} 毫秒")
@@ -0,0 +1,120 @@
+"""
+播放进度模块
+记录每个视频上次播放到的位置，下次启动时从该位置（对齐到关键帧）继续，
+或者随机选择一个关键帧作为起点，长视频不会每次只看到开头
+
+进度在内存中更新，按时间间隔节流写入文件；写入使用临时文件替换，中途退出不会损坏
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+
+from media_tools import keyframe_at_or_before
+
+# 距离结尾不足该毫秒数时视为已播完，下次从头开始
+END_MARGIN_MS = 5000
+
+
+class PlaybackPositions:
+    """各视频的播放进度（按视频绝对路径）"""
+
+    def __init__(self, path: str = "playback_positions.json", write_interval: float = 10.0):
+        self.path = path
+        self.write_interval = write_interval
+        self._lock = threading.Lock()
+        self._positions: Dict[str, Dict[str, float]] = self._load()
+        self._dirty = False
+        self._last_write = 0.0
+
+    def _load(self) -> Dict[str, Dict[str, float]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, video_path: str) -> Optional[Dict[str, float]]:
+        """上次的进度 {"position_ms", "duration_ms", "updated"}，没有记录时返回None"""
+        with self._lock:
+            return self._positions.get(os.path.abspath(video_path))
+
+    def update(self, video_path: str, position_ms: int, duration_ms: int):
+        """更新进度（播放位置变化时调用），距上次写入超过 write_interval 时写入文件"""
+        with self._lock:
+            self._positions[os.path.abspath(video_path)] = {
+                "position_ms": int(position_ms), "duration_ms": int(duration_ms), "updated": time.time()}
+            self._dirty = True
+            due = time.monotonic() - self._last_write >= self.write_interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        """把未写入的进度写入文件"""
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            self._last_write = time.monotonic()
+            data = json.dumps(self._positions, ensure_ascii=False)
+        try:
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"保存播放进度失败: {e}")
+
+
+def choose_start_position(mode: str, saved: Optional[Dict[str, float]],
+                          keyframes: Optional[List[int]]) -> int:
+    """
+    选择本次播放的起点（毫秒）
+
+    Args:
+        mode (str): "resume"（从上次位置继续）/ "random"（随机关键帧）/ "beginning"（从头）
+        saved (dict, optional): PlaybackPositions.get() 的结果
+        keyframes (List[int], optional): 关键帧索引；没有索引时不对齐（播放器需要解码到该位置）
+
+    Returns:
+        int: 起点，0 表示从头播放
+    """
+    if mode == "random":
+        duration = saved["duration_ms"] if saved else 0
+        if keyframes:
+            # 不选最后 10% 的关键帧，避免刚开始就播完
+            limit = duration * 0.9 if duration else keyframes[-1]
+            candidates = [frame for frame in keyframes if frame <= limit] or keyframes[:1]
+            return random.choice(candidates)
+        return int(random.uniform(0, duration * 0.9)) if duration else 0
+
+    if mode == "resume" and saved:
+        position = saved["position_ms"]
+        if saved["duration_ms"] and position >= saved["duration_ms"] - END_MARGIN_MS:
+            return 0
+        return keyframe_at_or_before(keyframes, position) if keyframes else int(position)
+    return 0
+
+
+if __name__ == "__main__":
+    # 测试节流写入与起点选择
+    import tempfile
+
+    path = os.path.join(tempfile.mkdtemp(prefix="playback_state_"), "playback_positions.json")
+    positions = PlaybackPositions(path, write_interval=60)
+    for position in range(0, 120000, 250):
+        positions.update("ambient.mp4", position, 1800000)
+    assert json.load(open(path, encoding="utf-8"))[os.path.abspath("ambient.mp4")]["position_ms"] == 0, "应节流写入"
+    positions.flush()
+    saved = PlaybackPositions(path).get("ambient.mp4")
+    assert saved["position_ms"] == 119750
+
+    keyframes = list(range(0, 1800000, 2000))
+    assert choose_start_position("resume", saved, keyframes) == 118000
+    assert choose_start_position("resume", dict(saved, position_ms=1797000), keyframes) == 0
+    assert choose_start_position("random", saved, keyframes) in keyframes
+    assert choose_start_position("beginning", saved, keyframes) == 0
+    print(f"✅ 480 次进度更新写入文件 2 次，续播起点 {choose_start_position('resume', saved, keyframes)} 毫秒")
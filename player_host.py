@@ -0,0 +1,223 @@
+"""
+播放器进程管理模块
+监控进程（纯Python，不导入Qt）按需启动播放器子进程，可在即将触发时预先启动并驻留，
+通过管道发送播放命令；播放器崩溃时清理状态并按退避策略重新启动
+"""
+
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable, Optional
+
+from metrics import metrics
+
+
+def get_player_command() -> list:
+    """播放器子进程的启动命令（打包后通过 --player 参数进入播放器入口）"""
+    if getattr(sys, "frozen", False):
+        return [sys.executable, "--player"]
+    return [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "player_process.py")]
+
+
+class PlayerProcessHost:
+    """播放器子进程管理器"""
+
+    def __init__(self, on_exit: Callable[[], None] = None, restart_backoff: float = 2.0,
+                 max_restart_backoff: float = 60.0, on_media_failed: Callable[[str, str], None] = None):
+        self.on_exit = on_exit
+        # 播放器报告视频无法播放时调用 (视频路径, 原因)
+        self.on_media_failed = on_media_failed
+        self.restart_backoff = restart_backoff
+        self.max_restart_backoff = max_restart_backoff
+
+        self.process: Optional[subprocess.Popen] = None
+        self.ready = threading.Event()
+        self.playing = False
+        self.crashes = 0
+        # 最近一次播放的记录（播放器进程退出时发送）
+        self.last_session: Optional[dict] = None
+        self._lock = threading.Lock()
+        self._spawned_at = 0.0
+        self._play_requested_at = None
+        self._play_was_warm = False
+        self._stopping = False
+        self._next_spawn_allowed = 0.0
+
+    def is_running(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def prespawn(self) -> bool:
+        """
+        预先启动播放器并驻留（Qt已加载，窗口未创建），用于即将触发时
+
+        Returns:
+            bool: 播放器进程是否已在运行
+        """
+        with self._lock:
+            return self._spawn_locked()
+
+    def _spawn_locked(self) -> bool:
+        if self.is_running():
+            return True
+        if time.monotonic() < self._next_spawn_allowed:
+            return False
+
+        self.ready.clear()
+        self.playing = False
+        self._stopping = False
+        self._spawned_at = time.perf_counter()
+        try:
+            self.process = subprocess.Popen(
+                get_player_command(),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                text=True,
+                encoding="utf-8",
+                bufsize=1,
+            )
+        except OSError as e:
+            print(f"启动播放器进程失败: {e}")
+            self.process = None
+            return False
+
+        metrics.increment("player.spawns")
+        threading.Thread(target=self._read_events, args=(self.process,), daemon=True).start()
+        return True
+
+    def play(self, video_path: str, **options) -> bool:
+        """
+        播放视频（必要时先启动播放器进程）
+
+        Args:
+            video_path (str): 视频文件路径（只有备用内容时为None）
+            **options: 随播放命令发送的其他参数（如 poster_cache_dir）
+
+        Returns:
+            bool: 命令是否已发送
+        """
+        with self._lock:
+            if self.playing:
+                return True
+            self._play_was_warm = self.is_running()
+            if not self._spawn_locked():
+                return False
+            self.playing = True
+            self.last_session = None
+            self._play_requested_at = time.perf_counter()
+            return self._send(dict(options, cmd="play", video_path=os.path.abspath(video_path) if video_path else None))
+
+    def set_stage(self, stage: str, **options):
+        """切换正在播放的屏保的空闲阶段（options 为 brightness / fps / slow_motion）"""
+        with self._lock:
+            if self.is_running() and self.playing:
+                self._send(dict(options, cmd="stage", stage=stage))
+
+    def stop(self):
+        """关闭正在播放的屏保"""
+        if self.is_running():
+            self._send({"cmd": "stop"})
+
+    def prepare(self, video_path: str):
+        """让驻留中的播放器预先打开视频（解析文件头、加载解码器），播放时直接复用"""
+        with self._lock:
+            if self.is_running() and not self.playing:
+                self._send({"cmd": "prepare", "video_path": os.path.abspath(video_path)})
+
+    def release(self):
+        """释放驻留中的播放器（用户恢复操作、未发生触发时调用）"""
+        with self._lock:
+            if self.is_running() and not self.playing:
+                self._shutdown_locked()
+
+    def shutdown(self, timeout: float = 2.0):
+        """关闭播放器进程"""
+        with self._lock:
+            self._shutdown_locked(timeout)
+
+    def _shutdown_locked(self, timeout: float = 2.0):
+        if not self.process:
+            return
+        self._stopping = True
+        self._send({"cmd": "quit"})
+        try:
+            self.process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self.process = None
+        self.playing = False
+
+    def _send(self, command: dict) -> bool:
+        try:
+            self.process.stdin.write(json.dumps(command, ensure_ascii=False) + "\n")
+            self.process.stdin.flush()
+            return True
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"发送播放器命令失败: {e}")
+            return False
+
+    def _read_events(self, process: subprocess.Popen):
+        """读取播放器事件，进程退出后处理崩溃"""
+        for line in process.stdout:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            self._handle_event(event)
+
+        exit_code = process.wait()
+        with self._lock:
+            if process is not self.process and self.process is not None:
+                return
+            was_playing = self.playing
+            self.process = None
+            self.playing = False
+            crashed = exit_code != 0 and not self._stopping
+
+        if crashed:
+            self.crashes += 1
+            backoff = min(self.max_restart_backoff, self.restart_backoff * (2 ** (self.crashes - 1)))
+            self._next_spawn_allowed = time.monotonic() + backoff
+            metrics.increment("player.crashes")
+            print(f"❌ 播放器进程异常退出（退出码 {exit_code}），{backoff:.0f} 秒后允许重新启动")
+        else:
+            self.crashes = 0
+
+        if was_playing and self.on_exit:
+            self.on_exit()
+
+    def _handle_event(self, event: dict):
+        name = event.get("event")
+        if name == "ready":
+            metrics.observe("player.startup_ms", (time.perf_counter() - self._spawned_at) * 1000.0)
+            self.ready.set()
+        elif name == "playing" and self._play_requested_at is not None:
+            latency = (time.perf_counter() - self._play_requested_at) * 1000.0
+            metrics.observe("player.activation_warm_ms" if self._play_was_warm else "player.activation_cold_ms", latency)
+        elif name == "first_frame" and self._play_requested_at is not None:
+            latency = (time.perf_counter() - self._play_requested_at) * 1000.0
+            metrics.observe("player.first_frame_ms", latency)
+            metrics.observe("player.first_frame_prewarmed_ms" if self._play_was_warm else "player.first_frame_cold_ms",
+                            latency)
+            self._play_requested_at = None
+        elif name == "exited":
+            self.last_session = event.get("session")
+            if event.get("input_to_hidden_ms") is not None:
+                metrics.observe("wake.input_to_hidden_ms", event["input_to_hidden_ms"])
+        elif name == "media_failed":
+            if self.on_media_failed and event.get("path"):
+                self.on_media_failed(event["path"], event.get("reason", ""))
+        elif name == "error":
+            print(f"❌ 播放器错误: {event.get('message')}")
+
+    def get_status(self) -> dict:
+        """获取播放器进程状态"""
+        return {
+            "running": self.is_running(),
+            "pid": self.process.pid if self.is_running() else None,
+            "ready": self.ready.is_set(),
+            "playing": self.playing,
+            "crashes": self.crashes,
+        }
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+独立播放器进程
+由监控进程按需启动，通过标准输入/输出上的JSON行协议通信：
+
+命令（stdin）:  {"cmd": "play", "video_path": "...", "poster_cache_dir": "...", "volume": 50, ...}
+               {"cmd": "prepare", "video_path": "..."} / {"cmd": "stop"} / {"cmd": "quit"}
+               {"cmd": "stage", "stage": "dimmed", "brightness": 0.35, "fps": 10, "slow_motion": false}
+事件（stdout）: {"event": "ready", "startup_ms": ...} / {"event": "playing", ...}
+               {"event": "media_failed", "path": "...", "reason": "..."}
+               {"event": "exited"} / {"event": "error", "message": "..."}
+
+播放器窗口关闭后进程自行退出，释放Qt占用的内存；stdin关闭（监控进程退出）时同样退出
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+
+
+_started = time.perf_counter()
+
+# 播放命令中转交给播放器的参数
+PLAYER_OPTIONS = ("volume", "fade_ms", "silent_path", "fallbacks", "readahead_window_mb", "start_ms",
+                  "positions_path", "frame_filters", "transition", "playlist", "overlays", "overlays_path",
+                  "idle_dimming")
+
+
+class PlayerProcess:
+    """播放器子进程"""
+
+    def __init__(self, protocol_out):
+        from PyQt5.QtCore import QObject, pyqtSignal
+        from PyQt5.QtWidgets import QApplication
+
+        class CommandBridge(QObject):
+            command_received = pyqtSignal(dict)
+
+        self.protocol_out = protocol_out
+        self._write_lock = threading.Lock()
+        self.app = QApplication.instance() or QApplication(sys.argv[:1])
+        self.app.setQuitOnLastWindowClosed(False)
+        self.player = None
+        self.play_started = None
+        # 预热时打开的媒体（无输出、暂停），让解码器和文件缓存就绪
+        self.primer = None
+
+        # 提前加载多媒体模块，让驻留（prespawn）状态下的播放启动更快
+        from media_tools import PosterCache
+        from video_player import FullScreenVideoPlayer
+        self.player_class = FullScreenVideoPlayer
+        self.poster_cache_class = PosterCache
+
+        self.bridge = CommandBridge()
+        self.bridge.command_received.connect(self.handle_command)
+        threading.Thread(target=self._read_commands, daemon=True).start()
+
+    def send_event(self, event: str, **fields):
+        """向监控进程发送事件"""
+        fields["event"] = event
+        with self._write_lock:
+            self.protocol_out.write(json.dumps(fields, ensure_ascii=False) + "\n")
+            self.protocol_out.flush()
+
+    def _read_commands(self):
+        """后台线程读取命令，通过信号转到GUI线程执行"""
+        for line in sys.stdin:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                self.bridge.command_received.emit(json.loads(line))
+            except ValueError:
+                self.send_event("error", message=f"无效命令: {line}")
+        # 监控进程已退出
+        self.bridge.command_received.emit({"cmd": "quit"})
+
+    def handle_command(self, command: dict):
+        cmd = command.get("cmd")
+        if cmd == "play":
+            options = {key: command[key] for key in PLAYER_OPTIONS if key in command}
+            self.play(command.get("video_path"), command.get("poster_cache_dir"), **options)
+        elif cmd == "prepare":
+            self.prepare(command.get("video_path"))
+        elif cmd == "stage":
+            if self.player:
+                self.player.set_idle_stage(command.get("stage"), command.get("brightness", 0.35),
+                                           command.get("fps", 10), command.get("slow_motion", False))
+        elif cmd == "stop":
+            if self.player:
+                self.player.exit_player()
+        elif cmd == "quit":
+            self.app.quit()
+        else:
+            self.send_event("error", message=f"未知命令: {cmd}")
+
+    def prepare(self, video_path: str):
+        """预先打开视频并暂停：解析文件头、加载解码器，正式播放时这些工作已经完成"""
+        if self.player or self.primer or not video_path or not os.path.exists(video_path):
+            return
+        from PyQt5.QtCore import QUrl
+        from PyQt5.QtMultimedia import QMediaContent, QMediaPlayer
+
+        self.primer = QMediaPlayer(None, QMediaPlayer.VideoSurface)
+        self.primer.setMuted(True)
+        self.primer.setMedia(QMediaContent(QUrl.fromLocalFile(video_path)))
+        self.primer.pause()
+
+    def _release_primer(self):
+        if self.primer:
+            from PyQt5.QtMultimedia import QMediaContent
+            self.primer.stop()
+            self.primer.setMedia(QMediaContent())
+            self.primer.deleteLater()
+            self.primer = None
+
+    def play(self, video_path: str, poster_cache_dir: str = None, **options):
+        if self.player:
+            return
+        if not options.get("fallbacks") and (not video_path or not os.path.exists(video_path)):
+            self.send_event("error", message=f"视频文件不存在: {video_path}")
+            self.app.quit()
+            return
+
+        self.play_started = time.perf_counter()
+        poster_cache = self.poster_cache_class(poster_cache_dir) if poster_cache_dir else None
+        self.player = self.player_class(video_path, exit_callback=self._on_player_exit, poster_cache=poster_cache,
+                                        on_media_failed=self._on_media_failed, **options)
+        self.player.media_player.positionChanged.connect(self._on_first_position)
+        self.player.play_video()
+        # 正式播放器已打开媒体，释放预热用的播放器
+        self._release_primer()
+        self.send_event("playing", show_ms=round((time.perf_counter() - self.play_started) * 1000, 1))
+
+    def _on_first_position(self, position):
+        if position > 0 and self.play_started is not None:
+            self.send_event("first_frame", latency_ms=round((time.perf_counter() - self.play_started) * 1000, 1))
+            self.play_started = None
+
+    def _on_media_failed(self, path: str, reason: str):
+        # 失败记录由监控进程保存
+        self.send_event("media_failed", path=path, reason=reason)
+
+    def _on_player_exit(self):
+        self.send_event("exited", input_to_hidden_ms=self.player.wake_ms, session=self.player.session_info())
+        # 播放结束即退出进程，释放Qt和解码器内存
+        self.app.quit()
+
+    def run(self) -> int:
+        self.send_event("ready", startup_ms=round((time.perf_counter() - _started) * 1000, 1), pid=os.getpid())
+        return self.app.exec_()
+
+
+def main() -> int:
+    # stdout专用于协议，普通print输出转到stderr；fd 1 也指向stderr，
+    # Qt、解码库等原生代码直接写入 fd 1 的输出不会混入协议
+    sys.stdout.flush()
+    protocol_out = os.fdopen(os.dup(sys.stdout.fileno()), "w", encoding="utf-8")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    sys.stdout = sys.stderr
+    try:
+        return PlayerProcess(protocol_out).run()
+    except Exception as e:
+        protocol_out.write(json.dumps({"event": "error", "message": str(e)}, ensure_ascii=False) + "\n")
+        protocol_out.flush()
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
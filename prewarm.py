@@ -0,0 +1,160 @@
+"""
+预热预测模块
+空闲时间接近触发阈值时提前准备播放（预读视频、启动播放器进程并打开媒体），
+提前量从本机最近的空闲时段长度中学习：常在阈值前不久结束的空闲不值得预热
+
+统计预热命中率（预热后确实触发屏保的比例）和预热带来的首帧延迟改善
+"""
+
+import threading
+from collections import deque
+from typing import Dict, Iterable, Optional
+
+from metrics import metrics
+
+# 每次尝试的提前量步长（秒）
+LEAD_STEP_SECONDS = 1.0
+
+
+class LeadTimePredictor:
+    """
+    预热提前量预测
+
+    记录最近的空闲时段长度；对给定的触发阈值 T 和提前量 L，长度落在 [T-L, T) 的空闲会白白预热，
+    长度 ≥ T 的空闲预热有效。选取浪费比例不超过 max_waste_ratio 的最大提前量（不超过 max_lead）
+    """
+
+    def __init__(self, max_lead: float = 15.0, max_waste_ratio: float = 0.25,
+                 min_samples: int = 20, history_size: int = 500, tolerance: float = 1.0):
+        self.max_lead = max_lead
+        self.max_waste_ratio = max_waste_ratio
+        self.min_samples = min_samples
+        # 空闲时间回退超过该值视为有新输入（与空闲轨迹记录相同）
+        self.tolerance = tolerance
+        self._lock = threading.Lock()
+        self._lengths = deque(maxlen=history_size)
+        self._cache: Dict[float, float] = {}
+        self._last_idle = 0.0
+        self._active = False
+        self._activated = False
+        self.preparations = 0
+        self.hits = 0
+
+    def set_max_lead(self, max_lead: float):
+        with self._lock:
+            self.max_lead = max_lead
+            self._cache.clear()
+
+    def seed(self, lengths: Iterable[float]):
+        """用已有的空闲时段长度（如空闲轨迹文件）初始化"""
+        with self._lock:
+            self._lengths.extend(lengths)
+            self._cache.clear()
+
+    def observe(self, idle_time: float):
+        """监控循环每次读取空闲时间后调用；空闲时间回落时记录上一段空闲的长度"""
+        with self._lock:
+            if idle_time + self.tolerance < self._last_idle:
+                self._lengths.append(self._last_idle)
+                self._cache.clear()
+            self._last_idle = idle_time
+
+    def lead_for(self, threshold: float) -> float:
+        """
+        给定触发阈值的预热提前量
+
+        Returns:
+            float: 提前的秒数；样本不足时为 max_lead，预热总是浪费时为 0
+        """
+        if self.max_lead <= 0:
+            return 0.0
+        with self._lock:
+            if threshold in self._cache:
+                return self._cache[threshold]
+            if len(self._lengths) < self.min_samples:
+                return self.max_lead
+            lengths = list(self._lengths)
+
+        hits = sum(1 for length in lengths if length >= threshold)
+        lead = min(self.max_lead, threshold)
+        while lead > 0:
+            wasted = sum(1 for length in lengths if threshold - lead <= length < threshold)
+            if wasted <= self.max_waste_ratio * (wasted + hits):
+                break
+            lead -= LEAD_STEP_SECONDS
+        lead = max(0.0, lead)
+
+        with self._lock:
+            self._cache[threshold] = lead
+        metrics.set_gauge("prewarm.lead_seconds", lead)
+        return lead
+
+    # ---------- 命中率 ----------
+
+    def begin(self):
+        """开始预热"""
+        self._active = True
+        self._activated = False
+        self.preparations += 1
+        metrics.increment("prewarm.preparations")
+
+    def activated(self) -> bool:
+        """
+        屏保已触发
+
+        Returns:
+            bool: 本次触发前是否已预热
+        """
+        if self._active and not self._activated:
+            self._activated = True
+            self.hits += 1
+            metrics.increment("prewarm.hits")
+            metrics.set_gauge("prewarm.hit_rate", round(self.hits / self.preparations, 3))
+        return self._active
+
+    def end(self):
+        """用户恢复操作，预热结束（未触发则记为浪费）"""
+        if self._active and not self._activated:
+            metrics.increment("prewarm.wasted")
+            metrics.set_gauge("prewarm.hit_rate", round(self.hits / self.preparations, 3))
+        self._active = False
+
+    def report(self, threshold: Optional[float] = None) -> dict:
+        """命中率、当前提前量和预热带来的首帧延迟改善"""
+        timings = metrics.snapshot()["timings"]
+        warm = timings.get("player.first_frame_prewarmed_ms")
+        cold = timings.get("player.first_frame_cold_ms")
+        return {
+            "lead_seconds": self.lead_for(threshold) if threshold is not None else None,
+            "samples": len(self._lengths),
+            "preparations": self.preparations,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.preparations, 3) if self.preparations else None,
+            "latency_won_ms": round(cold["avg"] - warm["avg"], 1) if warm and cold else None,
+        }
+
+
+if __name__ == "__main__":
+    # 测试提前量学习：很多空闲在阈值前 5 秒内结束时，提前量应缩短到避开它们
+    import random
+
+    random.seed(1)
+    predictor = LeadTimePredictor(max_lead=15)
+    threshold = 60
+    print(f"无样本时提前量: {predictor.lead_for(threshold)} 秒")
+
+    lengths = [random.uniform(10, 40) for _ in range(200)]      # 远早于阈值结束
+    lengths += [random.uniform(55, 59.5) for _ in range(60)]    # 在阈值前 5 秒内结束
+    lengths += [random.uniform(120, 1800) for _ in range(100)]  # 达到阈值
+    predictor.seed(lengths)
+    lead = predictor.lead_for(threshold)
+    assert 0 < lead <= 5, lead
+    print(f"学习后的提前量: {lead} 秒")
+
+    for activated in [True] * 3 + [False]:
+        predictor.begin()
+        if activated:
+            predictor.activated()
+        predictor.end()
+    assert predictor.report()["hit_rate"] == 0.75
+    print(f"✅ {predictor.report(threshold)}")
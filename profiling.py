@@ -0,0 +1,240 @@
+"""
+现场诊断模块
+按需采集 CPU 采样剖析、tracemalloc 内存快照对比和 Qt/Python 对象数量，报告写到 config.json 所在目录
+
+不启用时没有任何开销：采样线程只在采集期间存在，tracemalloc 只在请求内存快照后才开启
+
+用法（控制通道）:
+    python main.py profile cpu 30        # CPU 采样 30 秒
+    python main.py profile memory        # 内存快照（第二次起报告与上一次的差异）
+    python main.py profile memory stop   # 停止内存跟踪
+    python main.py profile objects       # Qt/Python 对象数量
+"""
+
+import gc
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import List, Optional
+
+# 单条调用栈最多记录的层数
+MAX_STACK_DEPTH = 64
+TOP_N = 30
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+class Profiler:
+    """现场诊断工具"""
+
+    def __init__(self, report_dir: str = "."):
+        self.report_dir = report_dir
+        self._lock = threading.Lock()
+        self._cpu_thread: Optional[threading.Thread] = None
+        self._memory_baseline = None
+
+    def _report_path(self, kind: str, extension: str = "txt") -> str:
+        os.makedirs(self.report_dir, exist_ok=True)
+        return os.path.join(self.report_dir, f"profile_{kind}_{datetime.now():%Y%m%d_%H%M%S}.{extension}")
+
+    # ---------- CPU 采样 ----------
+
+    def start_cpu(self, seconds: float = 10, interval: float = 0.005) -> str:
+        """
+        在后台线程中采样所有线程的调用栈
+
+        Returns:
+            str: 报告路径（采样结束后写入）
+        """
+        with self._lock:
+            if self._cpu_thread and self._cpu_thread.is_alive():
+                raise RuntimeError("CPU 采样正在进行")
+            path = self._report_path("cpu")
+            self._cpu_thread = threading.Thread(target=self._sample_cpu, args=(seconds, interval, path),
+                                                name="profiler", daemon=True)
+            self._cpu_thread.start()
+        return path
+
+    def _sample_cpu(self, seconds: float, interval: float, path: str):
+        me = threading.get_ident()
+        names = {}
+        folded = Counter()
+        inclusive = Counter()
+        exclusive = Counter()
+        samples = 0
+        cpu_started, started = time.process_time(), time.perf_counter()
+        deadline = started + seconds
+
+        while time.perf_counter() < deadline:
+            names.update((thread.ident, thread.name) for thread in threading.enumerate())
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                if not stack:
+                    continue
+                stack.reverse()
+                folded[";".join([names.get(ident, str(ident))] + stack)] += 1
+                exclusive[stack[-1]] += 1
+                inclusive.update(set(stack))
+            samples += 1
+            time.sleep(interval)
+
+        wall = time.perf_counter() - started
+        cpu = time.process_time() - cpu_started
+        lines = [
+            f"CPU 采样报告 {datetime.now():%Y-%m-%d %H:%M:%S}",
+            f"时长 {wall:.1f} 秒，采样 {samples} 次，进程 CPU 时间 {cpu:.2f} 秒（{cpu / wall:.0%}，含采样本身）",
+            "",
+            f"按自身采样数（最多 {TOP_N} 项）:",
+        ]
+        lines += [f"{count:>8}  {label}" for label, count in exclusive.most_common(TOP_N)]
+        lines += ["", f"按包含子调用的采样数（最多 {TOP_N} 项）:"]
+        lines += [f"{count:>8}  {label}" for label, count in inclusive.most_common(TOP_N)]
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+            # 折叠栈格式，可直接交给 flamegraph.pl / speedscope
+            with open(os.path.splitext(path)[0] + ".folded", "w", encoding="utf-8") as f:
+                f.writelines(f"{stack} {count}\n" for stack, count in folded.items())
+            print(f"🔬 CPU 采样报告已保存: {path}")
+        except OSError as e:
+            print(f"保存 CPU 采样报告失败: {e}")
+
+    # ---------- 内存 ----------
+
+    def memory_snapshot(self) -> str:
+        """
+        拍摄 tracemalloc 快照；第一次调用开启跟踪，之后报告与上一次快照相比增长最多的分配位置
+
+        Returns:
+            str: 报告路径
+        """
+        import tracemalloc
+
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(10)
+                self._memory_baseline = None
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+            ])
+            current, peak = tracemalloc.get_traced_memory()
+            lines = [f"内存快照 {datetime.now():%Y-%m-%d %H:%M:%S}",
+                     f"已跟踪 {current / 1048576:.1f} MB，峰值 {peak / 1048576:.1f} MB", ""]
+            if self._memory_baseline is None:
+                lines.append("首次快照（跟踪刚开启，之后的快照报告增长）；当前占用最多的位置:")
+                lines += [str(stat) for stat in snapshot.statistics("lineno")[:TOP_N]]
+            else:
+                lines.append("与上一次快照相比增长最多的位置:")
+                lines += [str(stat) for stat in snapshot.compare_to(self._memory_baseline, "lineno")[:TOP_N]]
+            self._memory_baseline = snapshot
+            path = self._report_path("memory")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        return path
+
+    def stop_memory(self) -> str:
+        import tracemalloc
+
+        with self._lock:
+            tracemalloc.stop()
+            self._memory_baseline = None
+        return "内存跟踪已停止"
+
+    # ---------- 对象数量 ----------
+
+    def object_counts(self) -> str:
+        """
+        统计存活的 Qt 对象（按类名）和 Python 对象（按类型）
+
+        Returns:
+            str: 报告路径
+        """
+        objects = gc.get_objects()
+        python_types = Counter(type(obj).__name__ for obj in objects)
+        lines = [f"对象统计 {datetime.now():%Y-%m-%d %H:%M:%S}", f"Python 对象（gc 跟踪）: {len(objects)}", ""]
+
+        qt_core = sys.modules.get("PyQt5.QtCore")
+        if qt_core is None:
+            lines.append("Qt 未加载")
+        else:
+            qt_types = Counter(type(obj).__name__ for obj in objects if isinstance(obj, qt_core.QObject))
+            lines.append(f"Qt 对象（有 Python 包装的 QObject）: {sum(qt_types.values())}")
+            lines += [f"{count:>8}  {name}" for name, count in qt_types.most_common(TOP_N)]
+        del objects
+
+        lines += ["", f"Python 对象类型（最多 {TOP_N} 项）:"]
+        lines += [f"{count:>8}  {name}" for name, count in python_types.most_common(TOP_N)]
+        path = self._report_path("objects")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        return path
+
+    # ---------- 控制命令 ----------
+
+    def command(self, args: List[str]) -> str:
+        """处理 profile 控制命令: cpu [秒] / memory [stop] / objects"""
+        kind = args[0] if args else ""
+        if kind == "cpu":
+            seconds = float(args[1]) if len(args) > 1 else 10
+            if not 0 < seconds <= 600:
+                raise ValueError("采样时长应为 1-600 秒")
+            return f"正在采样 {seconds:g} 秒，报告: {self.start_cpu(seconds)}"
+        if kind == "memory":
+            if args[1:] == ["stop"]:
+                return self.stop_memory()
+            return f"内存快照: {self.memory_snapshot()}"
+        if kind == "objects":
+            return f"对象统计: {self.object_counts()}"
+        raise ValueError("用法: profile cpu [秒] | profile memory [stop] | profile objects")
+
+
+_profiler: Optional[Profiler] = None
+
+
+def get_profiler(config_file: str = "config.json") -> Profiler:
+    """进程内共享的诊断工具，报告写到配置文件所在目录"""
+    global _profiler
+    if _profiler is None:
+        _profiler = Profiler(os.path.dirname(os.path.abspath(config_file)))
+    return _profiler
+
+
+if __name__ == "__main__":
+    # 测试三种报告
+    import tempfile
+
+    profiler = Profiler(tempfile.mkdtemp(prefix="profiling_"))
+
+    def busy():
+        deadline = time.perf_counter() + 0.6
+        while time.perf_counter() < deadline:
+            sum(i * i for i in range(1000))
+
+    worker = threading.Thread(target=busy, name="busy")
+    worker.start()
+    report = profiler.start_cpu(0.5)
+    worker.join()
+    profiler._cpu_thread.join()
+    with open(report, encoding="utf-8") as f:
+        assert "busy" in f.read()
+
+    print(profiler.command(["memory"]))
+    leak = [bytearray(1024) for _ in range(2000)]
+    diff = profiler.memory_snapshot()
+    with open(diff, encoding="utf-8") as f:
+        assert "profiling.py" in f.read()
+    print(profiler.command(["memory", "stop"]))
+    print(profiler.command(["objects"]))
+    print(f"✅ 报告目录: {profiler.report_dir}")
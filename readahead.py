@@ -0,0 +1,153 @@
+"""
+文件预读模块
+长时间未播放的视频已被挤出系统文件缓存，机械硬盘或高负载时开头几秒会卡顿。
+即将触发时预读视频开头，播放时在播放位置前方保持一个预读窗口
+
+Linux 等支持 posix_fadvise 的平台交给内核异步预读（WILLNEED）；
+Windows 映射文件后用 PrefetchVirtualMemory 预取，不可用时逐页访问映射
+"""
+
+import mmap
+import os
+import sys
+import threading
+import time
+from typing import Optional
+
+from metrics import metrics
+
+PAGE_SIZE = mmap.PAGESIZE
+MB = 1024 * 1024
+
+
+def _touch_pages(path: str, offset: int, length: int):
+    """映射文件区间并预取（Windows）或逐页读取一个字节，让数据进入文件缓存"""
+    # 映射起点必须按分配粒度对齐
+    start = offset - offset % mmap.ALLOCATIONGRANULARITY
+    # Windows 需要可写（写时复制）的映射才能取得地址，不会修改文件
+    access = mmap.ACCESS_COPY if sys.platform == "win32" else mmap.ACCESS_READ
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), length + offset - start, offset=start, access=access) as view:
+            if sys.platform == "win32" and _prefetch_windows(view):
+                return
+            for position in range(0, len(view), PAGE_SIZE):
+                view[position]
+
+
+def _prefetch_windows(view: mmap.mmap) -> bool:
+    """Windows 8+：PrefetchVirtualMemory 异步预取映射区间，返回是否成功"""
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class MemoryRange(ctypes.Structure):
+            _fields_ = [("VirtualAddress", ctypes.c_void_p), ("NumberOfBytes", ctypes.c_size_t)]
+
+        kernel32 = ctypes.windll.kernel32
+        kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+        anchor = ctypes.c_char.from_buffer(view)
+        try:
+            entry = MemoryRange(ctypes.addressof(anchor), len(view))
+            return bool(kernel32.PrefetchVirtualMemory(kernel32.GetCurrentProcess(), ctypes.c_size_t(1),
+                                                       ctypes.byref(entry), wintypes.ULONG(0)))
+        finally:
+            # 释放对映射的引用，否则映射无法关闭
+            del anchor
+    except (AttributeError, OSError, TypeError, ValueError):
+        return False
+
+
+def prefetch(path: str, offset: int = 0, length: Optional[int] = None) -> int:
+    """
+    预读文件区间到系统文件缓存
+
+    Args:
+        path (str): 文件路径
+        offset (int): 起始位置
+        length (int, optional): 长度，None 表示到文件末尾
+
+    Returns:
+        int: 预读的字节数（失败时为0）
+    """
+    started = time.perf_counter()
+    try:
+        size = os.path.getsize(path)
+        length = size - offset if length is None else min(length, size - offset)
+        if length <= 0:
+            return 0
+        if hasattr(os, "posix_fadvise"):
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, offset, length, os.POSIX_FADV_WILLNEED)
+            finally:
+                os.close(fd)
+        else:
+            _touch_pages(path, offset, length)
+    except (OSError, ValueError) as e:
+        print(f"预读视频失败: {e}")
+        return 0
+    metrics.increment("io.readahead_bytes", length)
+    metrics.observe("io.readahead_ms", (time.perf_counter() - started) * 1000.0)
+    return length
+
+
+def prefetch_async(path: str, offset: int = 0, length: Optional[int] = None):
+    """在后台线程预读（mmap 逐页访问会阻塞）"""
+    threading.Thread(target=prefetch, args=(path, offset, length), daemon=True).start()
+
+
+class PlaybackReadAhead:
+    """
+    播放中的滑动预读窗口
+
+    按 播放位置/总时长 估算文件偏移，保持偏移之后 window_bytes 的数据已经预读；
+    每前进半个窗口预读一次，不会在每次位置更新时都发起I/O
+    """
+
+    def __init__(self, path: str, window_bytes: int):
+        self.path = path
+        self.window_bytes = window_bytes
+        try:
+            self.size = os.path.getsize(path)
+        except OSError:
+            self.size = 0
+        # 已预读到的位置
+        self.prefetched_until = 0
+
+    def update(self, position_ms: int, duration_ms: int):
+        """播放位置变化时调用（来自 QMediaPlayer.positionChanged）"""
+        if self.window_bytes <= 0 or duration_ms <= 0 or self.prefetched_until >= self.size:
+            return
+        offset = int(self.size * min(1.0, position_ms / duration_ms))
+        if offset + self.window_bytes // 2 < self.prefetched_until:
+            return
+        start = max(offset, self.prefetched_until)
+        end = min(self.size, offset + self.window_bytes)
+        if end > start:
+            self.prefetched_until = end
+            prefetch_async(self.path, start, end - start)
+
+    def restart(self):
+        """循环播放回到开头"""
+        self.prefetched_until = 0
+
+
+if __name__ == "__main__":
+    # 测试预读与滑动窗口
+    import tempfile
+
+    fd, path = tempfile.mkstemp(suffix=".mp4")
+    os.write(fd, os.urandom(16 * MB))
+    os.close(fd)
+    print(f"posix_fadvise: {hasattr(os, 'posix_fadvise')}，预读 {prefetch(path, 0, 4 * MB)} 字节")
+    _touch_pages(path, 3 * MB + 100, 2 * MB)
+
+    window = PlaybackReadAhead(path, 4 * MB)
+    steps = 0
+    for position in range(0, 60000, 40):
+        before = window.prefetched_until
+        window.update(position, 60000)
+        steps += window.prefetched_until != before
+    assert window.prefetched_until == 16 * MB, window.prefetched_until
+    print(f"✅ 1500 次位置更新触发 {steps} 次预读")
+    os.remove(path)
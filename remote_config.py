@@ -0,0 +1,240 @@
+"""
+远程配置模块
+定期从集中配置地址拉取设置，合并到ConfigManager并实时生效
+"""
+
+import hashlib
+import json
+import os
+import random
+import threading
+from typing import Any, Dict, Optional
+
+from config_manager import ConfigManager
+
+
+class RemoteConfigClient:
+    """远程配置拉取客户端"""
+
+    USER_AGENT = "pingmubaohu-config/1.0"
+
+    def __init__(self, config_manager: ConfigManager, url: str,
+                 interval: float = 300, max_backoff: float = 3600,
+                 cache_file: str = "remote_config_cache.json"):
+        self.config_manager = config_manager
+        self.url = url
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.cache_file = cache_file
+        self.timeout = 15
+
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.content_hash: Optional[str] = None
+        self.failures = 0
+        self.last_status = None
+        self.last_error = None
+
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """应用上次缓存的远程配置并启动后台轮询"""
+        self._load_cache()
+        if self._thread and self._thread.is_alive():
+            return self
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        print(f"远程配置已启用: {self.url}")
+        return self
+
+    def stop(self):
+        """停止轮询"""
+        self._stop_event.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=2.0)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.poll_once()
+                self.failures = 0
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                print(f"拉取远程配置失败（第{self.failures}次）: {e}")
+            self._stop_event.wait(self.next_delay())
+
+    def next_delay(self) -> float:
+        """
+        计算下次轮询间隔
+
+        成功时在轮询间隔上加±10%抖动，避免整批机器同时请求；
+        失败时指数退避，并在[一半, 全部]之间随机，防止服务恢复时集中重试
+
+        Returns:
+            float: 等待秒数
+        """
+        if self.failures == 0:
+            return self.interval * random.uniform(0.9, 1.1)
+        backoff = min(self.max_backoff, self.interval * (2 ** (self.failures - 1)))
+        return random.uniform(backoff / 2, backoff)
+
+    def poll_once(self) -> bool:
+        """
+        执行一次条件请求
+
+        Returns:
+            bool: 远程配置内容是否发生变化
+        """
+        # 按需导入：urllib.request会连带加载ssl等模块（约9MB），未配置网络功能时不常驻
+        import urllib.error
+        import urllib.request
+
+        headers = {"User-Agent": self.USER_AGENT}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+
+        request = urllib.request.Request(self.url, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                self.last_status = response.status
+                body = response.read()
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+        except urllib.error.HTTPError as e:
+            self.last_status = e.code
+            if e.code == 304:
+                return False
+            raise
+
+        self.etag = etag
+        self.last_modified = last_modified
+
+        # 服务器不支持条件请求时，内容未变也不重新解析
+        content_hash = hashlib.sha1(body).hexdigest()
+        if content_hash == self.content_hash:
+            return False
+
+        remote_config = json.loads(body.decode("utf-8"))
+        if not isinstance(remote_config, dict):
+            raise ValueError("远程配置必须是JSON对象")
+
+        self.content_hash = content_hash
+        self.config_manager.apply_remote_config(remote_config)
+        self._save_cache(remote_config)
+        print(f"远程配置已更新: {', '.join(sorted(remote_config)) or '(空)'}")
+        return True
+
+    def _load_cache(self):
+        """启动时先使用上次拉取的配置，离线也能保持集中设置"""
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return
+        if cache.get("url") != self.url or not isinstance(cache.get("config"), dict):
+            return
+        self.etag = cache.get("etag")
+        self.last_modified = cache.get("last_modified")
+        self.content_hash = cache.get("content_hash")
+        self.config_manager.apply_remote_config(cache["config"])
+
+    def _save_cache(self, remote_config: Dict[str, Any]):
+        cache = {
+            "url": self.url,
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+            "content_hash": self.content_hash,
+            "config": remote_config,
+        }
+        try:
+            tmp_path = self.cache_file + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_file)
+        except OSError as e:
+            print(f"保存远程配置缓存失败: {e}")
+
+    def get_status(self) -> dict:
+        """获取客户端状态"""
+        return {
+            "url": self.url,
+            "etag": self.etag,
+            "last_status": self.last_status,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+
+def create_remote_config_client(config_manager: ConfigManager) -> Optional[RemoteConfigClient]:
+    """
+    根据配置创建远程配置客户端
+
+    Returns:
+        Optional[RemoteConfigClient]: 未配置 remote_config_url 时返回None
+    """
+    config = config_manager.get_config()
+    url = config.get("remote_config_url")
+    if not url:
+        return None
+    cache_dir = os.path.dirname(os.path.abspath(config_manager.config_file))
+    return RemoteConfigClient(
+        config_manager,
+        url,
+        interval=config.get("remote_config_interval_seconds", 300),
+        max_backoff=config.get("remote_config_max_backoff_seconds", 3600),
+        cache_file=os.path.join(cache_dir, "remote_config_cache.json"),
+    )
+
+
+if __name__ == "__main__":
+    # 使用本地HTTP服务器测试条件请求与合并
+    import shutil
+    import tempfile
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    remote_body = json.dumps({"idle_time_seconds": 30, "volume": 0}).encode("utf-8")
+    remote_etag = '"cfg-1"'
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if self.headers.get("If-None-Match") == remote_etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("ETag", remote_etag)
+            self.send_header("Content-Length", str(len(remote_body)))
+            self.end_headers()
+            self.wfile.write(remote_body)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    work_dir = tempfile.mkdtemp(prefix="remote_config_")
+
+    try:
+        manager = ConfigManager(os.path.join(work_dir, "config.json"))
+        changes = []
+        manager.add_listener(changes.append)
+
+        client = RemoteConfigClient(manager, f"http://127.0.0.1:{server.server_port}/fleet.json",
+                                    cache_file=os.path.join(work_dir, "remote_config_cache.json"))
+        assert client.poll_once() and manager.get_config()["volume"] == 0
+        assert not client.poll_once() and client.last_status == 304
+        assert len(changes) == 1
+        print("✅ 远程配置合并成功，未变化时只收到304")
+
+        client.failures = 3
+        delays = [client.next_delay() for _ in range(100)]
+        assert all(600 <= d <= 1200 for d in delays)
+        print(f"✅ 第3次失败后退避 {min(delays):.0f}-{max(delays):.0f} 秒")
+    finally:
+        server.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
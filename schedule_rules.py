@@ -0,0 +1,237 @@
+"""
+时间规则模块
+按星期、时段和日期切换空闲触发时间与播放内容，例如：
+工作日 9:00-18:00 三分钟触发播放 office.mp4；夜间和周末 30 秒触发播放宣传片文件夹；节假日停用
+
+规则按配置顺序决定优先级（先匹配的生效），编译为按开始时间排序、互不重叠的区间索引，
+查询当前规则为 O(log n)，同时返回下一个规则边界，调度器只需在边界时刻重新计算
+"""
+
+import bisect
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+DAY_SECONDS = 86400
+WEEK_SECONDS = 7 * DAY_SECONDS
+
+# 星期简写（周一为0）
+DAY_ALIASES = {
+    "all": [0, 1, 2, 3, 4, 5, 6],
+    "weekdays": [0, 1, 2, 3, 4],
+    "weekends": [5, 6],
+}
+
+
+def parse_time_of_day(value: str) -> int:
+    """
+    解析 "HH:MM" 或 "HH:MM:SS" 为当天的秒数（允许 "24:00" 表示午夜）
+
+    Raises:
+        ValueError: 格式不正确
+    """
+    parts = [int(part) for part in str(value).split(":")]
+    if len(parts) not in (2, 3):
+        raise ValueError(f"时间格式应为 HH:MM: {value}")
+    hours, minutes = parts[0], parts[1]
+    seconds = parts[2] if len(parts) == 3 else 0
+    total = hours * 3600 + minutes * 60 + seconds
+    if not 0 <= total <= DAY_SECONDS or minutes >= 60 or seconds >= 60:
+        raise ValueError(f"时间超出范围: {value}")
+    return total
+
+
+class ScheduleRule:
+    """单条时间规则"""
+
+    def __init__(self, spec: Dict[str, Any], index: int, presets: Dict[str, Any] = None):
+        self.spec = spec
+        self.name = spec.get("name") or f"规则{index + 1}"
+        self.enabled = bool(spec.get("enabled", True))
+        self.video_path: Optional[str] = spec.get("video_path")
+        self.start = parse_time_of_day(spec.get("start", "00:00"))
+        self.end = parse_time_of_day(spec.get("end", "24:00"))
+        self.dates = {date.fromisoformat(d) for d in spec.get("dates", [])}
+
+        days = spec.get("days", "all")
+        self.days = sorted(set(DAY_ALIASES[days] if isinstance(days, str) else days))
+        if any(day not in range(7) for day in self.days):
+            raise ValueError(f"{self.name}: days 只能是 0-6（周一为0）")
+
+        # 触发时间：idle_seconds / idle_minutes / 引用 quick_presets 中的预设
+        self.idle_seconds: Optional[int] = None
+        if "idle_seconds" in spec or "idle_minutes" in spec:
+            self.idle_seconds = int(spec.get("idle_minutes", 0)) * 60 + int(spec.get("idle_seconds", 0))
+        elif "preset" in spec:
+            preset = (presets or {}).get(spec["preset"])
+            if preset is None:
+                raise ValueError(f"{self.name}: 未找到预设 {spec['preset']}")
+            self.idle_seconds = preset.get("minutes", 0) * 60 + preset.get("seconds", 0)
+
+    def day_intervals(self) -> List[Tuple[int, int]]:
+        """当天内的区间；结束早于开始表示跨午夜，返回 (开始, 24:00) 和次日部分 (0, 结束)"""
+        if self.end > self.start:
+            return [(self.start, self.end)]
+        return [(self.start, DAY_SECONDS), (0, self.end)] if self.end else [(self.start, DAY_SECONDS)]
+
+    def weekly_intervals(self) -> List[Tuple[int, int]]:
+        """一周内（周一 00:00 起算）的区间"""
+        intervals = []
+        for day in self.days:
+            base = day * DAY_SECONDS
+            parts = self.day_intervals()
+            intervals.append((base + parts[0][0], base + parts[0][1]))
+            if len(parts) == 2 and parts[1][1] > 0:
+                # 跨午夜部分属于下一天，周日跨到周一时回绕
+                next_base = ((day + 1) % 7) * DAY_SECONDS
+                intervals.append((next_base, next_base + parts[1][1]))
+        return intervals
+
+    def __repr__(self):
+        return f"ScheduleRule({self.name!r})"
+
+
+def _paint(layers: List[Tuple[Optional[ScheduleRule], List[Tuple[int, int]]]], span: int):
+    """
+    把按优先级排列的区间合成为互不重叠的时间段（先出现的规则覆盖后面的）
+
+    Returns:
+        (starts, segments): 开始时间列表（用于二分查找）和 (开始, 结束, 规则) 列表
+    """
+    bounds = {0, span}
+    for _, intervals in layers:
+        for start, end in intervals:
+            bounds.update((max(0, min(span, start)), max(0, min(span, end))))
+    bounds = sorted(bounds)
+
+    segments = []
+    for seg_start, seg_end in zip(bounds, bounds[1:]):
+        rule = None
+        for layer_rule, intervals in layers:
+            if any(start <= seg_start < end for start, end in intervals):
+                rule = layer_rule
+                break
+        if segments and segments[-1][2] is rule:
+            segments[-1] = (segments[-1][0], seg_end, rule)
+        else:
+            segments.append((seg_start, seg_end, rule))
+    return [segment[0] for segment in segments], segments
+
+
+class ScheduleIndex:
+    """编译后的规则索引"""
+
+    def __init__(self, rules_config: List[Dict[str, Any]] = None, presets: Dict[str, Any] = None):
+        self.rules: List[ScheduleRule] = []
+        for index, spec in enumerate(rules_config or []):
+            try:
+                self.rules.append(ScheduleRule(spec, index, presets))
+            except (ValueError, TypeError, KeyError) as e:
+                print(f"忽略无效的时间规则 #{index + 1}: {e}")
+
+        weekly_rules = [rule for rule in self.rules if not rule.dates]
+        self._weekly_starts, self._weekly = _paint(
+            [(rule, rule.weekly_intervals()) for rule in weekly_rules], WEEK_SECONDS)
+
+        # 特定日期（节假日等）：日期规则优先，其余时段沿用每周规则；跨午夜的日期规则延续到次日
+        self._dates: Dict[date, tuple] = {}
+        days = {d for rule in self.rules for d in rule.dates}
+        days.update(d + timedelta(days=1) for rule in self.rules if len(rule.day_intervals()) == 2
+                    for d in rule.dates)
+        for day in sorted(days):
+            layers = []
+            for rule in self.rules:
+                parts = rule.day_intervals()
+                intervals = [parts[0]] if day in rule.dates else []
+                if len(parts) == 2 and day - timedelta(days=1) in rule.dates:
+                    intervals.append(parts[1])
+                if intervals:
+                    layers.append((rule, intervals))
+            base = day.weekday() * DAY_SECONDS
+            for start, end, rule in self._weekly:
+                if rule is not None and end > base and start < base + DAY_SECONDS:
+                    layers.append((rule, [(start - base, end - base)]))
+            self._dates[day] = _paint(layers, DAY_SECONDS)
+
+    def __bool__(self):
+        return bool(self.rules)
+
+    def lookup(self, when: datetime) -> Tuple[Optional[ScheduleRule], datetime]:
+        """
+        查询某一时刻生效的规则
+
+        Args:
+            when (datetime): 本地时间
+
+        Returns:
+            (规则或None, 下一个规则边界时刻)；没有规则时边界为 datetime.max
+        """
+        if not self.rules:
+            return None, datetime.max
+
+        day = when.date()
+        midnight = datetime.combine(day, datetime.min.time())
+        seconds = (when - midnight).total_seconds()
+
+        if day in self._dates:
+            starts, segments = self._dates[day]
+            _, end, rule = segments[bisect.bisect_right(starts, seconds) - 1]
+            return rule, midnight + timedelta(seconds=end)
+
+        base = day.weekday() * DAY_SECONDS
+        _, end, rule = self._weekly[bisect.bisect_right(self._weekly_starts, base + seconds) - 1]
+        if end == WEEK_SECONDS and self._weekly[0][2] is rule:
+            # 周日末尾与下周一开头是同一规则，跨周合并
+            end += self._weekly[0][1]
+        boundary = midnight + timedelta(seconds=end - base)
+
+        # 次日是特定日期时，在午夜切换
+        tomorrow = day + timedelta(days=1)
+        if tomorrow in self._dates:
+            boundary = min(boundary, midnight + timedelta(days=1))
+        return rule, boundary
+
+    def describe(self) -> List[str]:
+        """可读的每周时间表（用于调试）"""
+        names = ["周一", "周二", "周三", "周四", "周五", "周六", "周日"]
+
+        def format_point(seconds: int, is_end: bool) -> str:
+            day, offset = divmod(seconds, DAY_SECONDS)
+            if is_end and offset == 0:
+                day, offset = day - 1, DAY_SECONDS
+            return f"{names[day]} {offset // 3600:02d}:{offset % 3600 // 60:02d}"
+
+        return [f"{format_point(start, False)} - {format_point(end, True)}  {rule.name if rule else '(默认)'}"
+                for start, end, rule in self._weekly]
+
+
+if __name__ == "__main__":
+    # 测试规则编译与查询
+    index = ScheduleIndex([
+        {"name": "国庆", "dates": ["2026-10-01"], "enabled": False},
+        {"name": "跨年", "dates": ["2026-12-31"], "start": "22:00", "end": "02:00", "video_path": "countdown.mp4"},
+        {"name": "工作时间", "days": "weekdays", "start": "09:00", "end": "18:00",
+         "preset": "办公模式", "video_path": "office.mp4"},
+        {"name": "夜间和周末", "idle_seconds": 30, "video_path": "promo"},
+    ], presets={"办公模式": {"minutes": 3, "seconds": 0}})
+
+    for line in index.describe():
+        print(line)
+
+    checks = [
+        (datetime(2026, 10, 19, 10, 30), "工作时间", datetime(2026, 10, 19, 18, 0)),
+        (datetime(2026, 10, 19, 20, 0), "夜间和周末", datetime(2026, 10, 20, 9, 0)),
+        (datetime(2026, 10, 24, 10, 0), "夜间和周末", datetime(2026, 10, 26, 9, 0)),
+        (datetime(2026, 9, 30, 20, 0), "夜间和周末", datetime(2026, 10, 1, 0, 0)),
+        (datetime(2026, 10, 1, 10, 0), "国庆", datetime(2026, 10, 2, 0, 0)),
+        (datetime(2026, 12, 31, 23, 0), "跨年", datetime(2027, 1, 1, 0, 0)),
+        (datetime(2027, 1, 1, 1, 0), "跨年", datetime(2027, 1, 1, 2, 0)),
+        (datetime(2027, 1, 1, 2, 0), "夜间和周末", datetime(2027, 1, 1, 9, 0)),
+    ]
+    for when, expected, boundary in checks:
+        rule, next_boundary = index.lookup(when)
+        assert rule.name == expected and next_boundary == boundary, (when, rule, next_boundary)
+        print(f"✅ {when:%m-%d %a %H:%M} -> {rule.name}（触发 {rule.idle_seconds} 秒），下次切换 {next_boundary:%m-%d %H:%M}")
+
+    import timeit
+    per_lookup = timeit.timeit(lambda: index.lookup(datetime(2026, 10, 21, 12, 0)), number=100000) / 100000
+    print(f"单次查询 {per_lookup * 1e6:.2f} 微秒")
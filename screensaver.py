@@ -9,25 +9,350 @@
 import os
 import sys
 import threading
-import time
+from datetime import datetime
 from typing import Optional
 
 from config_manager import ConfigManager
+from activation_history import ActivationHistory
+from content_source import HttpContentSource, is_http_url
+from idle_trace import IdleTraceRecorder, read_trace
+from inhibitors import InhibitorSet
+from fallback_chain import FailureRegistry, FallbackChain
+from idle_stages import VIDEO, IdleStages
+from media_library import IMAGE_EXTENSIONS, list_media_files
+from media_tools import KeyframeIndex, PosterCache, SilentRenditionCache
+from metrics import metrics
+from playback_state import PlaybackPositions, choose_start_position
+from prewarm import LeadTimePredictor
+from readahead import prefetch_async
+from remote_config import create_remote_config_client
+from schedule_rules import ScheduleIndex
 from system_monitor import SystemMonitor
-from video_player import VideoPlayer
+
+# 各功能关注的配置项
+IDLE_KEYS = ('idle_time_minutes', 'idle_time_seconds')
+SCHEDULE_KEYS = ('schedule_rules', 'quick_presets')
+CONTENT_KEYS = ('video_path', 'content_cache_dir', 'download_rate_limit_kbps',
+                'content_check_interval_seconds', 'video_sha256')
 
 
 class VideoScreensaver:
     """视频屏保主控制器"""
     
-    def __init__(self, config_manager=None):
+    def __init__(self, config_manager=None, activation_callback=None,
+                 prepare_callback=None, release_callback=None, stage_callback=None, visibility_callback=None):
         self.config_manager = config_manager or ConfigManager()
+        # 达到空闲阈值时的处理，默认直接显示屏保；界面/守护模式会转到Qt主线程执行
+        self.activation_callback = activation_callback or self.show_screensaver
+        # 即将触发时的准备（默认预读视频；分离进程模式下预先启动播放器并打开媒体），用户恢复操作时释放
+        self.prepare_callback = prepare_callback or self.prewarm_media
+        self.release_callback = release_callback
+        # 触发后进入新的空闲阶段时的处理（默认直接切换进程内播放器；界面/守护模式会转到Qt主线程执行）
+        self.stage_callback = stage_callback or self.apply_idle_stage
+        # 屏保是否正在播放，由播放器的所有者提供（分离进程模式下本进程没有播放器窗口）；默认检查进程内播放器
+        self.visibility_callback = visibility_callback
+        # 当前空闲阶段，未触发时为None
+        self.idle_stage = None
+        self._prepared = False
+        self._activation_prewarmed = False
         self.system_monitor = SystemMonitor()
         self.video_player = None
         self.monitoring = False
         self.monitor_thread = None
+        # 唤醒监控循环（停止、配置变化时立即生效，不必等待当前检查间隔结束）
+        self._wakeup = threading.Event()
+        # 每次停止监控递增，旧的监控循环醒来后发现代数变化即退出
+        self._generation = 0
+        self.content_source = None
+        
+        config = self.config_manager.get_config()
+        # 基础触发时间；时间规则生效时 idle_threshold 为规则指定的值
+        self.base_idle_threshold = self._get_idle_threshold(config)
+        self.idle_threshold = self.base_idle_threshold
+        self.active_rule = None
+        self._rule_boundary = datetime.min
+        self._folder_positions = {}
+        self._build_schedule(config)
+        self._apply_schedule(datetime.now())
+        # 预热提前量按本机的空闲习惯学习，prespawn_lead_seconds 为上限
+        self.prewarm = LeadTimePredictor(config.get('prespawn_lead_seconds', 15))
+        self.inhibitors = InhibitorSet(config.get('inhibitors', {}))
+        self.idle_stages = IdleStages(config.get('idle_stages', {}))
+        self.idle_trace = None
+        self._init_idle_trace({}, config)
+        self.posters = PosterCache(config.get('poster_cache_dir', 'poster_cache'), config.get('ffmpeg_path'))
+        # 静音播放时使用的无音轨版本
+        self.silent_renditions = SilentRenditionCache(config.get('silent_cache_dir', 'silent_cache'),
+                                                      config.get('ffmpeg_path'))
+        # 续播和随机起点使用的关键帧索引
+        self.keyframes = KeyframeIndex(config.get('keyframe_cache_dir', 'keyframe_cache'), config.get('ffmpeg_path'))
+        # 主视频无法播放时的备用内容，失败记录跨启动保留
+        self.fallbacks = FallbackChain(FailureRegistry(config.get('media_failures_path', 'media_failures.json')),
+                                       config.get('ffmpeg_path'))
+        history_path = config.get('activation_history_path', 'activation_history.bin')
+        self.history = ActivationHistory(history_path) if history_path else None
+        self._init_content_source(config)
+        self.warm_media(config)
+        
+        # 配置变化（包括远程下发）按配置项实时生效
+        self.config_manager.subscribe(IDLE_KEYS + SCHEDULE_KEYS, self.on_threshold_config_changed)
+        self.config_manager.subscribe(CONTENT_KEYS, self.on_content_config_changed)
+        self.config_manager.subscribe(('volume', 'fallback_videos', 'start_position'),
+                                      lambda changes, config: self.warm_media(config))
+        self.config_manager.subscribe(('inhibitors',), lambda changes, config:
+                                      self.inhibitors.configure(config.get('inhibitors', {})))
+        self.config_manager.subscribe(('idle_stages',), lambda changes, config:
+                                      self.idle_stages.configure(config.get('idle_stages', {})))
+        self.config_manager.subscribe(('prespawn_lead_seconds',), lambda changes, config:
+                                      self.prewarm.set_max_lead(config.get('prespawn_lead_seconds', 15)))
+        self.config_manager.subscribe(('idle_trace_path',), self._init_idle_trace)
+        self.remote_config_client = create_remote_config_client(self.config_manager)
+        if self.remote_config_client:
+            self.remote_config_client.start()
         
         print("📱 视频屏保程序初始化完成")
+    
+    @staticmethod
+    def _get_idle_threshold(config) -> int:
+        """从配置计算空闲触发时间（秒）"""
+        return config.get('idle_time_minutes', 5) * 60 + config.get('idle_time_seconds', 0)
+    
+    def _build_schedule(self, config):
+        """编译时间规则索引"""
+        self.schedule = ScheduleIndex(config.get('schedule_rules', []), config.get('quick_presets', {}))
+        # 下一轮检查时重新计算当前规则
+        self._rule_boundary = datetime.min
+    
+    def _apply_schedule(self, now: datetime):
+        """根据当前时间选择生效的规则，并记录下一个规则边界"""
+        rule, self._rule_boundary = self.schedule.lookup(now)
+        if rule is not self.active_rule:
+            self.active_rule = rule
+            if rule:
+                print(f"📅 时间规则切换: {rule.name}" + ("" if rule.enabled else "（屏保停用）"))
+        
+        idle_threshold = self.base_idle_threshold
+        if rule and rule.idle_seconds is not None:
+            idle_threshold = rule.idle_seconds
+        if idle_threshold != self.idle_threshold:
+            self.idle_threshold = idle_threshold
+            print(f"⏱️ 空闲触发时间已更新为 {idle_threshold} 秒")
+            self.wake_monitor()
+    
+    def is_schedule_enabled(self) -> bool:
+        """当前时段是否允许触发屏保"""
+        return self.active_rule is None or self.active_rule.enabled
+    
+    def on_threshold_config_changed(self, changes, config):
+        """触发时间或时间规则变化：原地更新，无需重启监控"""
+        self.base_idle_threshold = self._get_idle_threshold(config)
+        if changes.keys() & set(SCHEDULE_KEYS):
+            self._build_schedule(config)
+            self.wake_monitor()
+            self.warm_media(config)
+        self._apply_schedule(datetime.now())
+    
+    def on_content_config_changed(self, changes, config):
+        """视频地址或下载设置变化：重建内容源"""
+        if self.content_source:
+            self.content_source.stop()
+            self.content_source = None
+        self._init_content_source(config)
+        self.warm_media(config)
+    
+    def _init_idle_trace(self, changes, config):
+        """配置了 idle_trace_path 时记录空闲轨迹，用于离线评估触发策略"""
+        if self.idle_trace:
+            self.idle_trace.close()
+            self.idle_trace = None
+        path = config.get('idle_trace_path')
+        if path:
+            self.idle_trace = IdleTraceRecorder(path)
+            # 已有的轨迹用于学习预热提前量
+            if os.path.exists(path):
+                try:
+                    self.prewarm.seed(length for _, length in read_trace(path)[-500:])
+                except (OSError, ValueError) as e:
+                    print(f"读取空闲轨迹失败: {e}")
+    
+    def _init_content_source(self, config):
+        """视频路径为HTTP地址时，启动后台下载与校验"""
+        video_path = config.get('video_path', 'video.mp4')
+        if not is_http_url(video_path):
+            return
+        
+        self.content_source = HttpContentSource(
+            video_path,
+            cache_dir=config.get('content_cache_dir', 'content_cache'),
+            rate_limit_kbps=config.get('download_rate_limit_kbps', 0),
+            check_interval=config.get('content_check_interval_seconds', 600),
+            expected_sha256=config.get('video_sha256'),
+            on_updated=lambda path: self.warm_videos([path], self.config_manager.get_config())
+        ).start()
+    
+    def warm_media(self, config):
+        """在后台为全局视频、时间规则和备用视频生成封面帧（静音时还有无音轨版本）并预先校验"""
+        paths = [config.get('video_path', 'video.mp4')]
+        paths += [rule.video_path for rule in self.schedule.rules if rule.video_path]
+        paths += config.get('fallback_videos', [])
+        if self.content_source and self.content_source.get_local_path():
+            paths.append(self.content_source.get_local_path())
+        videos = []
+        for path in paths:
+            if os.path.isdir(path):
+                videos += list_media_files(path)
+            elif not is_http_url(path) and os.path.exists(path):
+                videos.append(path)
+        self.warm_videos(videos, config)
+    
+    def content_candidates(self, config):
+        """
+        控制面板可选的内容：视频所在文件夹中的视频、备用视频和备用轮播图片（不读取文件内容）
+        
+        Returns:
+            list: [(路径, "video" / "image")]，按文件夹内文件名排序并去重
+        """
+        folders = []
+        for path in [config.get('video_path', 'video.mp4')] + list(config.get('fallback_videos', [])):
+            if is_http_url(path):
+                continue
+            folder = path if os.path.isdir(path) else os.path.dirname(os.path.abspath(path))
+            if folder not in folders:
+                folders.append(folder)
+        candidates = [(path, 'video') for folder in folders for path in list_media_files(folder)]
+        slideshow = config.get('fallback_slideshow')
+        if slideshow:
+            candidates += [(path, 'image') for path in list_media_files(slideshow, IMAGE_EXTENSIONS)]
+        return list(dict.fromkeys(candidates))
+    
+    def warm_videos(self, videos, config):
+        """在后台校验指定视频并生成封面帧和关键帧索引，静音时同时生成无音轨版本"""
+        self.fallbacks.validate_async(videos)
+        self.posters.generate_async(videos)
+        if config.get('start_position', 'resume') != 'beginning':
+            self.keyframes.generate_async(videos)
+        if config.get('volume', 50) == 0:
+            self.silent_renditions.generate_async(videos)
+    
+    def playback_options(self, video_path: str, config) -> dict:
+        """
+        播放器参数：音量、渐入时长（静音时附带已生成的无音轨版本）、预读窗口、起始位置和进度文件、帧滤镜、
+        内容切换和播放顺序、叠加层、是否会进入调暗阶段
+        
+        Returns:
+            dict: FullScreenVideoPlayer 的 volume / fade_ms / silent_path / readahead_window_mb /
+                  start_ms / positions_path / frame_filters / transition / playlist / overlays / overlays_path /
+                  idle_dimming 参数
+        """
+        volume = config.get('volume', 50)
+        options = {'volume': volume, 'fade_ms': config.get('volume_fade_ms', 1500),
+                   'readahead_window_mb': config.get('readahead_window_mb', 64)}
+        if config.get('frame_filters'):
+            options['frame_filters'] = config['frame_filters']
+        if config.get('transition'):
+            options['transition'] = config['transition']
+            options['playlist'] = self.playlist_after(video_path)
+        if config.get('overlays'):
+            options['overlays'] = config['overlays']
+        if config.get('overlays_path'):
+            options['overlays_path'] = os.path.abspath(config['overlays_path'])
+        if self.idle_stages.dims:
+            options['idle_dimming'] = True
+        if volume == 0 and video_path:
+            silent_path = self.silent_renditions.lookup(video_path)
+            if silent_path:
+                options['silent_path'] = os.path.abspath(silent_path)
+            else:
+                # 尚未生成（或没有 ffmpeg）时本次仍解码音频，只是不输出
+                metrics.increment("player.silent_rendition_misses")
+                self.silent_renditions.generate_async([video_path])
+        
+        positions_path = config.get('playback_positions_path', 'playback_positions.json')
+        if positions_path and video_path:
+            keyframes = self.keyframes.lookup(video_path)
+            mode = config.get('start_position', 'resume')
+            if keyframes is None and mode != 'beginning':
+                # 没有索引时本次仍按原位置跳转（需要解码到该位置），下次即可对齐关键帧
+                self.keyframes.generate_async([video_path])
+            options['positions_path'] = os.path.abspath(positions_path)
+            options['start_ms'] = choose_start_position(mode, PlaybackPositions(positions_path).get(video_path),
+                                                        keyframes)
+        return options
+    
+    def resolve_video_path(self, config, advance: bool = True) -> Optional[str]:
+        """
+        获取本次播放使用的本地视频文件，不可用时返回None
+        
+        Args:
+            advance (bool): 是否推进文件夹轮播位置（预热时只查看，不推进）
+        """
+        if self.active_rule and self.active_rule.video_path:
+            return self._resolve_rule_video(self.active_rule.video_path, advance)
+        
+        video_path = config.get('video_path', 'video.mp4')
+        
+        if self.content_source:
+            local_path = self.content_source.get_local_path()
+            if not local_path:
+                print(f"⏳ 视频尚未下载完成: {video_path}")
+            return local_path
+        
+        if not os.path.exists(video_path):
+            print(f"❌ 视频文件不存在: {video_path}")
+            return None
+        return video_path
+    
+    def rule_folder(self) -> Optional[str]:
+        """当前规则指定的视频文件夹，不是文件夹时返回None"""
+        if self.active_rule and self.active_rule.video_path and os.path.isdir(self.active_rule.video_path):
+            return self.active_rule.video_path
+        return None
+    
+    def playlist_after(self, video_path: Optional[str]) -> list:
+        """本次播放中 video_path 之后依次播放的视频：规则指定文件夹时为文件夹中其后的文件（循环），否则为空"""
+        folder = self.rule_folder()
+        if not folder or not video_path:
+            return []
+        files = [os.path.abspath(path) for path in list_media_files(folder)]
+        current = os.path.abspath(video_path)
+        if current not in files:
+            return files
+        position = files.index(current)
+        return files[position + 1:] + files[:position]
+    
+    def playback_plan(self, config) -> Optional[tuple]:
+        """
+        本次播放的视频和播放器参数：主视频不可用或已记录失败时从备用链中选取，
+        其余候选随参数交给播放器，播放出错时立即切换
+        
+        Returns:
+            Optional[tuple]: (视频路径或None, 播放器参数)；没有任何可播放内容时返回None
+        """
+        chain = self.fallbacks.candidates(self.resolve_video_path(config), config)
+        if not chain:
+            print("❌ 没有可播放的内容")
+            return None
+        video_path = chain.pop(0)['path'] if chain[0]['kind'] == 'video' else None
+        options = self.playback_options(video_path, config)
+        options['fallbacks'] = chain
+        return video_path, options
+    
+    def _resolve_rule_video(self, video_path: str, advance: bool = True) -> Optional[str]:
+        """规则指定的视频：文件直接播放，文件夹按顺序轮播"""
+        if os.path.isdir(video_path):
+            files = list_media_files(video_path)
+            if not files:
+                print(f"❌ 文件夹中没有视频文件: {video_path}")
+                return None
+            position = self._folder_positions.get(video_path, 0) % len(files)
+            if advance:
+                self._folder_positions[video_path] = position + 1
+            return files[position]
+        
+        if not os.path.exists(video_path):
+            print(f"❌ 视频文件不存在: {video_path}")
+            return None
+        return video_path
         
     def start_monitoring(self):
         """开始监控系统空闲状态"""
@@ -35,23 +360,51 @@ class VideoScreensaver:
             return
             
         self.monitoring = True
+        self._wakeup.clear()
+        generation = self._generation
         print("🔍 开始监控系统空闲状态...")
         
-        config = self.config_manager.get_config()
-        idle_time_minutes = config.get('idle_time_minutes', 5)
-        idle_time_seconds = config.get('idle_time_seconds', 0)
-        total_idle_seconds = idle_time_minutes * 60 + idle_time_seconds
-        
-        print(f"⏱️ 空闲触发时间: {idle_time_minutes}分{idle_time_seconds}秒 (总计{total_idle_seconds}秒)")
+        print(f"⏱️ 空闲触发时间: {self.idle_threshold}秒")
         
-        while self.monitoring:
+        while self.monitoring and generation == self._generation:
             try:
+                now = datetime.now()
+                if now >= self._rule_boundary:
+                    self._apply_schedule(now)
+                
+                total_idle_seconds = self.idle_threshold
+                if not self.is_schedule_enabled():
+                    # 当前时段停用屏保，直接等到下一个规则边界
+                    self._update_prepare_state(0, total_idle_seconds)
+                    self._wait(min(60, max(0.05, (self._rule_boundary - now).total_seconds())))
+                    continue
+                
                 idle_time = self.system_monitor.get_idle_time()
+                if self.idle_trace:
+                    self.idle_trace.observe(idle_time)
+                self.prewarm.observe(idle_time)
                 
-                if idle_time >= total_idle_seconds:
-                    if not self.video_player or not self.video_player.isVisible():
+                self._update_prepare_state(idle_time, total_idle_seconds)
+                
+                # 抑制条件只在接近触发时评估
+                inhibited = None
+                if idle_time >= total_idle_seconds - self.inhibitors.lead_seconds:
+                    self.inhibitors.arm()
+                    if idle_time >= total_idle_seconds and not self.is_screensaver_active():
+                        inhibited = self.inhibitors.check()
+                else:
+                    self.inhibitors.disarm()
+                
+                if idle_time >= total_idle_seconds and not inhibited:
+                    if not self.is_screensaver_active():
                         print(f"💤 系统空闲 {idle_time} 秒，启动屏保...")
-                        self.show_screensaver()
+                        self._activation_prewarmed = self.prewarm.activated()
+                        self.activation_callback()
+                        if self.idle_stage is None:
+                            self.idle_stage = VIDEO
+                    self._advance_idle_stage(idle_time)
+                elif idle_time < total_idle_seconds:
+                    self.idle_stage = None
                         
                 # 根据设置的时间调整检查频率
                 if total_idle_seconds <= 30:
@@ -60,45 +413,155 @@ class VideoScreensaver:
                     check_interval = 2  # 2分钟内每2秒检查
                 else:
                     check_interval = 5  # 长时间每5秒检查
-                    
-                time.sleep(check_interval)
+                
+                # 规则边界、预热时刻或下一个空闲阶段早于下次检查时，在该时刻重新计算
+                until_boundary = (self._rule_boundary - datetime.now()).total_seconds()
+                until_stage = self.idle_stages.until_next(idle_time) if self.idle_stage else None
+                until_prewarm = self._until_prewarm(idle_time, total_idle_seconds)
+                self._wait(max(0.05, min(check_interval, until_boundary,
+                                         until_stage if until_stage is not None else check_interval,
+                                         until_prewarm if until_prewarm is not None else check_interval)))
                 
             except Exception as e:
                 print(f"❌ 监控过程中出现错误: {e}")
-                time.sleep(10)  # 出错时等待更长时间
+                self._wait(10)  # 出错时等待更长时间
+    
+    def _wait(self, seconds: float):
+        """等待下一次检查，可被 wake_monitor() 提前唤醒"""
+        self._wakeup.wait(seconds)
+        self._wakeup.clear()
+    
+    def wake_monitor(self):
+        """立即唤醒监控循环，重新读取触发时间等状态"""
+        self._wakeup.set()
+    
+    def _advance_idle_stage(self, idle_time):
+        """屏保已触发：空闲时长到达下一个阶段时切换"""
+        if self.idle_stage is None:
+            return
+        stage = self.idle_stages.stage_for(idle_time)
+        if stage != self.idle_stage:
+            print(f"🌗 空闲 {idle_time:.0f} 秒，进入阶段: {stage}")
+            self.idle_stage = stage
+            metrics.increment(f"idle_stage.{stage}")
+            self.stage_callback(stage)
+    
+    def apply_idle_stage(self, stage: str):
+        """切换进程内播放器的空闲阶段（需要在Qt主线程调用）"""
+        if self.is_screensaver_visible():
+            self.video_player.set_idle_stage(stage, **self.idle_stages.player_options())
+    
+    def _update_prepare_state(self, idle_time, total_idle_seconds):
+        """空闲时间接近阈值时预热（提前量按本机空闲习惯学习），用户恢复操作时释放"""
+        if not self.prepare_callback:
+            return
+        
+        lead = self.prewarm.lead_for(total_idle_seconds)
+        near = lead > 0 and idle_time >= total_idle_seconds - lead
+        if near and not self._prepared:
+            self._prepared = True
+            self.prewarm.begin()
+            self.prepare_callback()
+        elif not near and self._prepared:
+            self._prepared = False
+            self.prewarm.end()
+            if self.release_callback:
+                self.release_callback()
+    
+    def _until_prewarm(self, idle_time, total_idle_seconds) -> Optional[float]:
+        """距开始预热（阈值前 lead 秒）的秒数，已预热、不预热或已过预热时刻时返回None"""
+        if not self.prepare_callback or self._prepared:
+            return None
+        lead = self.prewarm.lead_for(total_idle_seconds)
+        until = total_idle_seconds - lead - idle_time
+        return until if lead > 0 and until > 0 else None
+    
+    def prewarm_media(self) -> Optional[str]:
+        """
+        即将触发：预读本次将要播放的视频开头（prewarm_read_mb，0 为整个文件），播放器打开时数据已在系统文件缓存中
+        
+        Returns:
+            Optional[str]: 将要播放的视频，没有可用视频时返回None
+        """
+        config = self.config_manager.get_config()
+        if config.get('effect'):
+            return None
+        video_path = self.resolve_video_path(config, advance=False)
+        if not video_path or self.fallbacks.failures.is_failed(video_path):
+            return None
+        read_mb = config.get('prewarm_read_mb', 32)
+        prefetch_async(video_path, 0, int(read_mb * 1024 * 1024) if read_mb > 0 else None)
+        return video_path
     
     def stop_monitoring(self):
-        """停止监控"""
+        """停止监控（监控循环会立即被唤醒并退出）"""
         self.monitoring = False
-        if self.video_player:
-            self.video_player.close()
+        self._generation += 1
+        self.idle_stage = None
+        self.wake_monitor()
+        if self.idle_trace:
+            self.idle_trace.close()
+        if self.is_screensaver_visible():
+            self.video_player.exit_player()
         print("⏹️ 停止监控系统空闲状态")
     
     def show_screensaver(self):
         """显示屏保"""
         try:
             config = self.config_manager.get_config()
-            video_path = config.get('video_path', 'video.mp4')
-            
-            if not os.path.exists(video_path):
-                print(f"❌ 视频文件不存在: {video_path}")
+            plan = self.playback_plan(config)
+            if not plan:
                 return
+            video_path, options = plan
             
             # 关闭之前的播放器
-            if self.video_player:
-                self.video_player.close()
+            if self.is_screensaver_visible():
+                self.video_player.exit_player()
+            
+            # 按需加载播放器，守护模式下首次触发前不导入Qt
+            from video_player import FullScreenVideoPlayer
             
-            # 创建新的播放器
-            self.video_player = VideoPlayer(config)
-            self.video_player.play_video(video_path)
+            # 创建新的播放器，关闭时记录本次播放
+            prewarmed, self._activation_prewarmed = self._activation_prewarmed, False
+            player = FullScreenVideoPlayer(video_path, exit_callback=lambda: self.record_session(player.session_info()),
+                                           poster_cache=self.posters, on_media_failed=self.fallbacks.record_failure,
+                                           prewarmed=prewarmed, **options)
+            self.video_player = player
+            self.video_player.play_video()
+            metrics.increment("screensaver.activations")
             
         except Exception as e:
             print(f"❌ 播放视频失败: {e}")
     
+    def record_session(self, session: Optional[dict]):
+        """把一次播放写入启动历史"""
+        if not session or not self.history:
+            return
+        self.history.record(session['started'], session['duration'], session.get('wake_ms'),
+                            session.get('dismissed', True))
+        metrics.observe("screensaver.session_seconds", session['duration'])
+    
+    def is_screensaver_visible(self) -> bool:
+        """屏保窗口是否正在显示"""
+        if not self.video_player:
+            return False
+        try:
+            return self.video_player.isVisible()
+        except RuntimeError:
+            # 播放器关闭后Qt对象已删除（WA_DeleteOnClose）
+            self.video_player = None
+            return False
+    
+    def is_screensaver_active(self) -> bool:
+        """屏保是否正在播放（进程内播放器或独立的播放器进程）"""
+        if self.visibility_callback:
+            return bool(self.visibility_callback())
+        return self.is_screensaver_visible()
+    
     def hide_screensaver(self):
         """隐藏屏保"""
-        if self.video_player:
-            self.video_player.close()
+        if self.is_screensaver_visible():
+            self.video_player.exit_player()
 
 
 def main():
@@ -112,7 +575,7 @@ def main():
         
         # 检查视频文件
         video_path = config.get('video_path', 'video.mp4')
-        if not os.path.exists(video_path):
+        if not is_http_url(video_path) and not os.path.exists(video_path):
             print(f"❌ 错误: 找不到视频文件 '{video_path}'")
             print("💡 请确保视频文件存在并重命名为 'video.mp4'")
             input("按回车键退出...")
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+无界面守护模式
+只运行空闲调度（SystemMonitor + 配置），没有托盘、控制面板和消息框；
+Qt和FullScreenVideoPlayer在第一次达到空闲阈值时才加载
+
+等待期间不导入PyQt5，常驻内存只有Python解释器和少量标准库模块。
+player_mode 为 "process" 时本进程始终不加载Qt，播放交给按需启动的播放器子进程
+"""
+
+import queue
+import sys
+import threading
+import time
+from typing import Callable, Optional
+
+from config_manager import ConfigManager
+from control_channel import ControlServer, InstanceLock
+from metrics import get_rss_bytes, metrics
+from player_host import PlayerProcessHost
+from screensaver import VideoScreensaver
+
+
+class ScreensaverDaemon:
+    """无界面屏保守护进程"""
+
+    def __init__(self, config_manager: ConfigManager = None):
+        self.config_manager = config_manager or ConfigManager()
+        config = self.config_manager.get_config()
+
+        self.player_host: Optional[PlayerProcessHost] = None
+        self.active = False
+        self.screensaver = VideoScreensaver(self.config_manager, activation_callback=self.request_activation,
+                                            stage_callback=self.request_stage,
+                                            visibility_callback=lambda: self.active)
+        self._set_player_mode(config.get('player_mode', 'inprocess'))
+        self.tasks: "queue.Queue[Callable]" = queue.Queue()
+        self.app = None
+        self.monitor_thread: Optional[threading.Thread] = None
+        self.control_server: Optional[ControlServer] = None
+        self.running = False
+
+        # 播放模式变化在主线程切换，不影响正在运行的监控
+        self.config_manager.subscribe(
+            ('player_mode',),
+            lambda changes, config: self._set_player_mode(config.get('player_mode', 'inprocess')),
+            self.post
+        )
+
+    def _set_player_mode(self, mode: str):
+        """切换进程内播放 / 独立播放器进程"""
+        if mode == 'process' and not self.player_host:
+            self.player_host = PlayerProcessHost(on_exit=self._on_player_process_exit,
+                                                 on_media_failed=self.screensaver.fallbacks.record_failure)
+            self.screensaver.prepare_callback = self._prepare_process
+            self.screensaver.release_callback = self.player_host.release
+        elif mode != 'process' and self.player_host and not self.player_host.playing:
+            self.screensaver.prepare_callback = self.screensaver.prewarm_media
+            self.screensaver.release_callback = None
+            self.player_host.shutdown()
+            self.player_host = None
+        else:
+            return
+        print(f"🎞️ 播放模式: {'独立播放器进程' if self.player_host else '进程内播放'}")
+
+    def post(self, func: Callable):
+        """把任务交给主线程执行（Qt对象只能在主线程创建和操作）"""
+        self.tasks.put(func)
+
+    def request_activation(self):
+        """监控线程达到空闲阈值时调用"""
+        if self.active:
+            return
+        self.active = True
+        if self.player_host:
+            self._activate_process()
+        else:
+            self.post(self._activate)
+
+    def request_stage(self, stage: str):
+        """监控线程推进空闲阶段时调用"""
+        if self.player_host:
+            self.player_host.set_stage(stage, **self.screensaver.idle_stages.player_options())
+        else:
+            self.post(lambda: self.screensaver.apply_idle_stage(stage))
+
+    def _activate_process(self):
+        """在播放器子进程中播放（可直接在监控线程调用）"""
+        config = self.config_manager.get_config()
+        plan = self.screensaver.playback_plan(config)
+        if not plan or not self.player_host.play(plan[0], poster_cache_dir=self.screensaver.posters.cache_dir,
+                                                 **plan[1]):
+            self.active = False
+            return
+        metrics.increment("screensaver.activations")
+
+    def _prepare_process(self):
+        """即将触发：预读视频，预先启动播放器进程并打开媒体"""
+        video_path = self.screensaver.prewarm_media()
+        if self.player_host.prespawn() and video_path:
+            self.player_host.prepare(video_path)
+
+    def _on_player_process_exit(self):
+        self.active = False
+        self.screensaver.record_session(self.player_host.last_session)
+
+    def stop_screensaver(self):
+        """关闭正在播放的屏保"""
+        if self.player_host:
+            self.player_host.stop()
+        else:
+            self.post(self.screensaver.hide_screensaver)
+
+    def start_monitoring(self):
+        """在后台线程运行空闲监控"""
+        if self.monitor_thread and self.monitor_thread.is_alive():
+            return
+        self.monitor_thread = threading.Thread(target=self.screensaver.start_monitoring, daemon=True)
+        self.monitor_thread.start()
+
+    def stop_monitoring(self):
+        """停止空闲监控"""
+        self.screensaver.stop_monitoring()
+        if self.monitor_thread:
+            self.monitor_thread.join()
+            self.monitor_thread = None
+
+    def run(self) -> int:
+        """运行主循环，直到收到中断"""
+        self.running = True
+        self.start_monitoring()
+        metrics.set_gauge("daemon.waiting_rss_mb", round(get_rss_bytes() / 1048576, 1))
+        print(f"🌙 守护模式已启动，常驻内存 {get_rss_bytes() / 1048576:.1f} MB（未加载Qt）")
+
+        try:
+            while self.running:
+                try:
+                    task = self.tasks.get(timeout=1.0)
+                except queue.Empty:
+                    continue
+                task()
+        except KeyboardInterrupt:
+            print("\n🛑 用户中断程序")
+        finally:
+            self.running = False
+            self.stop_monitoring()
+            if self.player_host:
+                self.player_host.shutdown()
+        return 0
+
+    def _activate(self):
+        """加载Qt并播放屏保，播放器关闭后回到等待状态"""
+        try:
+            self._ensure_qt()
+            self.screensaver.show_screensaver()
+            player = self.screensaver.video_player
+            if player:
+                player.destroyed.connect(self.app.quit)
+                self.app.exec_()
+                self.screensaver.video_player = None
+        except Exception as e:
+            print(f"❌ 启动屏保失败: {e}")
+        finally:
+            self.active = False
+
+    def _ensure_qt(self):
+        """首次触发时初始化QApplication"""
+        if self.app:
+            return
+        started = time.perf_counter()
+
+        from PyQt5.QtCore import QTimer
+        from PyQt5.QtWidgets import QApplication
+
+        self.app = QApplication.instance() or QApplication(sys.argv[:1])
+        self.app.setQuitOnLastWindowClosed(False)
+
+        # 播放期间主线程在Qt事件循环中，由定时器处理排队的控制命令
+        self._task_timer = QTimer()
+        self._task_timer.timeout.connect(self._drain_tasks)
+        self._task_timer.start(100)
+
+        metrics.observe("daemon.qt_init_ms", (time.perf_counter() - started) * 1000.0)
+        print(f"🎬 Qt已加载，用时 {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    def _drain_tasks(self):
+        while True:
+            try:
+                task = self.tasks.get_nowait()
+            except queue.Empty:
+                return
+            task()
+
+    # ---------- 控制命令 ----------
+
+    def start_control_server(self):
+        """启动本地控制通道"""
+        handlers = {
+            "trigger": lambda args: self.request_activation() or "屏保已启动",
+            "stop": lambda args: self.stop_screensaver() or "屏保已关闭",
+            "pause": lambda args: self.post(self.stop_monitoring) or "监控已暂停",
+            "resume": lambda args: self.post(self.start_monitoring) or "监控已恢复",
+            "set-threshold": self.set_threshold_command,
+            "status": lambda args: self.get_status(),
+            "metrics": lambda args: metrics.snapshot(),
+            "profile": self.profile_command,
+        }
+        try:
+            self.control_server = ControlServer(handlers).start()
+        except Exception as e:
+            print(f"控制通道启动失败: {e}")
+
+    def profile_command(self, args):
+        """处理 profile 命令（按需加载诊断模块，未使用时没有开销）"""
+        from profiling import get_profiler
+        return get_profiler(self.config_manager.config_file).command(args)
+
+    def set_threshold_command(self, args):
+        """处理 set-threshold 命令，订阅了触发时间的监控会立即更新"""
+        if len(args) != 1 or not args[0].isdigit():
+            raise ValueError("用法: set-threshold <秒>")
+        total_seconds = int(args[0])
+        if total_seconds < 5:
+            raise ValueError("空闲时间不能少于5秒")
+        self.config_manager.update({'idle_time_minutes': total_seconds // 60,
+                                    'idle_time_seconds': total_seconds % 60})
+        return f"空闲触发时间已设置为 {total_seconds} 秒"
+
+    def get_status(self):
+        """获取运行状态"""
+        rss_mb = round(get_rss_bytes() / 1048576, 1)
+        metrics.set_gauge("daemon.rss_mb", rss_mb)
+        return {
+            "mode": "daemon",
+            "monitoring": self.screensaver.monitoring,
+            "idle_threshold": self.screensaver.idle_threshold,
+            "active_rule": self.screensaver.active_rule.name if self.screensaver.active_rule else None,
+            "idle_time": round(self.screensaver.system_monitor.get_idle_time(), 1),
+            "screensaver_visible": self.active,
+            "idle_stage": self.screensaver.idle_stage,
+            "qt_loaded": "PyQt5.QtWidgets" in sys.modules,
+            "rss_mb": rss_mb,
+            "player_process": self.player_host.get_status() if self.player_host else None,
+            "today": self.screensaver.history.day_stats() if self.screensaver.history else None,
+            "prewarm": self.screensaver.prewarm.report(self.screensaver.idle_threshold),
+        }
+
+
+def main() -> int:
+    """守护模式入口"""
+    instance_lock = InstanceLock()
+    if not instance_lock.acquire():
+        print("屏保程序已在运行")
+        return 0
+
+    daemon = ScreensaverDaemon()
+    daemon.start_control_server()
+    try:
+        return daemon.run()
+    finally:
+        if daemon.control_server:
+            daemon.control_server.stop()
+        instance_lock.release()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,9 +5,15 @@
 
 import time
 import threading
-from ctypes import windll, Structure, c_uint, sizeof, byref
+from ctypes import Structure, c_uint, sizeof, byref
 from typing import Callable, Optional
 
+try:
+    from ctypes import windll
+except ImportError:
+    # 非Windows平台（开发/测试环境）没有windll，空闲时间始终为0
+    windll = None
+
 
 class LASTINPUTINFO(Structure):
     """Windows API LASTINPUTINFO结构体"""
@@ -32,6 +38,9 @@ class SystemMonitor:
         Returns:
             float: 空闲时间（秒）
         """
+        if windll is None:
+            return 0.0
+        
         try:
             last_input_info = LASTINPUTINFO()
             last_input_info.cbSize = sizeof(last_input_info)
@@ -0,0 +1,259 @@
+"""
+缩略图缓存模块
+为控制面板的内容选择列表生成视频和图片的缩略图
+
+缩略图按 路径+大小+修改时间 缓存在磁盘上，超过数量上限时淘汰最久未使用的；
+生成在固定数量的后台线程中进行，滚出可见区域的请求可以取消，界面线程只读取生成好的小图
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from media_library import IMAGE_EXTENSIONS
+from media_tools import find_ffmpeg
+from metrics import metrics
+
+THUMBNAIL_SIZE = (128, 72)
+
+
+class ThumbnailCache:
+    """磁盘缩略图缓存（LRU）"""
+
+    def __init__(self, cache_dir: str = "thumbnail_cache", max_entries: int = 1000,
+                 size: Tuple[int, int] = THUMBNAIL_SIZE, ffmpeg_path: str = None):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.size = size
+        self.ffmpeg_path = ffmpeg_path
+        self._lock = threading.Lock()
+        # 缓存键 -> None，按最近使用排序；第一次查询时从目录加载
+        self._entries: Optional[OrderedDict] = None
+
+    def _key(self, path: str) -> Optional[str]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return hashlib.sha1(f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}".encode()).hexdigest()[:32]
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.jpg")
+
+    def _load_entries(self) -> OrderedDict:
+        """按文件修改时间恢复使用顺序（命中时会更新修改时间）"""
+        if self._entries is None:
+            try:
+                with os.scandir(self.cache_dir) as entries:
+                    files = [(entry.stat().st_mtime, entry.name[:-4]) for entry in entries
+                             if entry.name.endswith(".jpg")]
+            except OSError:
+                files = []
+            self._entries = OrderedDict((key, None) for _, key in sorted(files))
+        return self._entries
+
+    def lookup(self, path: str) -> Optional[str]:
+        """
+        查找已缓存的缩略图（只有一次 stat，可在界面线程调用）
+
+        Returns:
+            Optional[str]: 缩略图路径，未缓存或源文件已变化时返回None
+        """
+        key = self._key(path)
+        if not key:
+            return None
+        with self._lock:
+            entries = self._load_entries()
+            if key not in entries:
+                return None
+            entries.move_to_end(key)
+        target = self._path(key)
+        try:
+            os.utime(target)
+        except OSError:
+            with self._lock:
+                entries.pop(key, None)
+            return None
+        return target
+
+    def generate(self, path: str) -> Optional[str]:
+        """生成缩略图（耗时，在后台线程调用）；已缓存时直接返回"""
+        cached = self.lookup(path)
+        if cached:
+            return cached
+        key = self._key(path)
+        if not key:
+            return None
+        os.makedirs(self.cache_dir, exist_ok=True)
+        target = self._path(key)
+        temp_path = f"{target}.{threading.get_ident()}.tmp.jpg"
+        started = time.perf_counter()
+        try:
+            if not self._render(path, temp_path):
+                return None
+            os.replace(temp_path, target)
+        except OSError as e:
+            print(f"生成缩略图失败: {e}")
+            return None
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        metrics.increment("gallery.thumbnails_generated")
+        metrics.observe("gallery.thumbnail_ms", (time.perf_counter() - started) * 1000.0)
+        self._admit(key)
+        return target
+
+    def _admit(self, key: str):
+        """登记新缩略图，超过上限时删除最久未使用的"""
+        with self._lock:
+            entries = self._load_entries()
+            entries[key] = None
+            entries.move_to_end(key)
+            evicted = []
+            while len(entries) > self.max_entries:
+                evicted.append(entries.popitem(last=False)[0])
+        for old in evicted:
+            try:
+                os.remove(self._path(old))
+            except OSError:
+                pass
+        if evicted:
+            metrics.increment("gallery.thumbnails_evicted", len(evicted))
+
+    def _render(self, path: str, target: str) -> bool:
+        """图片用 QImageReader 按目标尺寸解码；视频（或没有 Qt 时）用 ffmpeg 截取一帧"""
+        width, height = self.size
+        if path.lower().endswith(IMAGE_EXTENSIONS):
+            try:
+                from PyQt5.QtCore import QSize, Qt
+                from PyQt5.QtGui import QImageReader
+            except ImportError:
+                pass
+            else:
+                reader = QImageReader(path)
+                source = reader.size()
+                if source.isValid():
+                    # 让解码器直接输出缩小后的图片（JPEG 可以跳过大部分解码）
+                    reader.setScaledSize(source.scaled(QSize(width, height), Qt.KeepAspectRatio))
+                image = reader.read()
+                return not image.isNull() and image.save(target, "JPG", 85)
+
+        ffmpeg = find_ffmpeg(self.ffmpeg_path)
+        if not ffmpeg:
+            return False
+        import subprocess
+
+        scale = f"scale={width}:{height}:force_original_aspect_ratio=decrease"
+        # 优先取第1秒的画面（很多视频第一帧是黑屏），视频太短时取第一帧
+        for seek in (["-ss", "1"], []):
+            try:
+                subprocess.run([ffmpeg, "-v", "error", "-y"] + seek + ["-i", path, "-frames:v", "1", "-vf", scale,
+                                                                       "-q:v", "5", target],
+                               capture_output=True, timeout=30, check=True)
+                if os.path.getsize(target) > 0:
+                    return True
+            except (OSError, subprocess.SubprocessError):
+                continue
+        return False
+
+
+class ThumbnailLoader:
+    """
+    缩略图后台生成
+
+    固定数量的工作线程；同一文件不会重复排队，可以取消不再可见的请求。
+    on_ready(path, thumbnail_path) 在工作线程中调用，thumbnail_path 为 None 表示生成失败
+    """
+
+    def __init__(self, cache: ThumbnailCache, on_ready: Callable[[str, Optional[str]], None],
+                 max_workers: int = 2):
+        self.cache = cache
+        self.on_ready = on_ready
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="thumbnail")
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Future] = {}
+
+    def request(self, path: str) -> Optional[str]:
+        """
+        请求缩略图
+
+        Returns:
+            Optional[str]: 已缓存时直接返回缩略图路径；否则排队生成，完成后调用 on_ready
+        """
+        cached = self.cache.lookup(path)
+        if cached:
+            metrics.increment("gallery.thumbnail_hits")
+            return cached
+        with self._lock:
+            if path not in self._pending:
+                self._pending[path] = self._executor.submit(self._generate, path)
+        return None
+
+    def _generate(self, path: str):
+        try:
+            thumbnail = self.cache.generate(path)
+        except Exception as e:
+            print(f"生成缩略图失败: {e}")
+            thumbnail = None
+        with self._lock:
+            self._pending.pop(path, None)
+        self.on_ready(path, thumbnail)
+
+    def cancel_except(self, paths: Iterable[str]):
+        """取消不在 paths 中且尚未开始的请求（列表滚动后调用）"""
+        keep = set(paths)
+        with self._lock:
+            for path in [path for path in self._pending if path not in keep]:
+                if self._pending[path].cancel():
+                    del self._pending[path]
+                    metrics.increment("gallery.thumbnails_cancelled")
+
+    def shutdown(self):
+        self.cancel_except(())
+        self._executor.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    # 测试缓存键、LRU淘汰和请求取消（用写入固定内容代替实际解码）
+    import tempfile
+
+    class FakeThumbnailCache(ThumbnailCache):
+        def _render(self, path, target):
+            time.sleep(0.01)
+            with open(target, "wb") as f:
+                f.write(b"thumbnail")
+            return True
+
+    work_dir = tempfile.mkdtemp(prefix="thumbnails_")
+    sources = []
+    for index in range(20):
+        sources.append(os.path.join(work_dir, f"image_{index:02d}.png"))
+        with open(sources[-1], "wb") as f:
+            f.write(os.urandom(64))
+
+    cache = FakeThumbnailCache(os.path.join(work_dir, "cache"), max_entries=8)
+    for source in sources[:10]:
+        cache.generate(source)
+    assert cache.lookup(sources[0]) is None and cache.lookup(sources[9]), "应淘汰最久未使用的缩略图"
+    assert len(os.listdir(cache.cache_dir)) == 8
+    cache.lookup(sources[2])
+    cache.generate(sources[10])
+    assert cache.lookup(sources[2]) and cache.lookup(sources[3]) is None, "命中应更新使用顺序"
+    assert FakeThumbnailCache(cache.cache_dir, max_entries=8).lookup(sources[9]), "重启后应恢复缓存"
+
+    with open(sources[9], "ab") as f:
+        f.write(b"changed")
+    assert cache.lookup(sources[9]) is None, "源文件变化后缩略图应失效"
+
+    ready = []
+    loader = ThumbnailLoader(cache, lambda path, thumbnail: ready.append(path), max_workers=1)
+    for source in sources[11:]:
+        loader.request(source)
+    loader.cancel_except(sources[11:13])
+    loader._executor.shutdown(wait=True)
+    assert 1 <= len(ready) <= 3, ready
+    print(f"✅ 淘汰与失效正常，取消后只生成了 {len(ready)} 张")
@@ -0,0 +1,104 @@
+"""
+内容切换模块
+播放器保留两组播放器/显示控件：当前内容播放到最后几秒时，在隐藏的一组中预先打开下一项
+（暂停、静音），结束时直接切换或交叉淡化，不再经历 停止 → 打开 → 播放 之间的黑屏和解码器冷启动
+
+本模块只负责设置解析、播放顺序和时机判断，不依赖 Qt
+"""
+
+from typing import List, Optional
+
+CUT = "cut"
+CROSSFADE = "crossfade"
+TRANSITION_TYPES = (CUT, CROSSFADE)
+
+
+class Transition:
+    """切换设置（transition 配置项）"""
+
+    def __init__(self, settings: dict):
+        """
+        Args:
+            settings (dict): type（cut 直接切换 / crossfade 交叉淡化）、duration_ms（淡化时长）、
+                             preroll_seconds（结束前多少秒开始预先打开下一项）
+
+        Raises:
+            ValueError: 未知的切换类型
+        """
+        self.type = settings.get("type", CROSSFADE)
+        if self.type not in TRANSITION_TYPES:
+            raise ValueError(f"未知的切换类型: {self.type}（可用: {', '.join(TRANSITION_TYPES)}）")
+        self.duration_ms = max(0, int(settings.get("duration_ms", 800))) if self.type == CROSSFADE else 0
+        # 预先打开至少要覆盖淡化时长，另留一秒让解码器就绪
+        self.preroll_ms = max(int(float(settings.get("preroll_seconds", 3)) * 1000), self.duration_ms + 1000)
+
+    def preroll_due(self, position: int, duration: int) -> bool:
+        """是否应开始预先打开下一项（时长未知时不预先打开）"""
+        return duration > 0 and duration - position <= self.preroll_ms
+
+    def switch_due(self, position: int, duration: int) -> bool:
+        """交叉淡化是否应开始（淡化在当前内容结束时完成）；直接切换等到播放结束"""
+        return self.duration_ms > 0 and duration > 0 and duration - position <= self.duration_ms
+
+
+class Playlist:
+    """本次播放的内容顺序：依次播放，到末尾后从头开始；只有一项时重复播放该项"""
+
+    def __init__(self, current: Optional[str], items: List[str] = None):
+        self.items = [current] if current else []
+        self.items += [item for item in items or [] if item and item not in self.items]
+        self.index = 0
+
+    def peek(self) -> Optional[str]:
+        """下一项"""
+        if not self.items:
+            return None
+        return self.items[(self.index + 1) % len(self.items)]
+
+    def advance(self, path: str):
+        """已切换到 path"""
+        if path in self.items:
+            self.index = self.items.index(path)
+
+    def remove(self, path: str):
+        """移除无法打开的一项（当前项不移除）"""
+        if path in self.items and self.items.index(path) != self.index:
+            position = self.items.index(path)
+            self.items.pop(position)
+            if position < self.index:
+                self.index -= 1
+
+    def reset(self, current: Optional[str]):
+        """切换到备用内容后只重复播放该内容"""
+        self.items = [current] if current else []
+        self.index = 0
+
+
+if __name__ == "__main__":
+    # 测试时机判断和播放顺序
+    crossfade = Transition({"type": "crossfade", "duration_ms": 800, "preroll_seconds": 3})
+    assert crossfade.preroll_ms == 3000
+    assert not crossfade.preroll_due(6000, 10000) and crossfade.preroll_due(7000, 10000)
+    assert not crossfade.switch_due(9100, 10000) and crossfade.switch_due(9200, 10000)
+    assert not crossfade.preroll_due(0, 0), "时长未知时不预先打开"
+
+    cut = Transition({"type": "cut", "preroll_seconds": 0})
+    assert cut.duration_ms == 0 and cut.preroll_ms == 1000 and not cut.switch_due(9999, 10000)
+    assert Transition({"duration_ms": 5000, "preroll_seconds": 2}).preroll_ms == 6000, "预先打开应覆盖淡化时长"
+    try:
+        Transition({"type": "wipe"})
+        raise AssertionError("未知类型应报错")
+    except ValueError:
+        pass
+
+    playlist = Playlist("b.mp4", ["a.mp4", "b.mp4", "c.mp4"])
+    assert playlist.items == ["b.mp4", "a.mp4", "c.mp4"] and playlist.peek() == "a.mp4"
+    playlist.advance("c.mp4")
+    assert playlist.peek() == "b.mp4"
+    playlist.remove("b.mp4")
+    assert playlist.items == ["a.mp4", "c.mp4"] and playlist.peek() == "a.mp4", "应跳过无法打开的一项"
+    playlist.remove("c.mp4")
+    assert playlist.items == ["a.mp4", "c.mp4"], "当前项不移除"
+    single = Playlist("loop.mp4")
+    assert single.peek() == "loop.mp4", "只有一项时重复播放"
+    print(f"✅ 预先打开 {crossfade.preroll_ms} 毫秒，淡化 {crossfade.duration_ms} 毫秒，播放顺序 {playlist.items}")
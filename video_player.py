@@ -5,13 +5,326 @@
 
 import os
 import sys
-from PyQt5.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget
-from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
+import time
+from PyQt5.QtWidgets import (QApplication, QGraphicsOpacityEffect, QGridLayout, QLabel, QMainWindow,
+                             QVBoxLayout, QWidget)
+from PyQt5.QtMultimedia import (QAbstractVideoBuffer, QAbstractVideoSurface, QMediaContent, QMediaPlayer,
+                                QVideoFrame)
 from PyQt5.QtMultimediaWidgets import QVideoWidget
-from PyQt5.QtCore import Qt, QUrl, pyqtSignal, QTimer
-from PyQt5.QtGui import QKeyEvent, QMouseEvent, QCursor
+from PyQt5.QtCore import Qt, QParallelAnimationGroup, QPoint, QRect, QRectF, QUrl, pyqtSignal, QTimer, QPropertyAnimation
+from PyQt5.QtGui import (QColor, QFont, QFontMetrics, QImage, QKeyEvent, QLinearGradient, QMouseEvent, QCursor,
+                         QPainter, QPixmap, QRegion)
 from typing import Callable, Optional
 
+from idle_stages import BLANK, DIMMED, DISPLAY_OFF, VIDEO, set_display_power
+from media_tools import PosterCache
+from metrics import metrics
+from overlays import OverlayCost, OverlaySource, anchor
+from playback_state import PlaybackPositions
+from readahead import PlaybackReadAhead
+from transitions import Playlist, Transition
+
+
+class EffectView(QWidget):
+    """显示生成效果：QImage 直接指向效果的 NumPy 缓冲区（不复制像素），缩放到窗口大小绘制"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.renderer = None
+        self._buffer = None
+        self._image = None
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+    
+    def paintEvent(self, event):
+        if not self.renderer:
+            return
+        buffer = self.renderer.effect.buffer
+        if buffer is not self._buffer:
+            # 降低分辨率后缓冲区重新分配，重新建立视图
+            height, width = buffer.shape[:2]
+            self._buffer = buffer
+            self._image = QImage(buffer.data, width, height, width * 4, QImage.Format_RGB32)
+        painter = QPainter(self)
+        painter.drawImage(self.rect(), self._image)
+        painter.end()
+
+
+class FilteredVideoSurface(QAbstractVideoSurface):
+    """
+    接收解码器输出的帧交给 FilteredVideoWidget 显示；只有伽马校正需要在这里逐帧处理像素
+
+    设置 min_interval 后两帧之间间隔不足的帧直接丢弃（不处理、不重绘），播放速度和声音不受影响
+    """
+    frame_ready = pyqtSignal()
+    
+    def __init__(self, chain, parent=None):
+        super().__init__(parent)
+        self.chain = chain
+        # 最新的一帧（与解码器共享数据，绘制时再映射）；伽马校正时为处理结果（复用的缓冲区）
+        self.frame = None
+        self.output = None
+        self.process_ms = 0.0
+        self.min_interval = 0.0
+        self._presented_at = 0.0
+    
+    def supportedPixelFormats(self, handle_type=QAbstractVideoBuffer.NoHandle):
+        # 只接受 RGB32，由解码后端完成颜色空间转换
+        if handle_type == QAbstractVideoBuffer.NoHandle:
+            return [QVideoFrame.Format_RGB32, QVideoFrame.Format_ARGB32]
+        return []
+    
+    def present(self, frame):
+        if self.min_interval > 0:
+            now = time.perf_counter()
+            if now - self._presented_at < self.min_interval:
+                return True
+            self._presented_at = now
+        if self.chain and self.chain.processes_pixels:
+            if not frame.map(QAbstractVideoBuffer.ReadOnly):
+                return False
+            started = time.perf_counter()
+            try:
+                bits = frame.bits()
+                bits.setsize(frame.mappedBytes())
+                self.output = self.chain.apply(bits, frame.width(), frame.height(), frame.bytesPerLine())
+            finally:
+                frame.unmap()
+            self.process_ms = (time.perf_counter() - started) * 1000.0
+        else:
+            self.frame = QVideoFrame(frame)
+        self.frame_ready.emit()
+        return True
+
+
+class FilteredVideoWidget(QWidget):
+    """
+    带帧滤镜的视频显示（代替 QVideoWidget），与 KeepAspectRatioByExpanding 一样铺满窗口
+
+    像素轨道为绘制时的偏移，调暗和暗角为按窗口尺寸缓存的遮罩，帧绘制后叠加一次。
+    帧由 Qt 自己绘制（不经过原生窗口或硬件覆盖层），透明度效果能正确合成，交叉淡化也使用这个控件
+    """
+    
+    def __init__(self, settings: Optional[dict], parent=None):
+        """
+        Args:
+            settings (dict): 帧滤镜设置（见 frame_filters.FrameFilterChain），None 表示只显示、不加滤镜
+        """
+        super().__init__(parent)
+        self.chain = None
+        if settings:
+            from frame_filters import FrameFilterChain
+            self.chain = FrameFilterChain(settings)
+        self.surface = FilteredVideoSurface(self.chain, self)
+        self.surface.frame_ready.connect(self.update)
+        self._buffer = None
+        self._image = None
+        self._mask = None
+        self._mask_image = None
+        # 调暗阶段的亮度，与滤镜遮罩在同一次绘制中叠加
+        self.idle_brightness = 1.0
+        self._started = time.perf_counter()
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+    
+    def set_idle_dimming(self, brightness: float = 1.0, fps: float = 0):
+        """
+        调暗阶段：画面亮度降到 brightness，每秒最多显示 fps 帧（0 表示不限制）
+        
+        Args:
+            brightness (float): 亮度（0-1），1 表示恢复正常
+            fps (float): 每秒显示的帧数
+        """
+        self.idle_brightness = min(1.0, max(0.0, brightness))
+        self.surface.min_interval = 1.0 / fps if fps > 0 else 0.0
+        self.update()
+    
+    def mask_image(self) -> Optional[QImage]:
+        """当前窗口尺寸的遮罩（尺寸变化时重新生成）"""
+        mask = self.chain.mask(self.width(), self.height()) if self.chain else None
+        if mask is None:
+            return None
+        if mask is not self._mask:
+            self._mask = mask
+            self._mask_image = QImage(mask.data, self.width(), self.height(), self.width() * 4,
+                                      QImage.Format_ARGB32_Premultiplied)
+        return self._mask_image
+    
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        mapped = None
+        image = None
+        if self.surface.output is not None:
+            output = self.surface.output
+            if output is not self._buffer:
+                height, width = output.shape[:2]
+                self._buffer = output
+                self._image = QImage(output.data, width, height, width * 4, QImage.Format_RGB32)
+            image = self._image
+        elif self.surface.frame is not None and self.surface.frame.map(QAbstractVideoBuffer.ReadOnly):
+            # 直接绘制解码器的帧数据，不复制
+            mapped = self.surface.frame
+            image = QImage(mapped.bits(), mapped.width(), mapped.height(), mapped.bytesPerLine(),
+                           QVideoFrame.imageFormatFromPixelFormat(mapped.pixelFormat()))
+        
+        if image is None:
+            painter.fillRect(self.rect(), Qt.black)
+        else:
+            # 按比例放大到铺满窗口，裁掉超出的部分；像素轨道平移目标位置，露出的边缘填黑
+            image_width, image_height = image.width(), image.height()
+            scale = max(self.width() / image_width, self.height() / image_height)
+            source_width, source_height = self.width() / scale, self.height() / scale
+            source = QRectF((image_width - source_width) / 2, (image_height - source_height) / 2,
+                            source_width, source_height)
+            dx, dy = self.chain.offset(time.perf_counter() - self._started) if self.chain else (0, 0)
+            target = QRectF(self.rect()).translated(dx, dy)
+            painter.drawImage(target, image, source)
+            if dx or dy:
+                for strip in QRegion(self.rect()).subtracted(QRegion(target.toRect())).rects():
+                    painter.fillRect(strip, Qt.black)
+        if mapped is not None:
+            mapped.unmap()
+        
+        started = time.perf_counter()
+        mask = self.mask_image()
+        if mask is not None and image is not None:
+            painter.drawImage(0, 0, mask)
+        if self.idle_brightness < 1.0 and image is not None:
+            painter.fillRect(self.rect(), QColor(0, 0, 0, int(round((1.0 - self.idle_brightness) * 255))))
+        painter.end()
+        mask_ms = (time.perf_counter() - started) * 1000.0
+        metrics.observe("filters.mask_ms", mask_ms)
+        metrics.observe("filters.frame_ms", mask_ms + self.surface.process_ms)
+
+
+class OverlayLayer(QWidget):
+    """叠加层：各项内容渲染为缓存的位图，内容变化时只重绘该项新旧位置所在的区域"""
+    
+    def __init__(self, source: OverlaySource, parent=None):
+        super().__init__(parent)
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.setAttribute(Qt.WA_NoSystemBackground)
+        self.source = source
+        self.cost = OverlayCost()
+        self.items = []
+        # 项序号 -> (内容, 位图, 位置)
+        self._cache = {}
+        self._render_ms = 0.0
+        self._active = True
+        # 按最早的变化时刻定时刷新，不按固定间隔轮询
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.refresh)
+        self._watch_timer = None
+        if source.path:
+            self._watch_timer = QTimer(self)
+            self._watch_timer.timeout.connect(self.reload_if_changed)
+            self._watch_timer.start(2000)
+        self.set_items(source.load())
+    
+    def set_items(self, items: list):
+        """替换全部项，重绘原有各项和新各项的区域"""
+        dirty = QRegion()
+        for _, _, rect in self._cache.values():
+            dirty = dirty.united(rect)
+        self.items = list(items)
+        self._cache.clear()
+        self.refresh(dirty)
+    
+    def reload_if_changed(self):
+        items = self.source.poll()
+        if items is not None:
+            self.set_items(items)
+    
+    def set_active(self, active: bool):
+        """黑屏阶段和退出时停止刷新"""
+        self._active = active
+        if active:
+            if self._watch_timer:
+                self._watch_timer.start(2000)
+            self.show()
+            self.refresh()
+        else:
+            self._timer.stop()
+            if self._watch_timer:
+                self._watch_timer.stop()
+            self.hide()
+    
+    def refresh(self, dirty: QRegion = None):
+        """重新渲染内容有变化的项，只重绘变化的区域，并定时到下一次变化的时刻"""
+        now = time.time()
+        started = time.perf_counter()
+        dirty = dirty if dirty is not None else QRegion()
+        for index, item in enumerate(self.items):
+            content = item.content(now)
+            cached = self._cache.get(index)
+            if cached and cached[0] == content:
+                continue
+            pixmap = self.render_item(item, content)
+            rect = QRect(QPoint(*anchor(item.position, pixmap.width(), pixmap.height(), self.width(), self.height(),
+                                        item.margin)), pixmap.size())
+            if cached:
+                dirty = dirty.united(cached[2])
+            dirty = dirty.united(rect)
+            self._cache[index] = (content, pixmap, rect)
+        self._render_ms += (time.perf_counter() - started) * 1000.0
+        if not dirty.isEmpty():
+            self.update(dirty)
+        
+        changes = [change for change in (item.next_change(now) for item in self.items) if change is not None]
+        if changes and self._active:
+            self._timer.start(max(0, int((min(changes) - time.time()) * 1000) + 1))
+    
+    def render_item(self, item, content: str) -> QPixmap:
+        """把一项的当前内容渲染为带透明背景的位图（文字带阴影，便于在亮画面上辨认）"""
+        if item.type == "logo":
+            source = QPixmap(content)
+            if source.isNull():
+                print(f"无法加载台标: {content}")
+                return QPixmap()
+            if item.width:
+                source = source.scaledToWidth(item.width, Qt.SmoothTransformation)
+            pixmap = QPixmap(source.size())
+            pixmap.fill(Qt.transparent)
+            painter = QPainter(pixmap)
+            painter.setOpacity(item.opacity)
+            painter.drawPixmap(0, 0, source)
+            painter.end()
+            return pixmap
+        
+        font = QFont()
+        font.setPixelSize(item.size)
+        font_metrics = QFontMetrics(font)
+        shadow = max(1, item.size // 18)
+        pixmap = QPixmap(font_metrics.horizontalAdvance(content) + shadow, font_metrics.height() + shadow)
+        pixmap.fill(Qt.transparent)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.TextAntialiasing)
+        painter.setFont(font)
+        painter.setOpacity(item.opacity)
+        painter.setPen(QColor(0, 0, 0, 160))
+        painter.drawText(shadow, shadow + font_metrics.ascent(), content)
+        painter.setPen(QColor(item.color))
+        painter.drawText(0, font_metrics.ascent(), content)
+        painter.end()
+        return pixmap
+    
+    def resizeEvent(self, event):
+        # 位置随尺寸变化，全部重新计算
+        self._cache.clear()
+        self.refresh()
+        super().resizeEvent(event)
+    
+    def paintEvent(self, event):
+        started = time.perf_counter()
+        painter = QPainter(self)
+        for _, pixmap, rect in self._cache.values():
+            if event.region().intersects(rect):
+                painter.drawPixmap(rect.topLeft(), pixmap)
+        painter.end()
+        pixels = sum(rect.width() * rect.height() for rect in event.region().rects())
+        self.cost.add(self._render_ms + (time.perf_counter() - started) * 1000.0, pixels)
+        self._render_ms = 0.0
+
 
 class FullScreenVideoPlayer(QMainWindow):
     """全屏视频播放器"""
@@ -20,13 +333,96 @@ class FullScreenVideoPlayer(QMainWindow):
     user_input_detected = pyqtSignal()  # 用户输入检测信号
     playback_error = pyqtSignal(str)    # 播放错误信号
     
-    def __init__(self, video_path: str = None, exit_callback: Callable = None):
+    def __init__(self, video_path: str = None, exit_callback: Callable = None,
+                 poster_cache: PosterCache = None, volume: int = 100, fade_ms: int = 0,
+                 silent_path: str = None, fallbacks: list = None,
+                 on_media_failed: Callable[[str, str], None] = None, prewarmed: Optional[bool] = None,
+                 readahead_window_mb: int = 0, start_ms: int = 0, positions_path: str = None,
+                 frame_filters: dict = None, transition: dict = None, playlist: list = None,
+                 overlays: list = None, overlays_path: str = None, idle_dimming: bool = False):
+        """
+        Args:
+            video_path (str): 视频文件路径
+            exit_callback (Callable): 退出回调函数
+            poster_cache (PosterCache): 封面帧缓存
+            volume (int): 音量（0-100），0 表示静音
+            fade_ms (int): 音量从0渐变到目标音量的毫秒数
+            silent_path (str): 无音轨版本，静音时代替 video_path 解码（不解码音频）
+            fallbacks (list): 当前视频无法播放时依次切换的候选（见 fallback_chain.FallbackChain.candidates）
+            on_media_failed (Callable): 视频无法播放时的回调 (视频路径, 原因)
+            prewarmed (bool): 触发前是否已预热，用于分别统计首帧延迟（None 表示不统计）
+            readahead_window_mb (int): 播放位置前方保持预读的大小，0 表示不预读
+            start_ms (int): 起始位置（毫秒，通常已对齐到关键帧）
+            positions_path (str): 播放进度文件，播放中节流写入当前位置
+            frame_filters (dict): 视频帧显示前的滤镜（见 frame_filters.FrameFilterChain），None 表示不处理
+            transition (dict): 内容切换设置（见 transitions.Transition），None 表示播放结束后从头循环
+            playlist (list): 当前视频之后依次播放的视频，为空时重复播放当前视频（需要 transition）
+            overlays (list): 叠加在视频上方的时钟、文字、轮播消息和台标（见 overlays.OverlayItem）
+            overlays_path (str): 叠加层文件，存在时代替 overlays，修改后自动重新加载
+            idle_dimming (bool): 是否会进入调暗阶段（调暗和降低帧率需要画面由播放器自己绘制）
+        """
         super().__init__()
+        self._created_at = time.perf_counter()
         
         self.video_path = video_path
         self.exit_callback = exit_callback
+        self.poster_cache = poster_cache
+        self.volume = max(0, min(100, int(volume)))
+        self.fade_ms = fade_ms
+        self.silent_path = silent_path if self.volume == 0 else None
+        self._silent_source = video_path
+        self._volume_fade = None
+        self.fallbacks = list(fallbacks or [])
+        self.on_media_failed = on_media_failed
+        self.prewarmed = prewarmed
+        self.readahead_bytes = int(readahead_window_mb * 1024 * 1024)
+        self.readahead = None
+        # 媒体加载完成后跳到起始位置；跳转完成前不记录进度
+        self._pending_seek = max(0, int(start_ms))
+        self.positions = PlaybackPositions(positions_path) if positions_path else None
+        self.frame_filters = frame_filters
+        self.idle_dimming = idle_dimming
+        self._first_frame_seen = False
+        # 内容切换：两组播放器/显示控件交替使用，备用的一组在结束前几秒预先打开下一项
+        self.transition = None
+        if transition:
+            try:
+                self.transition = Transition(transition)
+            except (ValueError, TypeError) as e:
+                print(f"无法启用内容切换: {e}")
+        self.playlist = Playlist(video_path, playlist)
+        self.standby_player = None
+        self.standby_widget = None
+        self._standby_path = None
+        self._transition_fade = None
+        self._switched_at = None
+        # 当前播放的内容：video / slideshow / pattern
+        self.content_kind = "video"
+        self._content_timer = None
+        self._slides = []
+        self._slide_index = 0
+        self._pattern_phase = 0.0
+        self.effect_view = None
+        self._effect_started = 0.0
+        self.poster_label = None
+        self.dim_layer = None
+        self.overlays = overlays
+        self.overlays_path = overlays_path
+        self.overlay_layer = None
+        # 空闲阶段：video / dimmed / blank / off
+        self.idle_stage = VIDEO
+        # 调暗阶段的 (亮度, 每秒帧数)，切换到下一项时沿用
+        self._video_dimming = (1.0, 0)
+        self._poster_fade = None
+        self._poster_capture_scheduled = False
         self.media_player = None
         self.video_widget = None
+        self._exiting = False
+        self._input_at = None
+        # 本次播放的记录：开始时间、隐藏时间、唤醒延迟
+        self.started_at = None
+        self.hidden_at = None
+        self.wake_ms = None
         
         self.init_ui()
         self.init_media_player()
@@ -42,34 +438,153 @@ class FullScreenVideoPlayer(QMainWindow):
         self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint)
         self.setAttribute(Qt.WA_DeleteOnClose)
         
-        # 创建视频显示控件
-        self.video_widget = QVideoWidget()
-        self.video_widget.setAspectRatioMode(Qt.KeepAspectRatioByExpanding)
+        # 创建视频显示控件；启用内容切换时另有一个隐藏的备用控件
+        self.video_widget = self.create_video_widget()
+        
+        # 封面帧与视频叠放，封面帧在上层，解码出第一帧后淡出
+        container = QWidget()
+        layout = QGridLayout(container)
+        layout.setContentsMargins(0, 0, 0, 0)
+        if self.transition:
+            self.standby_widget = self.create_video_widget()
+            self.standby_widget.hide()
+            layout.addWidget(self.standby_widget, 0, 0)
+        layout.addWidget(self.video_widget, 0, 0)
+        self.poster_label = QLabel()
+        self.poster_label.setAlignment(Qt.AlignCenter)
+        self.poster_label.setStyleSheet("background-color: black;")
+        layout.addWidget(self.poster_label, 0, 0)
+        self.load_poster()
+        # 时钟、提示文字和台标在视频与封面帧上方、调暗层下方
+        if self.overlays or self.overlays_path:
+            self.overlay_layer = OverlayLayer(OverlaySource(self.overlays, self.overlays_path))
+            layout.addWidget(self.overlay_layer, 0, 0)
+        # 调暗/黑屏阶段覆盖在最上层
+        self.dim_layer = QLabel()
+        self.dim_layer.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.dim_layer.hide()
+        layout.addWidget(self.dim_layer, 0, 0)
         
         # 设置中央控件
-        self.setCentralWidget(self.video_widget)
+        self.setCentralWidget(container)
         
         # 设置为全屏
         self.showFullScreen()
+        if not self.poster_label.isHidden():
+            # 下一轮事件循环时封面帧已经绘制
+            QTimer.singleShot(0, lambda: metrics.observe(
+                "player.poster_shown_ms", (time.perf_counter() - self._created_at) * 1000.0))
         
         # 确保窗口获得焦点以接收键盘事件
         self.setFocus()
         self.activateWindow()
     
+    def create_video_widget(self) -> QWidget:
+        """
+        视频显示控件；启用帧滤镜、交叉淡化或调暗阶段时由自定义的显示控件接收解码后的帧
+        
+        QVideoWidget 通过原生窗口或硬件覆盖层显示，透明度效果和叠放在上方的半透明控件对它不起作用
+        （画面全黑或停住），需要淡化或调暗的画面必须由 Qt 自己绘制
+        """
+        if self.frame_filters:
+            try:
+                return FilteredVideoWidget(self.frame_filters)
+            except (ImportError, ValueError, TypeError) as e:
+                print(f"无法启用帧滤镜: {e}")
+                self.frame_filters = None
+        if (self.transition and self.transition.duration_ms > 0) or self.idle_dimming:
+            return FilteredVideoWidget(None)
+        video_widget = QVideoWidget()
+        video_widget.setAspectRatioMode(Qt.KeepAspectRatioByExpanding)
+        return video_widget
+    
+    def load_poster(self):
+        """加载缓存的封面帧（按屏幕分辨率），没有缓存时不显示"""
+        pixmap = None
+        if self.poster_cache and self.video_path:
+            screen = QApplication.primaryScreen().size()
+            path = self.poster_cache.lookup(self.video_path, screen.width(), screen.height())
+            if path:
+                pixmap = QPixmap(path)
+                if pixmap.size() != screen:
+                    pixmap = pixmap.scaled(screen, Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
+        
+        if pixmap and not pixmap.isNull():
+            self.poster_label.setPixmap(pixmap)
+            metrics.increment("player.poster_hits")
+        else:
+            self.poster_label.hide()
+            if self.poster_cache:
+                metrics.increment("player.poster_misses")
+    
+    def crossfade_from_poster(self):
+        """第一帧已解码：封面帧淡出，露出视频（视频不由 Qt 绘制时无法合成，直接隐藏封面帧）"""
+        if self.poster_label.isHidden() or self._poster_fade:
+            return
+        if not self.composited():
+            self.poster_label.hide()
+            return
+        effect = QGraphicsOpacityEffect(self.poster_label)
+        self.poster_label.setGraphicsEffect(effect)
+        self._poster_fade = QPropertyAnimation(effect, b"opacity", self)
+        self._poster_fade.setDuration(150)
+        self._poster_fade.setStartValue(1.0)
+        self._poster_fade.setEndValue(0.0)
+        self._poster_fade.finished.connect(self.poster_label.hide)
+        self._poster_fade.start()
+    
+    def composited(self) -> bool:
+        """当前视频画面是否由 Qt 绘制，只有这时上方控件的透明度和淡化才能与视频正确合成"""
+        return isinstance(self.video_widget, FilteredVideoWidget)
+    
+    def capture_poster(self):
+        """没有封面帧时截取当前画面保存（ffmpeg 不可用时的后备方式）"""
+        if self._exiting or not self.poster_cache or not self.video_path:
+            return
+        if self.poster_cache.storing(self.video_path):
+            return
+        # 界面线程只截图，检查、哈希、编码和写入在后台线程完成
+        started = time.perf_counter()
+        image = self.video_widget.grab().toImage()
+        metrics.observe("player.poster_grab_ms", (time.perf_counter() - started) * 1000.0)
+        self.poster_cache.store_image_async(self.video_path, image)
+    
     def init_media_player(self):
         """初始化媒体播放器"""
-        self.media_player = QMediaPlayer(None, QMediaPlayer.VideoSurface)
-        self.media_player.setVideoOutput(self.video_widget)
+        self.media_player = self.create_media_player(self.video_widget)
+        if self.standby_widget:
+            self.standby_player = self.create_media_player(self.standby_widget)
         
-        # 设置音量（100%）
-        self.media_player.setVolume(100)
+        # 静音时不输出声音（有无音轨版本时连音频解码也省去）；需要渐变时从0开始
+        self.media_player.setMuted(self.volume == 0)
+        self.media_player.setVolume(0 if self.fade_ms > 0 else self.volume)
+    
+    def create_media_player(self, video_widget: QWidget) -> QMediaPlayer:
+        """创建输出到 video_widget 的播放器"""
+        media_player = QMediaPlayer(None, QMediaPlayer.VideoSurface)
+        if isinstance(video_widget, FilteredVideoWidget):
+            media_player.setVideoOutput(video_widget.surface)
+        else:
+            media_player.setVideoOutput(video_widget)
+        return media_player
+    
+    def fade_in_volume(self):
+        """音量从0平滑升到目标音量"""
+        if self.volume == 0 or self.fade_ms <= 0:
+            return
+        self._volume_fade = QPropertyAnimation(self.media_player, b"volume", self)
+        self._volume_fade.setDuration(self.fade_ms)
+        self._volume_fade.setStartValue(0)
+        self._volume_fade.setEndValue(self.volume)
+        self._volume_fade.start()
     
     def setup_signals(self):
         """设置信号连接"""
-        # 连接播放器信号
-        self.media_player.mediaStatusChanged.connect(self.on_media_status_changed)
-        self.media_player.error.connect(self.on_media_error)
-        self.media_player.positionChanged.connect(self.on_position_changed)
+        # 连接播放器信号（两组播放器交替使用，处理时按发送者区分）
+        for media_player in filter(None, (self.media_player, self.standby_player)):
+            media_player.mediaStatusChanged.connect(self.on_media_status_changed)
+            media_player.error.connect(self.on_media_error)
+            media_player.positionChanged.connect(self.on_position_changed)
         
         # 连接自定义信号
         self.user_input_detected.connect(self.exit_player)
@@ -90,10 +605,15 @@ class FullScreenVideoPlayer(QMainWindow):
                 print(f"视频文件不存在: {video_path}")
                 return False
             
-            # 设置媒体内容
-            media_content = QMediaContent(QUrl.fromLocalFile(os.path.abspath(video_path)))
+            # 设置媒体内容；静音播放原视频时改用无音轨版本（封面帧仍按原视频查找）
+            media_file = self.media_file_for(video_path)
+            if media_file != video_path:
+                metrics.increment("player.silent_renditions")
+            media_content = QMediaContent(QUrl.fromLocalFile(os.path.abspath(media_file)))
             self.media_player.setMedia(media_content)
             self.video_path = video_path
+            if self.readahead_bytes > 0:
+                self.readahead = PlaybackReadAhead(media_file, self.readahead_bytes)
             
             print(f"视频文件已加载: {video_path}")
             return True
@@ -103,6 +623,12 @@ class FullScreenVideoPlayer(QMainWindow):
             self.playback_error.emit(f"加载视频失败: {e}")
             return False
     
+    def media_file_for(self, video_path: str) -> str:
+        """实际解码的文件：静音播放原视频时为无音轨版本"""
+        if self.silent_path and video_path == self._silent_source and os.path.exists(self.silent_path):
+            return self.silent_path
+        return video_path
+    
     def play_video(self, video_path: str = None):
         """
         播放视频
@@ -111,13 +637,18 @@ class FullScreenVideoPlayer(QMainWindow):
             video_path (str, optional): 视频文件路径
         """
         try:
-            # 如果提供了新的视频路径，先加载
+            # 如果提供了新的视频路径，先加载；无法加载时直接切换到备用内容
             if video_path:
                 if not self.load_video(video_path):
+                    self.fall_back("视频无法加载")
                     return
             elif self.video_path:
                 if not self.load_video(self.video_path):
+                    self.fall_back("视频无法加载")
                     return
+            elif self.fallbacks:
+                self.fall_back(None)
+                return
             else:
                 print("没有指定视频文件")
                 self.playback_error.emit("没有指定视频文件")
@@ -125,6 +656,8 @@ class FullScreenVideoPlayer(QMainWindow):
             
             # 开始播放
             self.media_player.play()
+            self.fade_in_volume()
+            self.started_at = time.time()
             print("开始播放视频")
             
         except Exception as e:
@@ -142,75 +675,495 @@ class FullScreenVideoPlayer(QMainWindow):
     
     def on_media_status_changed(self, status):
         """媒体状态变化处理"""
+        if self.from_standby():
+            if status == QMediaPlayer.InvalidMedia:
+                self.skip_standby("无法打开")
+            return
         if status == QMediaPlayer.EndOfMedia:
+            if self._standby_path and self.content_kind == "video":
+                # 下一项已预先打开，直接切换（交叉淡化时通常已在结束前开始）
+                self.switch_to_standby()
+                return
             # 视频播放结束，重新开始（循环播放）
             print("视频播放结束，重新开始循环播放")
+            if self.readahead:
+                self.readahead.restart()
             self.media_player.setPosition(0)
             self.media_player.play()
         elif status == QMediaPlayer.LoadedMedia:
             print("媒体文件加载完成")
+            if self._pending_seek:
+                self.media_player.setPosition(self._pending_seek)
+                metrics.increment("player.resume_seeks")
         elif status == QMediaPlayer.BufferedMedia:
             print("媒体文件缓冲完成")
     
     def on_media_error(self, error):
         """媒体播放错误处理"""
+        if self.from_standby():
+            self.skip_standby(self.standby_player.errorString())
+            return
         error_string = self.media_player.errorString()
         print(f"媒体播放错误: {error_string}")
         self.playback_error.emit(f"播放错误: {error_string}")
     
     def on_position_changed(self, position):
-        """播放位置变化处理（可用于调试）"""
-        # 可以在这里添加播放进度相关逻辑
-        pass
+        """播放位置变化：推进预读窗口；第一帧出现后从封面帧切换到视频；接近结束时准备下一项"""
+        if self.from_standby():
+            return
+        if self.readahead:
+            self.readahead.update(position, self.media_player.duration())
+        if position <= 0:
+            return
+        if self._switched_at is not None:
+            metrics.observe("player.transition_gap_ms", (time.perf_counter() - self._switched_at) * 1000.0)
+            self._switched_at = None
+        if self.transition and self.content_kind == "video" and self._transition_fade is None:
+            duration = self.media_player.duration()
+            if self._standby_path is None and self.transition.preroll_due(position, duration):
+                self.preroll_next()
+            elif self._standby_path and self.transition.switch_due(position, duration):
+                self.switch_to_standby()
+        if self._pending_seek and position >= self._pending_seek - 1000:
+            self._pending_seek = 0
+        if self.positions and self.content_kind == "video" and not self._pending_seek:
+            self.positions.update(self.video_path, position, self.media_player.duration())
+        if not self._first_frame_seen:
+            self._first_frame_seen = True
+            if self.prewarmed is not None:
+                metrics.observe("player.first_frame_prewarmed_ms" if self.prewarmed else "player.first_frame_cold_ms",
+                                (time.perf_counter() - self._created_at) * 1000.0)
+        if not self.poster_label.isHidden():
+            self.crossfade_from_poster()
+        elif self._poster_fade is None and self.poster_cache and not self._poster_capture_scheduled:
+            # 本次没有封面帧，稍后截取画面供下次使用
+            self._poster_capture_scheduled = True
+            QTimer.singleShot(500, self.capture_poster)
+    
+    # 内容切换 - 备用播放器只在切换前 preroll_seconds 内占用解码器
+    def from_standby(self) -> bool:
+        """信号是否来自备用播放器（直接调用时视为当前播放器）"""
+        return self.standby_player is not None and self.sender() is self.standby_player
+    
+    def preroll_next(self):
+        """在隐藏的备用播放器中打开下一项并暂停（静音），让文件头解析和解码器初始化提前完成"""
+        path = self.playlist.peek()
+        if not path or not self.standby_player:
+            return
+        if not os.path.exists(path):
+            print(f"视频文件不存在: {path}")
+            self.playlist.remove(path)
+            return
+        self._standby_path = path
+        self.standby_player.setMuted(True)
+        self.standby_player.setMedia(QMediaContent(QUrl.fromLocalFile(os.path.abspath(self.media_file_for(path)))))
+        self.standby_player.pause()
+        metrics.increment("player.transition_prerolls")
+    
+    def skip_standby(self, reason: str):
+        """预先打开的下一项无法播放：从本次的播放顺序中移除，下一次位置变化时改为预先打开其后一项"""
+        path = self._standby_path
+        if not path:
+            return
+        print(f"下一项无法播放，跳过: {path}（{reason}）")
+        self.release_standby()
+        self.playlist.remove(path)
+        if self.on_media_failed and path != self.video_path:
+            self.on_media_failed(path, reason)
+    
+    def switch_to_standby(self):
+        """切换到预先打开的下一项：交换两组播放器，直接切换或交叉淡化"""
+        outgoing = self.media_player
+        self.media_player, self.standby_player = self.standby_player, self.media_player
+        self.video_widget, self.standby_widget = self.standby_widget, self.video_widget
+        path, self._standby_path = self._standby_path, None
+        self.video_path = path
+        self.playlist.advance(path)
+        self.readahead = PlaybackReadAhead(self.media_file_for(path), self.readahead_bytes) \
+            if self.readahead_bytes > 0 else None
+        if self._volume_fade:
+            self._volume_fade.stop()
+            self._volume_fade = None
+        
+        # 沿用当前的播放速度和静音状态（调暗阶段会降低速度并静音）
+        # 只有两组画面都由 Qt 绘制时淡化才能合成，否则直接切换
+        fading = (self.transition.duration_ms > 0 and outgoing.state() == QMediaPlayer.PlayingState
+                  and self.composited() and isinstance(self.standby_widget, FilteredVideoWidget))
+        self.media_player.setPlaybackRate(outgoing.playbackRate())
+        self.media_player.setMuted(outgoing.isMuted())
+        self.media_player.setVolume(0 if fading else self.volume)
+        self.apply_video_dimming()
+        self.video_widget.show()
+        self.video_widget.raise_()
+        self.raise_top_layers()
+        self.media_player.play()
+        self._switched_at = time.perf_counter()
+        metrics.increment("player.transitions")
+        print(f"🎞️ 切换到下一项: {path}")
+        if not fading:
+            self.finish_transition()
+            return
+        
+        # 新画面淡入盖住仍在播放的上一项，声音同时交叉渐变
+        effect = QGraphicsOpacityEffect(self.video_widget)
+        effect.setOpacity(0.0)
+        self.video_widget.setGraphicsEffect(effect)
+        self._transition_fade = QParallelAnimationGroup(self)
+        for target, name, start, end in ((effect, b"opacity", 0.0, 1.0),
+                                         (self.media_player, b"volume", 0, self.volume),
+                                         (outgoing, b"volume", outgoing.volume(), 0)):
+            animation = QPropertyAnimation(target, name, self._transition_fade)
+            animation.setDuration(self.transition.duration_ms)
+            animation.setStartValue(start)
+            animation.setEndValue(end)
+            self._transition_fade.addAnimation(animation)
+        self._transition_fade.finished.connect(self.finish_transition)
+        self._transition_fade.start()
+    
+    def finish_transition(self):
+        """切换完成（或被打断）：去掉淡化效果，释放上一项的解码器"""
+        if self._transition_fade:
+            self._transition_fade.stop()
+            self._transition_fade = None
+        if self.video_widget:
+            self.video_widget.setGraphicsEffect(None)
+        self.release_standby()
+    
+    def release_standby(self):
+        """停止备用播放器并关闭媒体，隐藏其显示控件"""
+        self._standby_path = None
+        if self.standby_player:
+            self.standby_player.stop()
+            self.standby_player.setMedia(QMediaContent())
+            self.standby_player.setVolume(self.volume)
+            self.standby_widget.hide()
     
     def on_playback_error(self, error_message: str):
-        """播放错误处理"""
+        """播放错误处理：立即切换到备用内容，没有备用内容时退出"""
         print(f"播放错误: {error_message}")
-        # 可以在这里添加错误处理逻辑，比如尝试播放备用视频
-        QTimer.singleShot(3000, self.exit_player)  # 3秒后退出
+        if not self.fall_back(error_message):
+            QTimer.singleShot(3000, self.exit_player)  # 3秒后退出
+    
+    # 备用内容 - 在错误信号中同步切换，窗口始终保持显示
+    def fall_back(self, reason: Optional[str]) -> bool:
+        """
+        当前视频无法播放：记录失败并切换到下一个候选
+        
+        Args:
+            reason (str): 失败原因，None 表示没有主视频（直接从候选开始）
+            
+        Returns:
+            bool: 是否已切换到备用内容
+        """
+        if self._exiting:
+            return True
+        started = time.perf_counter()
+        if reason and self.content_kind == "video" and self.video_path and self.on_media_failed:
+            self.on_media_failed(self.video_path, reason)
+        while self.fallbacks:
+            candidate = self.fallbacks.pop(0)
+            if self.start_candidate(candidate):
+                if self.started_at is None:
+                    self.started_at = time.time()
+                metrics.increment("player.fallback_switches")
+                metrics.observe("player.fallback_switch_ms", (time.perf_counter() - started) * 1000.0)
+                print(f"🔁 已切换到备用内容: {candidate.get('path') or candidate['kind']}")
+                return True
+        return False
+    
+    def start_candidate(self, candidate: dict) -> bool:
+        """开始播放一个候选，无法开始时返回False"""
+        kind = candidate.get("kind")
+        self.stop_content_timer()
+        # 备用内容只重复播放自身，不再切换到播放顺序中的下一项
+        self.finish_transition()
+        self.playlist.reset(candidate.get("path") if kind == "video" else None)
+        if self.effect_view:
+            self.effect_view.hide()
+            self.effect_view.renderer = None
+        if kind == "video":
+            path = candidate.get("path")
+            if not path or path == self.video_path or not self.load_video(path):
+                return False
+            self.content_kind = "video"
+            self._pending_seek = 0
+            self.reset_poster()
+            self.media_player.play()
+            return True
+        
+        if kind == "effect":
+            return self.start_effect(candidate)
+        if kind not in ("slideshow", "pattern"):
+            return False
+        # 图片轮播和图案不需要解码器
+        self.media_player.stop()
+        self.media_player.setMedia(QMediaContent())
+        self.content_kind = kind
+        self.reset_poster()
+        if kind == "slideshow":
+            self._slides = list(candidate.get("paths", []))
+            self._slide_index = 0
+            if not self.show_next_slide():
+                return False
+            self.start_content_timer(max(1.0, candidate.get("interval", 8)) * 1000, self.show_next_slide)
+        else:
+            self.draw_pattern()
+            self.start_content_timer(100, self.draw_pattern)
+        return True
+    
+    def start_effect(self, candidate: dict) -> bool:
+        """开始播放生成效果，未安装 NumPy 或效果名无效时返回False"""
+        size = self.size() if self.width() > 1 else QApplication.primaryScreen().size()
+        try:
+            from effects import EffectRenderer
+            renderer = EffectRenderer(candidate.get("name"), size.width(), size.height(),
+                                      fps=candidate.get("fps", 30), budget_ms=candidate.get("budget_ms", 12),
+                                      **candidate.get("options", {}))
+        except (ImportError, ValueError, TypeError) as e:
+            print(f"无法使用生成效果: {e}")
+            return False
+        # 生成效果不需要解码器
+        self.media_player.stop()
+        self.media_player.setMedia(QMediaContent())
+        self.content_kind = "effect"
+        self.reset_poster()
+        if self.effect_view is None:
+            self.effect_view = EffectView()
+            self.centralWidget().layout().addWidget(self.effect_view, 0, 0)
+        self.effect_view.renderer = renderer
+        self.effect_view.show()
+        self.raise_top_layers()
+        self._effect_started = time.perf_counter()
+        self.render_effect_frame()
+        self.start_content_timer(1000 / renderer.fps, self.render_effect_frame)
+        return True
+    
+    def render_effect_frame(self):
+        """渲染并立即绘制一帧；超出帧预算降低帧率后调整定时器"""
+        renderer = self.effect_view.renderer
+        fps = renderer.fps
+        renderer.frame(time.perf_counter() - self._effect_started, self.effect_view.repaint)
+        if renderer.fps != fps and self._content_timer:
+            self._content_timer.setInterval(int(1000 / renderer.fps))
+    
+    def raise_top_layers(self):
+        """叠加层和调暗层保持在新加入或切换到上方的内容之上"""
+        if self.overlay_layer:
+            self.overlay_layer.raise_()
+        self.dim_layer.raise_()
+    
+    def reset_poster(self):
+        """切换内容后恢复封面层（视频显示新视频的封面帧，轮播和图案在封面层上绘制）"""
+        if self._poster_fade:
+            self._poster_fade.stop()
+            self._poster_fade = None
+        self.poster_label.setGraphicsEffect(None)
+        self.poster_label.clear()
+        self.poster_label.show()
+        self._poster_capture_scheduled = False
+        if self.content_kind == "video":
+            self.load_poster()
+    
+    def start_content_timer(self, interval_ms: float, callback: Callable):
+        self._content_timer = QTimer(self)
+        self._content_timer.timeout.connect(callback)
+        self._content_timer.start(int(interval_ms))
+    
+    def stop_content_timer(self):
+        if self._content_timer:
+            self._content_timer.stop()
+            self._content_timer = None
+    
+    def show_next_slide(self) -> bool:
+        """显示轮播中的下一张图片（跳过无法加载的图片）"""
+        screen = self.poster_label.size() if self.poster_label.width() > 1 else QApplication.primaryScreen().size()
+        for _ in range(len(self._slides)):
+            path = self._slides[self._slide_index]
+            self._slide_index = (self._slide_index + 1) % len(self._slides)
+            pixmap = QPixmap(path)
+            if not pixmap.isNull():
+                self.poster_label.setPixmap(pixmap.scaled(screen, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+                return True
+        return False
+    
+    def draw_pattern(self):
+        """生成的图案：缓慢变换色相的渐变（不依赖任何媒体文件）"""
+        size = self.poster_label.size() if self.poster_label.width() > 1 else QApplication.primaryScreen().size()
+        self._pattern_phase = (self._pattern_phase + 0.002) % 1.0
+        pixmap = QPixmap(size)
+        gradient = QLinearGradient(0, 0, size.width(), size.height())
+        gradient.setColorAt(0.0, QColor.fromHsvF(self._pattern_phase, 0.6, 0.35))
+        gradient.setColorAt(1.0, QColor.fromHsvF((self._pattern_phase + 0.3) % 1.0, 0.6, 0.15))
+        painter = QPainter(pixmap)
+        painter.fillRect(pixmap.rect(), gradient)
+        painter.end()
+        self.poster_label.setPixmap(pixmap)
+    
+    # 空闲阶段 - 由监控循环按空闲时长推进
+    def set_idle_stage(self, stage: str, brightness: float = 0.35, fps: float = 10, slow_motion: bool = False):
+        """
+        切换空闲阶段
+        
+        Args:
+            stage (str): video（正常播放）/ dimmed（调暗、降低帧率）/ blank（黑屏，暂停解码）/ off（黑屏并关闭显示器）
+            brightness (float): dimmed 阶段的亮度（0-1）
+            fps (float): dimmed 阶段每秒显示的帧数
+            slow_motion (bool): dimmed 阶段改为降低播放速度达到 fps（慢放并静音），默认丢弃多余的帧
+        """
+        if self._exiting or stage == self.idle_stage:
+            return
+        previous, self.idle_stage = self.idle_stage, stage
+        suspended = stage in (BLANK, DISPLAY_OFF)
+        dimmed = stage == DIMMED
+        video = self.content_kind == "video"
+        
+        if suspended:
+            # 黑屏层盖不住原生窗口/覆盖层显示的视频，同时隐藏视频控件
+            self.dim_layer.setStyleSheet("background-color: black;")
+            self.dim_layer.show()
+            self.dim_layer.raise_()
+            if video:
+                self.video_widget.hide()
+        elif dimmed and not video:
+            # 图片轮播、图案和生成效果由 Qt 绘制，可以直接叠加半透明层
+            alpha = int(round((1.0 - brightness) * 255))
+            self.dim_layer.setStyleSheet(f"background-color: rgba(0, 0, 0, {alpha});")
+            self.dim_layer.show()
+            self.dim_layer.raise_()
+        else:
+            self.dim_layer.hide()
+        
+        if video:
+            self._video_dimming = (brightness, 0 if slow_motion else fps) if dimmed else (1.0, 0)
+            self.apply_video_dimming()
+            if suspended:
+                # 暂停即停止解码，保留解码器状态，唤醒时不需要重新打开
+                self.media_player.pause()
+            else:
+                self.video_widget.show()
+                rate = 1.0
+                if dimmed and slow_motion:
+                    frame_rate = self.media_player.metaData("VideoFrameRate") or 30.0
+                    rate = min(1.0, fps / float(frame_rate))
+                self.media_player.setPlaybackRate(rate)
+                # 慢放的声音失真，慢放时静音
+                self.media_player.setMuted(self.volume == 0 or rate < 1.0)
+                if self.media_player.state() != QMediaPlayer.PlayingState:
+                    self.media_player.play()
+        elif self._content_timer:
+            # 图片轮播和图案在黑屏阶段停止刷新
+            if suspended:
+                self._content_timer.stop()
+            elif not self._content_timer.isActive():
+                self._content_timer.start()
+        
+        if self.overlay_layer:
+            self.overlay_layer.set_active(not suspended)
+        
+        if stage == DISPLAY_OFF:
+            set_display_power(False, int(self.winId()))
+        elif previous == DISPLAY_OFF:
+            set_display_power(True, int(self.winId()))
+        metrics.set_gauge("player.idle_stage", stage)
+    
+    def apply_video_dimming(self):
+        """
+        把调暗阶段的亮度和帧率应用到当前的视频控件
+        
+        自己绘制的画面在绘制帧时叠加调暗并丢弃多余的帧；QVideoWidget 只能交给显示后端调低亮度，帧率不变
+        """
+        brightness, fps = self._video_dimming
+        if isinstance(self.video_widget, FilteredVideoWidget):
+            self.video_widget.set_idle_dimming(brightness, fps)
+        elif isinstance(self.video_widget, QVideoWidget):
+            self.video_widget.setBrightness(-int(round((1.0 - brightness) * 100)))
     
     # 事件处理方法 - 检测用户输入
+    def on_user_input(self, description: str):
+        """用户输入：先记录时间并触发退出，再输出日志（控制台输出在Windows上较慢）"""
+        if self._exiting:
+            return
+        self._input_at = time.perf_counter()
+        self.user_input_detected.emit()
+        print(f"检测到{description}")
+    
     def keyPressEvent(self, event: QKeyEvent):
         """键盘按键事件"""
-        print(f"检测到键盘输入: {event.key()}")
-        self.user_input_detected.emit()
+        self.on_user_input(f"键盘输入: {event.key()}")
         super().keyPressEvent(event)
     
     def mousePressEvent(self, event: QMouseEvent):
         """鼠标点击事件"""
-        print("检测到鼠标点击")
-        self.user_input_detected.emit()
+        self.on_user_input("鼠标点击")
         super().mousePressEvent(event)
     
     def mouseMoveEvent(self, event: QMouseEvent):
         """鼠标移动事件"""
-        print("检测到鼠标移动")
-        self.user_input_detected.emit()
+        self.on_user_input("鼠标移动")
         super().mouseMoveEvent(event)
     
     def wheelEvent(self, event):
         """鼠标滚轮事件"""
-        print("检测到鼠标滚轮")
-        self.user_input_detected.emit()
+        self.on_user_input("鼠标滚轮")
         super().wheelEvent(event)
     
     def exit_player(self):
-        """退出播放器"""
+        """
+        退出播放器（快速唤醒）
+        
+        立即隐藏窗口让桌面尽快恢复显示，停止播放、释放媒体、
+        退出回调和关闭窗口延后到下一轮事件循环执行
+        """
+        if self._exiting:
+            return
+        self._exiting = True
+        
+        self.hide()
+        self.hidden_at = time.time()
+        if self._input_at is not None:
+            self.wake_ms = (time.perf_counter() - self._input_at) * 1000.0
+            metrics.observe("wake.input_to_hidden_ms", self.wake_ms)
+        
+        QTimer.singleShot(0, self._teardown)
+    
+    def session_info(self) -> Optional[dict]:
+        """本次播放的开始时间、时长、唤醒延迟和是否被用户唤醒，未开始播放时返回None"""
+        if self.started_at is None:
+            return None
+        return {
+            "started": self.started_at,
+            "duration": (self.hidden_at or time.time()) - self.started_at,
+            "wake_ms": self.wake_ms,
+            "dismissed": self._input_at is not None,
+        }
+    
+    def _teardown(self):
+        """窗口隐藏后的清理工作"""
         print("退出视频播放器")
         
         try:
-            # 停止播放
-            self.stop_video()
-            
-            # 恢复鼠标光标
-            self.setCursor(QCursor(Qt.ArrowCursor))
-            
-            # 调用退出回调
-            if self.exit_callback:
-                self.exit_callback()
-            
-            # 关闭窗口
-            self.close()
+            with metrics.timer("wake.teardown_ms"):
+                if self._volume_fade:
+                    self._volume_fade.stop()
+                self.stop_content_timer()
+                self.finish_transition()
+                if self.overlay_layer:
+                    self.overlay_layer.set_active(False)
+                if self.positions:
+                    self.positions.flush()
+                # 停止播放并释放媒体资源（解码器）
+                self.stop_video()
+                self.media_player.setMedia(QMediaContent())
+                
+                # 恢复鼠标光标
+                self.setCursor(QCursor(Qt.ArrowCursor))
+                
+                # 调用退出回调
+                if self.exit_callback:
+                    self.exit_callback()
+                
+                # 关闭窗口
+                self.close()
             
         except Exception as e:
             print(f"退出播放器时出错: {e}")